@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Per-fire collection manifest for resumable, incremental data collection
+
+Stored as <fire_dir>/metadata/collection_manifest.json:
+  {
+    "fire_name": "Creek_Fire_2020",
+    "stages": {
+      "topography": {"status": "completed", "params_hash": "...", "finished_at": "...", "elapsed_seconds": 12.3}
+    },
+    "coverage": {
+      "era5_weather": {"start": "2020-06-01", "end": "2021-06-01", "params": {"bbox": [...]}}
+    }
+  }
+
+A stage is skipped on rerun when it completed with the same input parameters.
+Time-series datasets record the [start, end) window already on disk, so
+extending a fire's monitoring window only fetches the dates that are missing.
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+
+
+def params_hash(params):
+    """Stable hash of a JSON-serializable parameter set"""
+    return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class CollectionManifest:
+    def __init__(self, path, fire_name):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self.data = {'fire_name': fire_name, 'stages': {}, 'coverage': {}}
+        if self.path.exists():
+            try:
+                with open(self.path) as f:
+                    self.data.update(json.load(f))
+            except json.JSONDecodeError:
+                print(f"    ⚠️  Ignoring corrupt manifest {self.path}")
+
+    def save(self):
+        """Write the manifest atomically so a crash never leaves a half-written file"""
+        # Snapshot and replace under one save lock, so a later snapshot is
+        # never overwritten by an earlier one finishing last
+        with self._save_lock:
+            with self._lock:
+                payload = json.dumps(self.data, indent=2, default=str)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                f.write(payload)
+            os.replace(tmp_path, self.path)
+
+    def stage_is_current(self, stage, stage_params_hash):
+        """True if the stage already completed with these input parameters"""
+        with self._lock:
+            entry = self.data['stages'].get(stage)
+        return bool(entry) and entry['status'] == 'completed' and entry['params_hash'] == stage_params_hash
+
+    def record_stage(self, stage, result, stage_params_hash):
+        with self._lock:
+            self.data['stages'][stage] = {
+                'status': result['status'],
+                'params_hash': stage_params_hash,
+                'finished_at': datetime.now().isoformat(),
+                'elapsed_seconds': result.get('elapsed_seconds'),
+                'error': result.get('error')
+            }
+        self.save()
+
+    def missing_ranges(self, dataset, start, end, params):
+        """Date windows of [start, end) not yet on disk for a dataset.
+
+        Returns (ranges, append): append is False when nothing usable is on disk
+        (no coverage yet, or it was fetched with different params such as another
+        bbox), in which case the single range is the full window and existing
+        files should be replaced rather than extended.
+        """
+        with self._lock:
+            coverage = self.data['coverage'].get(dataset)
+        if not coverage or coverage['params'] != params:
+            return [(start, end)], False
+
+        ranges = []
+        if start < coverage['start']:
+            ranges.append((start, coverage['start']))
+        if end > coverage['end']:
+            ranges.append((coverage['end'], end))
+        return ranges, True
+
+    def record_coverage(self, dataset, start, end, params, append):
+        """Record the window now on disk, extending the previous coverage when appending"""
+        with self._lock:
+            coverage = self.data['coverage'].get(dataset)
+            if append and coverage:
+                start = min(start, coverage['start'])
+                end = max(end, coverage['end'])
+            self.data['coverage'][dataset] = {'start': start, 'end': end, 'params': params}
+        self.save()
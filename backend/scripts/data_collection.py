@@ -4,32 +4,61 @@ Enhanced Wildfire Data Collection for Realistic Simulation
 Collects comprehensive data for before/during/after wildfire analysis
 
 Requirements:
-  pip install earthengine-api pandas geopandas requests shapely rasterio xarray netcdf4 pyproj matplotlib
+  pip install earthengine-api pandas geopandas requests shapely rasterio xarray netcdf4 pyproj matplotlib pyarrow
 
 Environment Variables:
   FIRMS_MAP_KEY="your_firms_api_key"
+  FIRMS_API_URL="http://127.0.0.1:8765"   # optional FIRMS stand-in, see firms.py
   OPENWEATHER_API_KEY="your_openweather_api_key"
+  EE_BACKEND="live|record|replay"   # offline record/replay, see ee_replay.py
+  TERRAIN_MODE="server|local"       # local: fetch only the DEM, derive terrain with terrain.py
   
 Usage:
   python enhanced_wildfire_data_collection.py
+  python enhanced_wildfire_data_collection.py --workers 5   # collect fires concurrently
 """
 
 import os
 import json
-import requests
+import argparse
+import asyncio
+import threading
+import traceback
 import ee
 import pandas as pd
 import geopandas as gpd
 import numpy as np
 import xarray as xr
-from shapely.geometry import Point, Polygon
 from datetime import datetime, timedelta
 import time
 from pathlib import Path
+from ee_cache import EECache
+from collection_manifest import CollectionManifest, params_hash
+from fire_weather import fwi_from_era5
+from burned_area import burned_area_statistics, BURN_DAY_PROPERTY
+from firms import FirmsClient, FIRMS_PRODUCTS, detections_to_geodataframe
+from fire_store import FireStore
+from detection_index import DetectionIndex
+from input_stack import build_input_stack
+from terrain import local_terrain
+from tiled_reduce import TiledReducer
+from sim_grid import SimulationGrid
+from ignition import (FIRE_DAY_PROPERTY, fallback_candidates, firms_detections, mod14a1_detections,
+                      rank_ignition_candidates)
+import ee_replay
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import redirect_stdout, redirect_stderr
 
 # Initialize Earth Engine
 def initialize_earth_engine():
-    """Initialize Earth Engine with service account or user authentication"""
+    """Initialize Earth Engine with service account or user authentication
+    
+    EE_BACKEND=record|replay switches to the recorder or the offline replay
+    backend (see ee_replay.py).
+    """
+    if ee_replay.install_from_env():
+        return
+    
     try:
         service_account = 'earthengine-access@gen-lang-client-0853931727.iam.gserviceaccount.com'
         key_file = './credentials.json'
@@ -104,18 +133,153 @@ FIRES = [
 ]
 
 class WildfireDataCollector:
-    def __init__(self, fire_config, base_dir="wildfire_data"):
+    # Collection stage graph: stage -> (method, stages that must finish first).
+    # Stages without a path between them share no inputs and may run concurrently.
+    STAGES = {
+        'imagery': ('collect_high_resolution_imagery', []),
+        'topography': ('collect_topographic_data', []),
+        'era5_weather': ('_collect_era5_weather', []),
+        'noaa_weather': ('_collect_noaa_weather', []),
+        'fire_weather_indices': ('_calculate_fire_weather_indices', ['era5_weather']),
+        'fire_detection': ('collect_fire_detection_data', []),
+        'fuel': ('collect_fuel_data', []),
+        'input_stack': ('collect_input_stack', []),
+        'simulation_config': ('generate_simulation_config', ['fire_detection']),
+        'summary': ('create_summary_report', ['imagery', 'topography', 'era5_weather', 'noaa_weather',
+                                              'fire_weather_indices', 'fire_detection', 'fuel',
+                                              'input_stack', 'simulation_config'])
+    }
+
+    def __init__(self, fire_config, base_dir="wildfire_data", cache=None):
         self.fire = fire_config
         self.base_dir = Path(base_dir)
+        self.cache = cache  # optional EECache for getInfo() results
         self.fire_dir = self.base_dir / fire_config['name']
         self.fire_dir.mkdir(parents=True, exist_ok=True)
         
         # Create subdirectories
         for subdir in ['satellite', 'weather', 'topography', 'fire_detection', 'fuel_models', 'metadata']:
             (self.fire_dir / subdir).mkdir(exist_ok=True)
+        
+        # Per-stage status and fetched date coverage, so reruns can resume
+        self.manifest = CollectionManifest(self.fire_dir / 'metadata' / 'collection_manifest.json',
+                                           fire_config['name'])
+        self._stage_context = threading.local()
+        
+        # Columnar copy of every time series, partitioned by category and fire
+        self.store = FireStore(self.base_dir)
+        
+        # Region statistics are reduced in concurrent sub-tiles and merged exactly
+        self.reducer = TiledReducer(self._get_info)
+        
+        # Local terrain derives everything from the input stack's DEM, so it
+        # waits for the stack instead of fetching a second DEM alongside it
+        if os.getenv('TERRAIN_MODE', 'server').lower() == 'local':
+            self.STAGES = dict(self.STAGES, topography=('collect_topographic_data', ['input_stack']))
             
         print(f"📁 Initialized data collection for {self.fire['name']}")
 
+    def _get_info(self, obj):
+        """Evaluate an ee object, serving repeated computations from the on-disk cache"""
+        if self.cache is None:
+            return obj.getInfo()
+        return self.cache.get_info(obj)
+
+    def _error(self, message):
+        """Print a collection error and mark the running stage as incomplete"""
+        print(f"    ✗ {message}")
+        errors = getattr(self._stage_context, 'errors', None)
+        if errors is not None:
+            errors.append(message)
+
+    def run_stages(self, max_concurrency=4, force=False):
+        """Run all collection stages, overlapping stages that do not depend on each other.
+        
+        At most max_concurrency stages are in flight at once. A stage that raises is
+        marked failed and every stage depending on it is skipped; the other branches
+        of the graph keep running. A stage that reports errors but finishes is marked
+        incomplete. Stages the manifest records as completed with the same fire
+        parameters are not rerun (status 'up_to_date') unless a dependency ran again
+        or force is set. Returns {stage: {'status', 'elapsed_seconds', 'error'}}.
+        """
+        return asyncio.run(self._run_stage_graph(max_concurrency, force))
+
+    def _stage_order(self):
+        """Topologically sort STAGES, rejecting unknown dependencies and cycles"""
+        order, visiting, done = [], set(), set()
+        
+        def visit(stage):
+            if stage in done:
+                return
+            if stage in visiting:
+                raise ValueError(f"Stage dependency cycle at '{stage}'")
+            if stage not in self.STAGES:
+                raise ValueError(f"Unknown stage '{stage}'")
+            visiting.add(stage)
+            for dependency in self.STAGES[stage][1]:
+                visit(dependency)
+            visiting.discard(stage)
+            done.add(stage)
+            order.append(stage)
+        
+        for stage in self.STAGES:
+            visit(stage)
+        return order
+
+    async def _run_stage_graph(self, max_concurrency, force=False):
+        """Schedule each stage on a bounded thread pool as soon as its dependencies finish"""
+        loop = asyncio.get_running_loop()
+        results = {}
+        tasks = {}
+        fire_params_hash = params_hash(self.fire)
+        
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency),
+                                thread_name_prefix=f"{self.fire['name']}-stage") as executor:
+            async def run_stage(stage):
+                method_name, dependencies = self.STAGES[stage]
+                await asyncio.gather(*(tasks[d] for d in dependencies))
+                
+                failed = [d for d in dependencies if results[d]['status'] in ('failed', 'skipped')]
+                if failed:
+                    print(f"    ⚠️  Skipping stage {stage}: depends on {', '.join(failed)}")
+                    results[stage] = {'status': 'skipped', 'elapsed_seconds': 0, 'error': None}
+                    return
+                
+                rerun_dependencies = any(results[d]['status'] != 'up_to_date' for d in dependencies)
+                if not force and not rerun_dependencies and self.manifest.stage_is_current(stage, fire_params_hash):
+                    print(f"    ⏭️  Stage {stage} already complete, skipping")
+                    results[stage] = {'status': 'up_to_date', 'elapsed_seconds': 0, 'error': None}
+                    return
+                
+                def timed_stage():
+                    # Timed on the worker thread so queueing behind the
+                    # concurrency limit is not counted against the stage
+                    self._stage_context.errors = []
+                    started = time.time()
+                    try:
+                        getattr(self, method_name)()
+                        errors = self._stage_context.errors
+                        result = {'status': 'incomplete' if errors else 'completed',
+                                  'error': '; '.join(errors) or None}
+                    except Exception as e:
+                        print(f"    ✗ Stage {stage} failed: {e}")
+                        result = {'status': 'failed', 'error': str(e)}
+                    finally:
+                        self._stage_context.errors = None
+                    result['elapsed_seconds'] = round(time.time() - started, 2)
+                    return result
+                
+                results[stage] = await loop.run_in_executor(executor, timed_stage)
+                self.manifest.record_stage(stage, results[stage], fire_params_hash)
+            
+            # Dependencies come first in topological order, so their tasks exist
+            # by the time a dependent stage awaits them
+            for stage in self._stage_order():
+                tasks[stage] = asyncio.ensure_future(run_stage(stage))
+            await asyncio.gather(*tasks.values())
+        
+        return results
+
     def collect_high_resolution_imagery(self):
         """Collect high-resolution satellite imagery for before/during/after periods"""
         print(f"🛰️  Collecting high-resolution imagery for {self.fire['name']}...")
@@ -150,7 +314,7 @@ class WildfireDataCollector:
                            .filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE', 20))
                            .select(['B2', 'B3', 'B4', 'B8', 'B11', 'B12']))  # RGB, NIR, SWIR
             
-            count = s2_collection.size().getInfo()
+            count = self._get_info(s2_collection.size())
             if count == 0:
                 print(f"    ⚠️  No Sentinel-2 images for {period}")
                 return
@@ -191,7 +355,7 @@ class WildfireDataCollector:
             print(f"    ✓ Processed {count} Sentinel-2 images for {period}")
             
         except Exception as e:
-            print(f"    ✗ Error collecting Sentinel-2 for {period}: {e}")
+            self._error(f"Error collecting Sentinel-2 for {period}: {e}")
 
     def _collect_landsat(self, region, start_date, end_date, period):
         """Collect Landsat 8/9 imagery"""
@@ -211,7 +375,7 @@ class WildfireDataCollector:
             # Merge collections
             landsat_collection = l8_collection.merge(l9_collection)
             
-            count = landsat_collection.size().getInfo()
+            count = self._get_info(landsat_collection.size())
             if count == 0:
                 print(f"    ⚠️  No Landsat images for {period}")
                 return
@@ -252,7 +416,7 @@ class WildfireDataCollector:
             print(f"    ✓ Processed {count} Landsat images for {period}")
             
         except Exception as e:
-            print(f"    ✗ Error collecting Landsat for {period}: {e}")
+            self._error(f"Error collecting Landsat for {period}: {e}")
 
     def _collect_modis_daily(self, region, start_date, end_date, period):
         """Collect daily MODIS data for fire monitoring"""
@@ -263,7 +427,7 @@ class WildfireDataCollector:
                               .filterDate(start_date, end_date)
                               .select(['sur_refl_b01', 'sur_refl_b02', 'sur_refl_b06', 'sur_refl_b07']))
             
-            count = modis_collection.size().getInfo()
+            count = self._get_info(modis_collection.size())
             if count == 0:
                 print(f"    ⚠️  No MODIS images for {period}")
                 return
@@ -300,24 +464,29 @@ class WildfireDataCollector:
                 )
                 
                 time_series.append({
-                    'date': date.getInfo(),
-                    'nbr_mean': stats.get('NBR').getInfo(),
-                    'ndvi_mean': stats.get('NDVI').getInfo()
+                    'date': self._get_info(date),
+                    'nbr_mean': self._get_info(stats.get('NBR')),
+                    'ndvi_mean': self._get_info(stats.get('NDVI'))
                 })
             
             # Save time series
             df = pd.DataFrame(time_series)
             df.to_csv(self.fire_dir / 'satellite' / f'modis_timeseries_{period}.csv', index=False)
+            self._store_table('modis_timeseries', df, part=period)
             
             print(f"    ✓ Processed {count} MODIS images for {period}")
             
         except Exception as e:
-            print(f"    ✗ Error collecting MODIS for {period}: {e}")
+            self._error(f"Error collecting MODIS for {period}: {e}")
 
     def collect_topographic_data(self):
         """Collect comprehensive topographic data"""
         print(f"🏔️  Collecting topographic data for {self.fire['name']}...")
         
+        if os.getenv('TERRAIN_MODE', 'server').lower() == 'local':
+            self._collect_local_terrain()
+            return
+        
         region = ee.Geometry.Rectangle(self.fire['bbox'])
         
         try:
@@ -341,12 +510,7 @@ class WildfireDataCollector:
             terrain_data = dem.addBands([slope, aspect, hillshade, twi, tri])
             
             # Calculate terrain statistics
-            terrain_stats = terrain_data.reduceRegion(
-                reducer=ee.Reducer.mean().combine(ee.Reducer.stdDev(), '', True),
-                geometry=region,
-                scale=30,
-                maxPixels=1e9
-            ).getInfo()
+            terrain_stats = self.reducer.stats(terrain_data, self.fire['bbox'], scale=30, min_max=False)
             
             # Save terrain statistics
             with open(self.fire_dir / 'topography' / 'terrain_statistics.json', 'w') as f:
@@ -356,7 +520,17 @@ class WildfireDataCollector:
             print(f"    ✓ Processed terrain data (elevation, slope, aspect, TWI, TRI)")
             
         except Exception as e:
-            print(f"    ✗ Error collecting topographic data: {e}")
+            self._error(f"Error collecting topographic data: {e}")
+
+    def _collect_local_terrain(self):
+        """Fetch only the SRTM DEM and compute full-resolution derivatives and exact stats locally"""
+        try:
+            grid = SimulationGrid.from_bbox(self.fire['bbox'], resolution=30)
+            stats = local_terrain(self.fire_dir, grid)
+            print(f"    ✓ Computed terrain derivatives locally ({stats['elevation_count']:,} cells)")
+            
+        except Exception as e:
+            self._error(f"Error computing local terrain derivatives: {e}")
 
     def collect_weather_data(self):
         """Collect comprehensive weather data"""
@@ -371,73 +545,65 @@ class WildfireDataCollector:
         # Fire Weather Index calculations
         self._calculate_fire_weather_indices()
 
+    def _merge_timeseries(self, path, new_df, append, date_column='date', dedupe_columns=None):
+        """Combine newly fetched rows with the time series CSV already on disk (if append).
+        
+        Rows are de-duplicated on dedupe_columns (default: the date column, keeping
+        the newest fetch) and sorted by date. Returns the merged DataFrame; the
+        caller writes it back.
+        """
+        if append and path.exists():
+            existing = pd.read_csv(path)
+            new_df = pd.concat([existing, new_df], ignore_index=True)
+        
+        new_df[date_column] = pd.to_datetime(new_df[date_column])
+        new_df = (new_df.drop_duplicates(subset=dedupe_columns or [date_column], keep='last')
+                        .sort_values(date_column)
+                        .reset_index(drop=True))
+        return new_df
+
+    def _label_fire_period(self, df, date_column='date'):
+        """Tag each row as pre_fire, during_fire or post_fire by its date"""
+        fire_start = pd.to_datetime(self.fire['start_date'])
+        fire_end = pd.to_datetime(self.fire['end_date'])
+        
+        df['fire_period'] = 'unknown'
+        df.loc[df[date_column] < fire_start, 'fire_period'] = 'pre_fire'
+        df.loc[(df[date_column] >= fire_start) & (df[date_column] <= fire_end), 'fire_period'] = 'during_fire'
+        df.loc[df[date_column] > fire_end, 'fire_period'] = 'post_fire'
+        return df
+
+    def _store_table(self, category, df, part='data', date_column='date'):
+        """Mirror a tabular dataset into the columnar fire store (see fire_store.py)"""
+        if df.empty:
+            return
+        try:
+            df = df.copy()
+            df[date_column] = pd.to_datetime(df[date_column])
+            if 'fire_period' not in df.columns:
+                df = self._label_fire_period(df, date_column)
+            self.store.write(category, self.fire['name'], df, part=part, date_column=date_column)
+        except Exception as e:
+            self._error(f"Error writing {category} to the fire store: {e}")
+
     def _collect_era5_weather(self):
-        """Collect ERA5 reanalysis weather data"""
+        """Collect ERA5 reanalysis weather data, fetching only dates not already on disk"""
         try:
             region = ee.Geometry.Rectangle(self.fire['bbox'])
+            window = (self.fire['pre_fire_start'], self.fire['post_fire_end'])
+            coverage_params = {'bbox': self.fire['bbox']}
+            ranges, append = self.manifest.missing_ranges('era5_weather', *window, coverage_params)
+            if not ranges:
+                print(f"    ✓ ERA5 weather data already covers {window[0]} to {window[1]}")
+                return
             
-            # ERA5 Daily Aggregates
-            era5_collection = (ee.ImageCollection('ECMWF/ERA5/DAILY')
-                             .filterBounds(region)
-                             .filterDate(self.fire['pre_fire_start'], self.fire['post_fire_end'])
-                             .select([
-                                 'mean_2m_air_temperature',
-                                 'minimum_2m_air_temperature', 
-                                 'maximum_2m_air_temperature',
-                                 'dewpoint_2m_temperature',
-                                 'mean_sea_level_pressure',
-                                 'surface_pressure',
-                                 'u_component_of_wind_10m',
-                                 'v_component_of_wind_10m',
-                                 'total_precipitation'
-                             ]))
-            
-            # Convert to time series
-            def extract_weather_data(image):
-                date = ee.Date(image.get('system:time_start')).format('YYYY-MM-dd')
-                
-                # Calculate additional metrics
-                wind_speed = image.expression(
-                    'sqrt(u*u + v*v)',
-                    {'u': image.select('u_component_of_wind_10m'),
-                     'v': image.select('v_component_of_wind_10m')}
-                ).rename('wind_speed')
-                
-                wind_direction = image.expression(
-                    'atan2(v, u) * 180 / 3.14159',
-                    {'u': image.select('u_component_of_wind_10m'),
-                     'v': image.select('v_component_of_wind_10m')}
-                ).rename('wind_direction')
-                
-                # Relative humidity calculation
-                temp_k = image.select('mean_2m_air_temperature')
-                dewpoint_k = image.select('dewpoint_2m_temperature')
-                
-                rh = image.expression(
-                    '100 * exp((17.625 * (Td - 273.15)) / (243.04 + (Td - 273.15))) / exp((17.625 * (T - 273.15)) / (243.04 + (T - 273.15)))',
-                    {'T': temp_k, 'Td': dewpoint_k}
-                ).rename('relative_humidity')
-                
-                enhanced_image = image.addBands([wind_speed, wind_direction, rh])
-                
-                # Regional statistics
-                stats = enhanced_image.reduceRegion(
-                    reducer=ee.Reducer.mean(),
-                    geometry=region,
-                    scale=25000,  # ERA5 native resolution ~25km
-                    maxPixels=1e6
-                )
-                
-                return ee.Feature(None, stats.set('date', date))
-            
-            weather_features = era5_collection.map(extract_weather_data)
-            weather_data = weather_features.getInfo()
-            
-            # Convert to DataFrame
             weather_records = []
-            for feature in weather_data['features']:
-                props = feature['properties']
-                weather_records.append(props)
+            for range_start, range_end in ranges:
+                weather_records.extend(self._fetch_era5_records(region, range_start, range_end))
+            
+            if not weather_records:
+                print(f"    ⚠️  No new ERA5 weather data for {', '.join(f'{a} to {b}' for a, b in ranges)}")
+                return
             
             weather_df = pd.DataFrame(weather_records)
             weather_df['date'] = pd.to_datetime(weather_df['date'])
@@ -449,12 +615,78 @@ class WildfireDataCollector:
                 weather_df[col] = weather_df[col] - 273.15
             
             # Save weather data
-            weather_df.to_csv(self.fire_dir / 'weather' / 'era5_weather_data.csv', index=False)
+            weather_path = self.fire_dir / 'weather' / 'era5_weather_data.csv'
+            weather_df = self._merge_timeseries(weather_path, weather_df, append)
+            weather_df.to_csv(weather_path, index=False)
+            self._store_table('era5_weather', weather_df)
+            self.manifest.record_coverage('era5_weather', *window, coverage_params, append)
             
-            print(f"    ✓ Collected {len(weather_df)} days of ERA5 weather data")
+            print(f"    ✓ Collected {len(weather_records)} new days of ERA5 weather data ({len(weather_df)} total)")
             
         except Exception as e:
-            print(f"    ✗ Error collecting ERA5 weather data: {e}")
+            self._error(f"Error collecting ERA5 weather data: {e}")
+
+    def _fetch_era5_records(self, region, start_date, end_date):
+        """Fetch daily ERA5 regional means for [start_date, end_date) as a list of dicts"""
+        # ERA5 Daily Aggregates
+        era5_collection = (ee.ImageCollection('ECMWF/ERA5/DAILY')
+                         .filterBounds(region)
+                         .filterDate(start_date, end_date)
+                         .select([
+                             'mean_2m_air_temperature',
+                             'minimum_2m_air_temperature', 
+                             'maximum_2m_air_temperature',
+                             'dewpoint_2m_temperature',
+                             'mean_sea_level_pressure',
+                             'surface_pressure',
+                             'u_component_of_wind_10m',
+                             'v_component_of_wind_10m',
+                             'total_precipitation'
+                         ]))
+        
+        # Convert to time series
+        def extract_weather_data(image):
+            date = ee.Date(image.get('system:time_start')).format('YYYY-MM-dd')
+            
+            # Calculate additional metrics
+            wind_speed = image.expression(
+                'sqrt(u*u + v*v)',
+                {'u': image.select('u_component_of_wind_10m'),
+                 'v': image.select('v_component_of_wind_10m')}
+            ).rename('wind_speed')
+            
+            wind_direction = image.expression(
+                'atan2(v, u) * 180 / 3.14159',
+                {'u': image.select('u_component_of_wind_10m'),
+                 'v': image.select('v_component_of_wind_10m')}
+            ).rename('wind_direction')
+            
+            # Relative humidity calculation
+            temp_k = image.select('mean_2m_air_temperature')
+            dewpoint_k = image.select('dewpoint_2m_temperature')
+            
+            rh = image.expression(
+                '100 * exp((17.625 * (Td - 273.15)) / (243.04 + (Td - 273.15))) / exp((17.625 * (T - 273.15)) / (243.04 + (T - 273.15)))',
+                {'T': temp_k, 'Td': dewpoint_k}
+            ).rename('relative_humidity')
+            
+            enhanced_image = image.addBands([wind_speed, wind_direction, rh])
+            
+            # Regional statistics
+            stats = enhanced_image.reduceRegion(
+                reducer=ee.Reducer.mean(),
+                geometry=region,
+                scale=25000,  # ERA5 native resolution ~25km
+                maxPixels=1e6
+            )
+            
+            return ee.Feature(None, stats.set('date', date))
+        
+        weather_features = era5_collection.map(extract_weather_data)
+        weather_data = self._get_info(weather_features)
+        
+        # Convert to records
+        return [feature['properties'] for feature in weather_data['features']]
 
     def _collect_noaa_weather(self):
         """Collect NOAA weather station data (placeholder - would need NOAA API implementation)"""
@@ -471,54 +703,24 @@ class WildfireDataCollector:
             df = pd.read_csv(weather_file)
             df['date'] = pd.to_datetime(df['date'])
             
-            # Fire Weather Index components
-            # Fine Fuel Moisture Code (FFMC)
-            def calculate_ffmc(temp, rh, wind, rain, prev_ffmc=85):
-                # Simplified FFMC calculation
-                mo = 147.2 * (101 - prev_ffmc) / (59.5 + prev_ffmc)
-                if rain > 0.5:
-                    mo = mo + 42.5 * rain * np.exp(-100 / (251 - mo)) * (1 - np.exp(-6.93 / rain))
-                
-                ed = 0.942 * (rh**0.679) + 11 * np.exp((rh - 100) / 10) + 0.18 * (21.1 - temp) * (1 - np.exp(-0.115 * rh))
-                ew = 0.618 * (rh**0.753) + 10 * np.exp((rh - 100) / 10) + 0.18 * (21.1 - temp) * (1 - np.exp(-0.115 * rh))
-                
-                if mo > ed:
-                    ko = 0.424 * (1 - ((100 - rh) / 100)**1.7) + 0.0694 * wind**0.5 * (1 - ((100 - rh) / 100)**8)
-                    kd = ko * 0.581 * np.exp(0.0365 * temp)
-                    mo = ed + (mo - ed) * 10**(-kd)
-                else:
-                    ko = 0.424 * (1 - (rh / 100)**1.7) + 0.0694 * wind**0.5 * (1 - (rh / 100)**8)
-                    kw = ko * 0.581 * np.exp(0.0365 * temp)
-                    mo = ew - (ew - mo) * 10**(-kw)
-                
-                ffmc = 59.5 * (250 - mo) / (147.2 + mo)
-                return max(0, min(101, ffmc))
-            
-            # Calculate daily fire weather indices
-            df['ffmc'] = 85  # Initialize
-            df['duff_moisture'] = 6  # Initial Duff Moisture Code
-            df['drought_code'] = 15  # Initial Drought Code
-            
-            for i in range(1, len(df)):
-                prev_ffmc = df.loc[i-1, 'ffmc']
-                df.loc[i, 'ffmc'] = calculate_ffmc(
-                    df.loc[i, 'maximum_2m_air_temperature'],
-                    df.loc[i, 'relative_humidity'],
-                    df.loc[i, 'wind_speed'],
-                    df.loc[i, 'total_precipitation'] * 1000,  # Convert m to mm
-                    prev_ffmc
-                )
-            
-            # Fire Weather Index (simplified)
-            df['fire_weather_index'] = 1.25 * df['ffmc'] * np.exp(0.05 * df['wind_speed'])
+            # Canadian FWI System (FFMC, DMC, DC, ISI, BUI, FWI), computed on
+            # whole arrays; see fire_weather.py
+            codes = fwi_from_era5(df)
+            df['ffmc'] = codes['ffmc']
+            df['duff_moisture'] = codes['dmc']
+            df['drought_code'] = codes['dc']
+            df['initial_spread_index'] = codes['isi']
+            df['buildup_index'] = codes['bui']
+            df['fire_weather_index'] = codes['fwi']
             
             # Save enhanced weather data with fire indices
             df.to_csv(self.fire_dir / 'weather' / 'fire_weather_indices.csv', index=False)
+            self._store_table('fire_weather_indices', df)
             
-            print(f"    ✓ Calculated fire weather indices (FFMC, FWI)")
+            print(f"    ✓ Calculated fire weather indices (FFMC, DMC, DC, ISI, BUI, FWI)")
             
         except Exception as e:
-            print(f"    ✗ Error calculating fire weather indices: {e}")
+            self._error(f"Error calculating fire weather indices: {e}")
 
     def collect_fire_detection_data(self):
         """Collect comprehensive fire detection data"""
@@ -534,65 +736,68 @@ class WildfireDataCollector:
         self._collect_burned_area_products()
 
     def _collect_firms_data(self):
-        """Enhanced FIRMS data collection"""
+        """Enhanced FIRMS data collection, fetching only dates not already on disk"""
         key = os.getenv('FIRMS_MAP_KEY')
         if not key:
-            print("    ⚠️  FIRMS_MAP_KEY not set, skipping FIRMS data")
+            # Reported as an error so the stage stays incomplete and reruns once the key is set
+            self._error("FIRMS_MAP_KEY not set, skipping FIRMS data")
             return
         
-        west, south, east, north = self.fire['bbox']
+        window = (self.fire['pre_fire_start'], self.fire['post_fire_end'])
+        coverage_params = {'bbox': self.fire['bbox']}
+        
+        # Work out which dates each product still needs
+        pending = {}
+        for product in FIRMS_PRODUCTS:
+            ranges, append = self.manifest.missing_ranges(f'firms_{product}', *window, coverage_params)
+            if not ranges:
+                print(f"    ✓ FIRMS {product} already covers {window[0]} to {window[1]}")
+                continue
+            pending[product] = (ranges, append)
+        if not pending:
+            return
+        
+        # Every product and 10-day chunk is fetched concurrently over one session
+        client = FirmsClient(key, base_url=os.getenv('FIRMS_API_URL'))
+        try:
+            fetched = client.fetch_many([
+                (product, range_start, range_end, self.fire['bbox'])
+                for product, (ranges, _) in pending.items()
+                for range_start, range_end in ranges
+            ])
+        finally:
+            client.close()
         
-        # Collect data for extended period
-        for product in ['MODIS_NRT', 'VIIRS_SNPP_NRT', 'VIIRS_NOAA20_NRT']:
+        for product, (_, append) in pending.items():
             try:
-                url = 'https://firms.modaps.eosdis.nasa.gov/api/area/csv'
-                params = {
-                    'map_key': key,
-                    'product': product,
-                    'date_min': self.fire['pre_fire_start'],
-                    'date_max': self.fire['post_fire_end'],
-                    'bbox': f"{west},{south},{east},{north}"
-                }
-                
-                response = requests.get(url, params=params, timeout=30)
-                response.raise_for_status()
+                new_df = fetched[product]
+                if isinstance(new_df, Exception):
+                    raise new_df
                 
+                # Process and enhance the data
                 csv_path = self.fire_dir / 'fire_detection' / f'firms_{product}.csv'
-                csv_path.write_text(response.text)
+                detection_key = [c for c in ['latitude', 'longitude', 'acq_date', 'acq_time', 'satellite']
+                                 if c in new_df.columns]
+                df = self._merge_timeseries(csv_path, new_df, append,
+                                            date_column='acq_date', dedupe_columns=detection_key)
+                df.to_csv(csv_path, index=False)
+                self.manifest.record_coverage(f'firms_{product}', *window, coverage_params, append)
                 
-                # Process and enhance the data
-                if response.text.strip() and not response.text.startswith('<!DOCTYPE'):
-                    df = pd.read_csv(csv_path)
-                    if len(df) > 0 and 'latitude' in df.columns:
-                        # Add temporal categorization
-                        df['acq_date'] = pd.to_datetime(df['acq_date'])
-                        df['fire_period'] = 'unknown'
-                        
-                        fire_start = pd.to_datetime(self.fire['start_date'])
-                        fire_end = pd.to_datetime(self.fire['end_date'])
-                        
-                        df.loc[df['acq_date'] < fire_start, 'fire_period'] = 'pre_fire'
-                        df.loc[(df['acq_date'] >= fire_start) & (df['acq_date'] <= fire_end), 'fire_period'] = 'during_fire'
-                        df.loc[df['acq_date'] > fire_end, 'fire_period'] = 'post_fire'
-                        
-                        # Create GeoDataFrame
-                        gdf = gpd.GeoDataFrame(
-                            df,
-                            geometry=[Point(xy) for xy in zip(df.longitude, df.latitude)],
-                            crs="EPSG:4326"
-                        )
-                        
-                        geojson_path = self.fire_dir / 'fire_detection' / f'firms_{product}.geojson'
-                        gdf.to_file(geojson_path, driver='GeoJSON')
-                        
-                        print(f"    ✓ Collected {len(df)} FIRMS {product} detections")
-                    else:
-                        print(f"    ⚠️  No valid FIRMS {product} data")
+                if len(df) > 0:
+                    # Add temporal categorization
+                    df = self._label_fire_period(df, 'acq_date')
+                    
+                    gdf = detections_to_geodataframe(df)
+                    geojson_path = self.fire_dir / 'fire_detection' / f'firms_{product}.geojson'
+                    gdf.to_file(geojson_path, driver='GeoJSON')
+                    self._store_table('firms', df.assign(product=product), part=product, date_column='acq_date')
+                    
+                    print(f"    ✓ Collected {len(new_df)} new FIRMS {product} detections ({len(df)} total)")
                 else:
-                    print(f"    ⚠️  Empty or invalid FIRMS {product} response")
+                    print(f"    ⚠️  No valid FIRMS {product} data")
                     
             except Exception as e:
-                print(f"    ✗ Error collecting FIRMS {product}: {e}")
+                self._error(f"Error collecting FIRMS {product}: {e}")
 
     def _collect_modis_fire_products(self):
         """Collect MODIS fire products"""
@@ -605,23 +810,30 @@ class WildfireDataCollector:
                          .filterDate(self.fire['pre_fire_start'], self.fire['post_fire_end'])
                          .select(['FireMask', 'QA']))
             
-            count = modis_fire.size().getInfo()
+            count = self._get_info(modis_fire.size())
             if count == 0:
                 print(f"    ⚠️  No MODIS fire products available")
                 return
             
-            # Create fire mask composite
-            fire_composite = modis_fire.select('FireMask').max()
+            # Label each fire pixel (FireMask > 7) with the first day it burned
+            # (days since 1970-01-01), so ignition ranking can use the earliest ones
+            def to_fire_day(image):
+                day = ee.Date(image.get('system:time_start')).difference(ee.Date('1970-01-01'), 'day')
+                return (ee.Image.constant(day).toInt()
+                        .updateMask(image.select('FireMask').gt(7))
+                        .rename(FIRE_DAY_PROPERTY))
+            
+            first_fire_day = modis_fire.map(to_fire_day).min()
             
             # Export fire detections as vectors
-            fire_pixels = fire_composite.gt(7)  # Fire pixels (confidence > 7)
-            fire_vectors = fire_pixels.reduceToVectors(
+            fire_vectors = first_fire_day.reduceToVectors(
                 geometry=region,
                 scale=1000,
-                maxPixels=1e10
+                maxPixels=1e10,
+                labelProperty=FIRE_DAY_PROPERTY
             )
             
-            fire_data = fire_vectors.getInfo()
+            fire_data = self._get_info(fire_vectors)
             
             with open(self.fire_dir / 'fire_detection' / 'modis_fire_detections.geojson', 'w') as f:
                 json.dump(fire_data, f, indent=2)
@@ -629,7 +841,7 @@ class WildfireDataCollector:
             print(f"    ✓ Processed {count} MODIS fire detection images")
             
         except Exception as e:
-            print(f"    ✗ Error collecting MODIS fire products: {e}")
+            self._error(f"Error collecting MODIS fire products: {e}")
 
     def _collect_burned_area_products(self):
         """Collect burned area products with temporal analysis"""
@@ -642,44 +854,42 @@ class WildfireDataCollector:
                           .filterDate(self.fire['pre_fire_start'], self.fire['post_fire_end'])
                           .select(['BurnDate', 'Uncertainty', 'QA']))
             
-            count = burned_area.size().getInfo()
+            count = self._get_info(burned_area.size())
             if count == 0:
                 print(f"    ⚠️  No burned area products available")
                 return
             
-            # Create burned area mask
-            burn_mask = burned_area.select('BurnDate').max().gt(0)
-            
-            # Convert to vectors for analysis
-            burn_vectors = burn_mask.reduceToVectors(
+            # Label each burned pixel with its first burn date (days since 1970-01-01).
+            # MCD64A1 BurnDate is day-of-year, so fold in each image's year before
+            # combining months; the window can cross New Year.
+            def to_burn_day(image):
+                year_start = ee.Date.fromYMD(ee.Date(image.get('system:time_start')).get('year'), 1, 1)
+                offset = year_start.difference(ee.Date('1970-01-01'), 'day').subtract(1)
+                burn_date = image.select('BurnDate')
+                return (burn_date.updateMask(burn_date.gt(0))
+                        .add(ee.Image.constant(offset))
+                        .toInt()
+                        .rename(BURN_DAY_PROPERTY))
+            
+            first_burn_day = burned_area.map(to_burn_day).min()
+            
+            # One polygon per connected patch sharing a burn date
+            burn_vectors = first_burn_day.reduceToVectors(
                 geometry=region,
                 scale=500,
                 maxPixels=1e10,
-                geometryType='polygon'
+                geometryType='polygon',
+                labelProperty=BURN_DAY_PROPERTY
             )
             
-            burn_data = burn_vectors.getInfo()
-            
-            # Calculate burned area statistics
-            total_area = 0
-            if burn_data and 'features' in burn_data:
-                for feature in burn_data['features']:
-                    if 'geometry' in feature and feature['geometry']['type'] == 'Polygon':
-                        coords = feature['geometry']['coordinates'][0]
-                        polygon = Polygon(coords)
-                        total_area += polygon.area * 111000 * 111000  # Rough conversion to m²
+            burn_data = self._get_info(burn_vectors)
             
             # Save burned area data
             with open(self.fire_dir / 'fire_detection' / 'burned_area.geojson', 'w') as f:
                 json.dump(burn_data, f, indent=2)
             
-            # Save burned area statistics
-            burn_stats = {
-                'total_burned_area_hectares': total_area / 10000,
-                'total_burned_area_acres': total_area / 4047,
-                'official_fire_size_acres': self.fire.get('acres', 0),
-                'detection_accuracy': min(1.0, (total_area / 4047) / self.fire.get('acres', 1)) if self.fire.get('acres') else 0
-            }
+            # Equal-area statistics with per-date and per-period breakdowns
+            burn_stats = burned_area_statistics((burn_data or {}).get('features', []), self.fire)
             
             with open(self.fire_dir / 'fire_detection' / 'burned_area_stats.json', 'w') as f:
                 json.dump(burn_stats, f, indent=2)
@@ -687,7 +897,7 @@ class WildfireDataCollector:
             print(f"    ✓ Processed burned area: {burn_stats['total_burned_area_acres']:.0f} acres")
             
         except Exception as e:
-            print(f"    ✗ Error collecting burned area products: {e}")
+            self._error(f"Error collecting burned area products: {e}")
 
     def collect_fuel_data(self):
         """Collect fuel load and vegetation data"""
@@ -706,7 +916,16 @@ class WildfireDataCollector:
             self._collect_forest_canopy_data(region)
             
         except Exception as e:
-            print(f"    ✗ Error collecting fuel data: {e}")
+            self._error(f"Error collecting fuel data: {e}")
+
+    def _area_by_class(self, class_image, scale, max_pixels=1e9):
+        """Area and pixel count for each integer class of a single-band image.
+        
+        Sums ee.Image.pixelArea() grouped by class value, so the whole breakdown
+        costs one reduction per sub-tile of the fire bbox however many classes
+        there are. Returns {class_value: {'area_m2': float, 'pixel_count': int}}.
+        """
+        return self.reducer.area_by_class(class_image, self.fire['bbox'], scale, max_pixels)
 
     def _collect_landfire_data(self, region):
         """Collect LANDFIRE fuel model data"""
@@ -730,26 +949,17 @@ class WildfireDataCollector:
             fuel_composite = fuel_models.addBands([canopy_cover, canopy_height, canopy_base, canopy_density])
             
             # Calculate fuel statistics by region
-            fuel_stats = fuel_composite.reduceRegion(
-                reducer=ee.Reducer.mean().combine(ee.Reducer.stdDev(), '', True)
-                         .combine(ee.Reducer.minMax(), '', True),
-                geometry=region,
-                scale=30,
-                maxPixels=1e9
-            ).getInfo()
+            fuel_stats = self.reducer.stats(fuel_composite, self.fire['bbox'], scale=30)
             
-            # Create fuel model histogram
-            fuel_histogram = fuel_models.reduceRegion(
-                reducer=ee.Reducer.frequencyHistogram(),
-                geometry=region,
-                scale=30,
-                maxPixels=1e9
-            ).getInfo()
+            # Pixel count and area per fuel model class in one grouped reduction
+            fuel_classes = self._area_by_class(fuel_models, scale=30)
+            fuel_histogram = {'FBFM40': {str(c): v['pixel_count'] for c, v in fuel_classes.items()}}
             
             # Save fuel data
             fuel_data = {
                 'statistics': fuel_stats,
                 'fuel_model_distribution': fuel_histogram,
+                'fuel_model_area_hectares': {str(c): v['area_m2'] / 10000 for c, v in fuel_classes.items()},
                 'data_sources': [
                     'LANDFIRE Surface Fuel Models (FBFM40)',
                     'LANDFIRE Canopy Cover',
@@ -765,41 +975,25 @@ class WildfireDataCollector:
             print(f"    ✓ Collected LANDFIRE fuel model data")
             
         except Exception as e:
-            print(f"    ✗ Error collecting LANDFIRE data: {e}")
+            self._error(f"Error collecting LANDFIRE data: {e}")
 
     def _collect_vegetation_indices(self, region):
-        """Collect vegetation indices time series"""
+        """Collect vegetation indices time series, fetching only dates not already on disk"""
         try:
-            # MODIS Vegetation Indices (MOD13A1)
-            modis_vi = (ee.ImageCollection('MODIS/061/MOD13A1')
-                       .filterBounds(region)
-                       .filterDate(self.fire['pre_fire_start'], self.fire['post_fire_end'])
-                       .select(['NDVI', 'EVI']))
-            
-            count = modis_vi.size().getInfo()
-            if count == 0:
-                print(f"    ⚠️  No vegetation index data available")
+            window = (self.fire['pre_fire_start'], self.fire['post_fire_end'])
+            coverage_params = {'bbox': self.fire['bbox']}
+            ranges, append = self.manifest.missing_ranges('vegetation_indices', *window, coverage_params)
+            if not ranges:
+                print(f"    ✓ Vegetation indices already cover {window[0]} to {window[1]}")
                 return
             
-            # Extract time series
-            def extract_vi_data(image):
-                date = ee.Date(image.get('system:time_start')).format('YYYY-MM-dd')
-                stats = image.reduceRegion(
-                    reducer=ee.Reducer.mean(),
-                    geometry=region,
-                    scale=500,
-                    maxPixels=1e8
-                )
-                return ee.Feature(None, stats.set('date', date))
-            
-            vi_features = modis_vi.map(extract_vi_data)
-            vi_data = vi_features.getInfo()
-            
-            # Convert to DataFrame
             vi_records = []
-            for feature in vi_data['features']:
-                props = feature['properties']
-                vi_records.append(props)
+            for range_start, range_end in ranges:
+                vi_records.extend(self._fetch_vegetation_index_records(region, range_start, range_end))
+            
+            if not vi_records:
+                print(f"    ⚠️  No vegetation index data available")
+                return
             
             vi_df = pd.DataFrame(vi_records)
             vi_df['date'] = pd.to_datetime(vi_df['date'])
@@ -809,22 +1003,44 @@ class WildfireDataCollector:
             vi_df['NDVI'] = vi_df['NDVI'] * 0.0001
             vi_df['EVI'] = vi_df['EVI'] * 0.0001
             
-            # Add fire period labels
-            fire_start = pd.to_datetime(self.fire['start_date'])
-            fire_end = pd.to_datetime(self.fire['end_date'])
-            
-            vi_df['fire_period'] = 'unknown'
-            vi_df.loc[vi_df['date'] < fire_start, 'fire_period'] = 'pre_fire'
-            vi_df.loc[(vi_df['date'] >= fire_start) & (vi_df['date'] <= fire_end), 'fire_period'] = 'during_fire'
-            vi_df.loc[vi_df['date'] > fire_end, 'fire_period'] = 'post_fire'
+            # Add fire period labels (relabelled across the merged series, since
+            # the fire dates may have changed since the earlier fetch)
+            vi_path = self.fire_dir / 'fuel_models' / 'vegetation_indices_timeseries.csv'
+            vi_df = self._label_fire_period(self._merge_timeseries(vi_path, vi_df, append))
             
             # Save vegetation index time series
-            vi_df.to_csv(self.fire_dir / 'fuel_models' / 'vegetation_indices_timeseries.csv', index=False)
+            vi_df.to_csv(vi_path, index=False)
+            self._store_table('vegetation_indices', vi_df)
+            self.manifest.record_coverage('vegetation_indices', *window, coverage_params, append)
             
-            print(f"    ✓ Collected {len(vi_df)} vegetation index measurements")
+            print(f"    ✓ Collected {len(vi_records)} new vegetation index measurements ({len(vi_df)} total)")
             
         except Exception as e:
-            print(f"    ✗ Error collecting vegetation indices: {e}")
+            self._error(f"Error collecting vegetation indices: {e}")
+
+    def _fetch_vegetation_index_records(self, region, start_date, end_date):
+        """Fetch MOD13A1 NDVI/EVI regional means for [start_date, end_date) as a list of dicts"""
+        # MODIS Vegetation Indices (MOD13A1)
+        modis_vi = (ee.ImageCollection('MODIS/061/MOD13A1')
+                   .filterBounds(region)
+                   .filterDate(start_date, end_date)
+                   .select(['NDVI', 'EVI']))
+        
+        # Extract time series
+        def extract_vi_data(image):
+            date = ee.Date(image.get('system:time_start')).format('YYYY-MM-dd')
+            stats = image.reduceRegion(
+                reducer=ee.Reducer.mean(),
+                geometry=region,
+                scale=500,
+                maxPixels=1e8
+            )
+            return ee.Feature(None, stats.set('date', date))
+        
+        vi_features = modis_vi.map(extract_vi_data)
+        vi_data = self._get_info(vi_features)
+        
+        return [feature['properties'] for feature in vi_data['features']]
 
     def _collect_forest_canopy_data(self, region):
         """Collect detailed forest structure data"""
@@ -842,24 +1058,13 @@ class WildfireDataCollector:
             forest_gain = forest_change.select('gain')
             
             # Calculate forest statistics
-            forest_stats = forest_change.select(['treecover2000', 'lossyear', 'gain']).reduceRegion(
-                reducer=ee.Reducer.mean().combine(ee.Reducer.stdDev(), '', True),
-                geometry=region,
-                scale=30,
-                maxPixels=1e9
-            ).getInfo()
-            
-            # Calculate area of forest loss by year
-            loss_by_year = {}
-            for year in range(1, 24):  # 2001-2023
-                year_mask = forest_loss.eq(year)
-                area = year_mask.multiply(ee.Image.pixelArea()).reduceRegion(
-                    reducer=ee.Reducer.sum(),
-                    geometry=region,
-                    scale=30,
-                    maxPixels=1e9
-                ).get('lossyear')
-                loss_by_year[2000 + year] = area.getInfo() if area else 0
+            forest_stats = self.reducer.stats(forest_change.select(['treecover2000', 'lossyear', 'gain']),
+                                              self.fire['bbox'], scale=30, min_max=False)
+            
+            # Calculate area of forest loss by year (lossyear 1-23 = 2001-2023,
+            # 0 = no loss) with one grouped reduction
+            loss_classes = self._area_by_class(forest_loss, scale=30)
+            loss_by_year = {2000 + year: loss_classes.get(year, {}).get('area_m2', 0) for year in range(1, 24)}
             
             # Save forest data
             forest_data = {
@@ -874,13 +1079,27 @@ class WildfireDataCollector:
             print(f"    ✓ Collected forest structure data")
             
         except Exception as e:
-            print(f"    ✗ Error collecting forest canopy data: {e}")
+            self._error(f"Error collecting forest canopy data: {e}")
+
+    def collect_input_stack(self):
+        """Download terrain, fuel and canopy rasters onto the simulation grid (see input_stack.py)"""
+        print(f"🗺️  Building simulation input stack for {self.fire['name']}...")
+        
+        try:
+            grid = SimulationGrid.from_bbox(self.fire['bbox'], resolution=30)
+            stack = build_input_stack(self.fire_dir / 'inputs', grid)
+            print(f"    ✓ Input stack: {len(stack.bands)} bands, {grid.height} x {grid.width} cells")
+            
+        except Exception as e:
+            self._error(f"Error building input stack: {e}")
 
     def generate_simulation_config(self):
         """Generate configuration file for wildfire simulation"""
         print(f"⚙️  Generating simulation configuration for {self.fire['name']}...")
         
         try:
+            ignition_candidates = self._estimate_ignition_points()
+            
             # Load collected data for analysis
             config = {
                 'fire_metadata': {
@@ -902,7 +1121,8 @@ class WildfireDataCollector:
                     'grid_resolution_meters': 30,
                     'time_step_hours': 1,
                     'simulation_duration_hours': self._calculate_fire_duration_hours(),
-                    'ignition_points': self._estimate_ignition_points(),
+                    'ignition_points': [[c['longitude'], c['latitude']] for c in ignition_candidates],
+                    'ignition_candidates': ignition_candidates,
                     'weather_update_frequency_hours': 3
                 },
                 'data_sources': {
@@ -928,6 +1148,9 @@ class WildfireDataCollector:
                         'NASA FIRMS Active Fire Data',
                         'MODIS Fire Products',
                         'Burned Area Mapping'
+                    ],
+                    'simulation_inputs': [
+                        'Co-registered 30 m rasters in inputs/stack.json (elevation, fuel, canopy)'
                     ]
                 },
                 'validation_metrics': {
@@ -946,7 +1169,7 @@ class WildfireDataCollector:
             return config
             
         except Exception as e:
-            print(f"    ✗ Error generating simulation config: {e}")
+            self._error(f"Error generating simulation config: {e}")
             return None
 
     def _calculate_fire_duration_hours(self):
@@ -956,9 +1179,20 @@ class WildfireDataCollector:
         return int((end - start).total_seconds() / 3600)
 
     def _estimate_ignition_points(self):
-        """Estimate ignition points from early fire detections"""
-        # This would analyze early FIRMS detections to estimate ignition locations
-        return [self.fire['center']]  # Simplified
+        """Rank ignition candidates from the earliest FIRMS and MOD14A1 detections"""
+        try:
+            frames = [firms_detections(self.store.query('firms', fires=[self.fire['name']]))]
+            modis_path = self.fire_dir / 'fire_detection' / 'modis_fire_detections.geojson'
+            if modis_path.exists():
+                with open(modis_path) as f:
+                    frames.append(mod14a1_detections(json.load(f)))
+            
+            detections = pd.concat([f for f in frames if len(f)] or frames[:1], ignore_index=True)
+            return rank_ignition_candidates(DetectionIndex(detections), self.fire)
+        except Exception as e:
+            # The config is still written, with the fire centre as before ranking existed
+            self._error(f"Error ranking ignition candidates, using the fire centre: {e}")
+            return fallback_candidates(self.fire)
 
     def create_summary_report(self):
         """Create a comprehensive data collection summary"""
@@ -1008,41 +1242,208 @@ class WildfireDataCollector:
         for dataset in report['collected_datasets']:
             print(f"      • {dataset['description']}: {dataset['file_count']} files")
 
-def main():
-    """Main execution function"""
-    print("🚀 Starting Enhanced Wildfire Data Collection")
-    print("=" * 60)
+def collect_fire(fire_config, base_dir="wildfire_data", stage_concurrency=4, cache=None, force=False):
+    """Run every collection stage for a single fire"""
+    # Initialize collector
+    collector = WildfireDataCollector(fire_config, base_dir, cache)
     
-    # Initialize Earth Engine
-    initialize_earth_engine()
+    # Collect all data types, generate the simulation configuration and
+    # create the summary report, overlapping independent stages
+    stage_results = collector.run_stages(max_concurrency=stage_concurrency, force=force)
     
-    # Process each fire
-    for fire_config in FIRES:
-        print(f"\n🔥 Processing {fire_config['name']}")
-        print("-" * 40)
-        
+    failed = [stage for stage, result in stage_results.items() if result['status'] == 'failed']
+    if failed:
+        raise RuntimeError(f"stages failed: {', '.join(failed)}")
+    
+    return collector
+
+def _run_fire(fire_config, base_dir="wildfire_data", log_to_file=False, stage_concurrency=4, cache=None,
+              force=False, init_session=False):
+    """Run one fire in isolation and return a result record for the run report.
+    
+    With log_to_file, everything the fire prints goes to
+    <fire_dir>/metadata/collection.log instead of the console, so fires running
+    side by side in a worker pool do not interleave their output. With
+    init_session, the worker's Earth Engine session is set up first (once per
+    process); if that fails, only this fire fails.
+    """
+    fire_dir = Path(base_dir) / fire_config['name']
+    log_path = fire_dir / 'metadata' / 'collection.log'
+    result = {
+        'fire_name': fire_config['name'],
+        'status': 'completed',
+        'error': None,
+        'log_file': str(log_path) if log_to_file else None
+    }
+    started = time.time()
+    cache_before = cache.stats() if cache else None
+    
+    def run():
         try:
-            # Initialize collector
-            collector = WildfireDataCollector(fire_config)
-            
-            # Collect all data types
-            collector.collect_high_resolution_imagery()
-            collector.collect_topographic_data()
-            collector.collect_weather_data()
-            collector.collect_fire_detection_data()
-            collector.collect_fuel_data()
-            
-            # Generate simulation configuration
-            collector.generate_simulation_config()
-            
-            # Create summary report
-            collector.create_summary_report()
-            
+            if init_session:
+                _ensure_worker_session()
+            collect_fire(fire_config, base_dir, stage_concurrency, cache, force)
             print(f"✅ Completed data collection for {fire_config['name']}")
-            
         except Exception as e:
+            traceback.print_exc()
             print(f"❌ Failed to process {fire_config['name']}: {e}")
-            continue
+            result['status'] = 'failed'
+            result['error'] = str(e)
+    
+    if log_to_file:
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        # Appended, so a resumed run keeps the log of the attempt it picks up from
+        with open(log_path, 'a', encoding='utf-8') as log, redirect_stdout(log), redirect_stderr(log):
+            print(f"===== Collection run started {datetime.now().isoformat()} =====")
+            run()
+    else:
+        run()
+    
+    result['elapsed_seconds'] = round(time.time() - started, 2)
+    if cache:
+        cache_after = cache.stats()
+        result['ee_cache'] = {counter: cache_after[counter] - cache_before[counter]
+                              for counter in ('hits', 'misses', 'expired', 'evictions')}
+    return result
+
+_worker_session = {'initialized': False}
+
+def _ensure_worker_session():
+    """Every worker process needs its own Earth Engine session; set it up on the first fire it runs.
+    
+    Not a pool initializer: an initializer that raises breaks the whole pool,
+    failing every fire instead of the one that hit the error.
+    """
+    if not _worker_session['initialized']:
+        initialize_earth_engine()
+        _worker_session['initialized'] = True
+
+def run_parallel(fires, workers, base_dir="wildfire_data", stage_concurrency=4, cache=None, force=False):
+    """Collect several fires concurrently, one worker process per fire.
+    
+    A fire that raises (or a worker that dies) only marks that fire as failed;
+    the remaining fires keep running.
+    """
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_run_fire, fire_config, base_dir, True, stage_concurrency, cache, force, True): fire_config for fire_config in fires}
+        
+        for future in as_completed(futures):
+            fire_config = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {
+                    'fire_name': fire_config['name'],
+                    'status': 'failed',
+                    'error': f"worker error: {e}",
+                    'log_file': str(Path(base_dir) / fire_config['name'] / 'metadata' / 'collection.log'),
+                    'elapsed_seconds': None
+                }
+            
+            icon = '✅' if result['status'] == 'completed' else '❌'
+            print(f"{icon} {result['fire_name']} {result['status']} (log: {result['log_file']})")
+            results.append(result)
+    
+    return results
+
+def write_run_report(results, wall_seconds, workers, base_dir="wildfire_data"):
+    """Write and print the aggregated end-of-run report across all fires"""
+    fire_seconds = [r['elapsed_seconds'] for r in results if r['elapsed_seconds'] is not None]
+    report = {
+        'run_date': datetime.now().isoformat(),
+        'workers': workers,
+        'wall_clock_seconds': round(wall_seconds, 2),
+        'sum_of_fire_seconds': round(sum(fire_seconds), 2),
+        'slowest_fire_seconds': max(fire_seconds) if fire_seconds else 0,
+        'fires_completed': sum(1 for r in results if r['status'] == 'completed'),
+        'fires_failed': sum(1 for r in results if r['status'] != 'completed'),
+        'ee_cache': {counter: sum(r.get('ee_cache', {}).get(counter, 0) for r in results)
+                     for counter in ('hits', 'misses', 'expired', 'evictions')},
+        'fires': sorted(results, key=lambda r: r['fire_name'])
+    }
+    
+    report_path = Path(base_dir) / 'collection_run_report.json'
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    
+    print(f"\n📋 Run Report ({report['fires_completed']} completed, {report['fires_failed']} failed):")
+    for r in report['fires']:
+        icon = '✅' if r['status'] == 'completed' else '❌'
+        elapsed = f"{r['elapsed_seconds']:.1f}s" if r['elapsed_seconds'] is not None else 'n/a'
+        line = f"   {icon} {r['fire_name']}: {elapsed}"
+        if r['error']:
+            line += f" — {r['error']}"
+        print(line)
+    cache_stats = report['ee_cache']
+    if cache_stats['hits'] or cache_stats['misses']:
+        print(f"   💾 EE cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+              f"{cache_stats['evictions']} evictions")
+    print(f"   ⏱️  Wall clock: {report['wall_clock_seconds']:.1f}s "
+          f"(sum of fires: {report['sum_of_fire_seconds']:.1f}s, workers: {workers})")
+    print(f"   📄 Report saved to {report_path}")
+    
+    return report
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Enhanced wildfire data collection")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Number of fires to collect concurrently (default: 1, sequential)")
+    parser.add_argument('--stage-concurrency', type=int, default=4,
+                        help="Max collection stages running at once within a fire (default: 4)")
+    parser.add_argument('--force', action='store_true',
+                        help="Rerun every stage, ignoring completed stages in each fire's manifest")
+    parser.add_argument('--base-dir', default="wildfire_data",
+                        help="Output directory for per-fire data (default: wildfire_data)")
+    parser.add_argument('--cache-dir', default=None,
+                        help="Earth Engine result cache directory (default: <base-dir>/.ee_cache)")
+    parser.add_argument('--cache-max-mb', type=int, default=1024,
+                        help="Evict least recently used cache entries beyond this size (default: 1024)")
+    parser.add_argument('--cache-ttl-hours', type=float, default=None,
+                        help="Treat cache entries older than this as stale (default: never)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Always query Earth Engine, bypassing the result cache")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Main execution function"""
+    args = parse_args(argv)
+    workers = max(1, min(args.workers, len(FIRES)))
+    
+    print("🚀 Starting Enhanced Wildfire Data Collection")
+    print("=" * 60)
+    
+    cache = None
+    if not args.no_cache:
+        cache = EECache(
+            args.cache_dir or Path(args.base_dir) / '.ee_cache',
+            max_bytes=args.cache_max_mb * 1024 * 1024,
+            ttl_seconds=args.cache_ttl_hours * 3600 if args.cache_ttl_hours else None
+        )
+    
+    run_started = time.time()
+    
+    if workers > 1:
+        # Each worker process initializes its own Earth Engine session and
+        # writes its fire's output to <fire_dir>/metadata/collection.log
+        print(f"⚡ Collecting {len(FIRES)} fires with {workers} workers")
+        results = run_parallel(FIRES, workers, args.base_dir, args.stage_concurrency, cache, args.force)
+    else:
+        # Initialize Earth Engine
+        initialize_earth_engine()
+        
+        # Process each fire
+        results = []
+        for fire_config in FIRES:
+            print(f"\n🔥 Processing {fire_config['name']}")
+            print("-" * 40)
+            results.append(_run_fire(fire_config, args.base_dir,
+                                     stage_concurrency=args.stage_concurrency, cache=cache,
+                                     force=args.force))
+    
+    write_run_report(results, time.time() - run_started, workers, args.base_dir)
     
     print("\n🎉 Enhanced Wildfire Data Collection Complete!")
     print("=" * 60)
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Spatiotemporal index over FIRMS active fire detections
+
+Detections from every product and fire are hashed into a lat/lon grid and,
+within each grid cell, sorted by acquisition time. A "within X km of a point
+between t1 and t2" query touches only the handful of cells overlapping the
+search circle, binary-searches the time window inside each of them and runs
+an exact haversine test on what is left, so it never scans the full table.
+
+cluster_daily_events() groups detections into daily fire events: detections
+on the same UTC day within link_km of each other (transitively) share an
+event id. Candidate pairs come from a (day, cell) hash in an equal-area
+projection, comparing each cell only with its neighbours, and components are
+labelled with vectorized pointer jumping.
+
+Usage:
+  index = DetectionIndex.from_fire_store(FireStore('wildfire_data'))
+  nearby = index.query(lon=-121.6, lat=39.8, radius_km=5, start='2018-11-08', end='2018-11-09')
+  events = cluster_daily_events(index.frame, link_km=2.0)
+
+  python detection_index.py wildfire_data --lon -121.6 --lat 39.8 --radius-km 5 --start 2018-11-08
+  python detection_index.py --benchmark 2000000
+"""
+
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+from pyproj import Transformer
+
+from fire_store import FireStore
+
+EARTH_RADIUS_KM = 6371.0088
+DEFAULT_CELL_DEGREES = 0.1
+
+
+def haversine_km(lon1, lat1, lon2, lat2):
+    """Great-circle distance in km (vectorized)"""
+    lon1, lat1, lon2, lat2 = map(np.radians, (lon1, lat1, lon2, lat2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def detection_times(df):
+    """Acquisition timestamps from FIRMS acq_date (or date) plus HHMM acq_time"""
+    dates = pd.to_datetime(df['acq_date'] if 'acq_date' in df.columns else df['date'])
+    if 'acq_time' not in df.columns:
+        return dates.to_numpy(dtype='datetime64[s]')
+    hhmm = df['acq_time'].fillna(0).astype(int).to_numpy()
+    offsets = (hhmm // 100) * 3600 + (hhmm % 100) * 60
+    return dates.to_numpy(dtype='datetime64[s]') + offsets.astype('timedelta64[s]')
+
+
+class DetectionIndex:
+    def __init__(self, frame, cell_degrees=DEFAULT_CELL_DEGREES):
+        """Index a DataFrame with latitude, longitude and acq_date/date (+ acq_time)"""
+        self.cell_degrees = cell_degrees
+        times = detection_times(frame)
+        lon = frame['longitude'].to_numpy(dtype=float)
+        lat = frame['latitude'].to_numpy(dtype=float)
+
+        cells = self._cell_ids(lon, lat)
+        order = np.lexsort((times, cells))
+
+        self.frame = frame.iloc[order].reset_index(drop=True)
+        self.frame['time'] = times[order]
+        self.lon = lon[order]
+        self.lat = lat[order]
+        self.times = times[order]
+        self.cells = cells[order]
+
+        # Row range [cell_start, cell_end) of every occupied cell
+        self.cell_keys, self.cell_start = np.unique(self.cells, return_index=True)
+        self.cell_end = np.append(self.cell_start[1:], len(self.cells))
+
+    @classmethod
+    def from_frames(cls, frames, cell_degrees=DEFAULT_CELL_DEGREES):
+        """Index several detection tables (e.g. one per product or fire) together"""
+        frames = [f for f in frames if len(f)]
+        return cls(pd.concat(frames, ignore_index=True), cell_degrees)
+
+    @classmethod
+    def from_fire_store(cls, store, fires=None, columns=None, cell_degrees=DEFAULT_CELL_DEGREES):
+        """Index the FIRMS detections of every (or the given) fire in a FireStore"""
+        frame = store.query('firms', fires=fires, columns=columns)
+        return cls(frame, cell_degrees)
+
+    def __len__(self):
+        return len(self.times)
+
+    def _cell_ids(self, lon, lat):
+        ix = np.floor((np.asarray(lon) + 180.0) / self.cell_degrees).astype(np.int64)
+        iy = np.floor((np.asarray(lat) + 90.0) / self.cell_degrees).astype(np.int64)
+        return iy * int(round(360.0 / self.cell_degrees) + 1) + ix
+
+    def _candidate_rows(self, lon, lat, radius_km, start, end):
+        """Row indices in grid cells overlapping the circle and inside [start, end)"""
+        dlat = np.degrees(radius_km / EARTH_RADIUS_KM)
+        dlon = dlat / max(np.cos(np.radians(min(abs(lat) + dlat, 89.9))), 1e-6)
+
+        xs = np.arange(np.floor((lon - dlon + 180.0) / self.cell_degrees),
+                       np.floor((lon + dlon + 180.0) / self.cell_degrees) + 1)
+        ys = np.arange(np.floor((lat - dlat + 90.0) / self.cell_degrees),
+                       np.floor((lat + dlat + 90.0) / self.cell_degrees) + 1)
+        wanted = (ys[:, None] * int(round(360.0 / self.cell_degrees) + 1) + xs[None, :]).astype(np.int64).ravel()
+
+        slots = np.searchsorted(self.cell_keys, wanted)
+        inside = slots < len(self.cell_keys)
+        slots, wanted = slots[inside], wanted[inside]
+        slots = slots[self.cell_keys[slots] == wanted]
+
+        ranges = []
+        for first, last in zip(self.cell_start[slots], self.cell_end[slots]):
+            cell_times = self.times[first:last]
+            lo = first + (np.searchsorted(cell_times, start, 'left') if start is not None else 0)
+            hi = first + (np.searchsorted(cell_times, end, 'left') if end is not None else last - first)
+            if hi > lo:
+                ranges.append(np.arange(lo, hi))
+        return np.concatenate(ranges) if ranges else np.zeros(0, dtype=np.int64)
+
+    def query_rows(self, lon, lat, radius_km, start=None, end=None):
+        """Row positions (into self.frame) within radius_km of (lon, lat) in [start, end)"""
+        start = np.datetime64(pd.Timestamp(start), 's') if start is not None else None
+        end = np.datetime64(pd.Timestamp(end), 's') if end is not None else None
+        rows = self._candidate_rows(lon, lat, radius_km, start, end)
+        if len(rows) == 0:
+            return rows
+        distance = haversine_km(lon, lat, self.lon[rows], self.lat[rows])
+        return rows[distance <= radius_km]
+
+    def query(self, lon, lat, radius_km, start=None, end=None):
+        """Detections within radius_km of (lon, lat) acquired in [start, end), with distance_km"""
+        rows = self.query_rows(lon, lat, radius_km, start, end)
+        result = self.frame.iloc[rows].copy()
+        result['distance_km'] = haversine_km(lon, lat, self.lon[rows], self.lat[rows])
+        return result.sort_values('time')
+
+
+def connected_components(n, left, right):
+    """Component label (smallest member index) per node, from an edge list"""
+    labels = np.arange(n)
+    while True:
+        # Hook each edge's larger root onto the smaller, then compress paths
+        low = np.minimum(labels[left], labels[right])
+        np.minimum.at(labels, labels[left], low)
+        np.minimum.at(labels, labels[right], low)
+        while True:
+            compressed = labels[labels]
+            if np.array_equal(compressed, labels):
+                break
+            labels = compressed
+        if np.array_equal(labels[left], labels[right]):
+            return labels
+
+
+def neighbor_pairs(x, y, group, distance):
+    """All pairs (i < j) in the same group within distance of each other.
+
+    Points are hashed into distance-sized cells keyed by (group, row, column);
+    only a cell and its forward neighbours are compared, so each candidate pair
+    is generated once and the work is proportional to local density.
+    """
+    cx = np.floor(x / distance).astype(np.int64)
+    cy = np.floor(y / distance).astype(np.int64)
+    cx -= cx.min() - 1  # one empty column either side, so -1/+1 never wraps rows
+    cy -= cy.min()
+    n_cols = int(cx.max()) + 2
+    n_rows = int(cy.max()) + 2
+    keys = (group * n_rows + cy) * n_cols + cx
+
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    cell_start = np.flatnonzero(np.diff(sorted_keys, prepend=sorted_keys[0] - 1))
+    cell_keys = sorted_keys[cell_start]
+    cell_size = np.diff(cell_start, append=len(sorted_keys))
+
+    lefts, rights = [], []
+    for dx, dy in ((0, 0), (1, 0), (-1, 1), (0, 1), (1, 1)):
+        target = cell_keys + dy * n_cols + dx
+        slot = np.searchsorted(cell_keys, target)
+        found = slot < len(cell_keys)
+        found[found] = cell_keys[slot[found]] == target[found]
+        a, b = np.nonzero(found)[0], slot[found]
+        if len(a) == 0:
+            continue
+
+        # Cartesian product of the members of each matched cell pair
+        a_size, b_size = cell_size[a], cell_size[b]
+        counts = a_size * b_size
+        pair = np.repeat(np.arange(len(a)), counts)
+        within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        i = order[cell_start[a][pair] + within // b_size[pair]]
+        j = order[cell_start[b][pair] + within % b_size[pair]]
+        keep = (i < j) if (dx, dy) == (0, 0) else np.ones(len(i), dtype=bool)
+        keep &= (x[i] - x[j]) ** 2 + (y[i] - y[j]) ** 2 <= distance ** 2
+        lefts.append(i[keep])
+        rights.append(j[keep])
+
+    if not lefts:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(lefts), np.concatenate(rights)
+
+
+def cluster_daily_events(detections, link_km=2.0):
+    """Group detections into daily fire events.
+
+    Detections on the same UTC day within link_km of each other, directly or
+    through a chain of detections, form one event. Returns (labelled
+    detections with an 'event_id' column, one summary row per event).
+    """
+    if len(detections) == 0:
+        return detections.assign(event_id=pd.Series(dtype=np.int64)), pd.DataFrame()
+
+    times = detections['time'].to_numpy() if 'time' in detections.columns else detection_times(detections)
+    lon = detections['longitude'].to_numpy(dtype=float)
+    lat = detections['latitude'].to_numpy(dtype=float)
+    day = times.astype('datetime64[D]')
+
+    # Equal-area plane around the data, so link_km is a plain Euclidean threshold
+    transformer = Transformer.from_crs(
+        'EPSG:4326',
+        f'+proj=laea +lat_0={np.mean(lat)} +lon_0={np.mean(lon)} +datum=WGS84 +units=m +no_defs',
+        always_xy=True
+    )
+    x, y = transformer.transform(lon, lat)
+    day_number = (day - day.min()).astype(np.int64)
+
+    left, right = neighbor_pairs(x, y, day_number, link_km * 1000)
+    labels = connected_components(len(x), left, right)
+    _, event_id = np.unique(labels, return_inverse=True)
+
+    labelled = detections.copy()
+    labelled['time'] = times
+    labelled['event_date'] = day
+    labelled['event_id'] = event_id
+
+    aggregations = {
+        'event_date': ('event_date', 'first'),
+        'detections': ('event_id', 'size'),
+        'longitude': ('longitude', 'mean'),
+        'latitude': ('latitude', 'mean'),
+        'first_detection': ('time', 'min'),
+        'last_detection': ('time', 'max')
+    }
+    if 'frp' in labelled.columns:
+        aggregations['max_frp'] = ('frp', 'max')
+    if 'fire' in labelled.columns:
+        aggregations['fire'] = ('fire', 'first')
+    events = labelled.groupby('event_id').agg(**aggregations).reset_index()
+    return labelled, events
+
+
+def benchmark(detections=1_000_000, queries=100, seed=0):
+    """Build, query and cluster a synthetic detection set"""
+    rng = np.random.default_rng(seed)
+    n_fires = max(1, detections // 5000)
+    centers = np.column_stack([rng.uniform(-124, -104, n_fires), rng.uniform(32, 48, n_fires)])
+    fire = rng.integers(0, n_fires, detections)
+    frame = pd.DataFrame({
+        'longitude': centers[fire, 0] + rng.normal(0, 0.1, detections),
+        'latitude': centers[fire, 1] + rng.normal(0, 0.1, detections),
+        'acq_date': np.datetime64('2021-06-01') + rng.integers(0, 120, detections).astype('timedelta64[D]'),
+        'acq_time': rng.integers(0, 24, detections) * 100 + rng.integers(0, 60, detections),
+        'frp': rng.gamma(2.0, 10.0, detections).astype(np.float32)
+    })
+
+    started = time.perf_counter()
+    index = DetectionIndex(frame)
+    build_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    hits = 0
+    for i in range(queries):
+        lon, lat = centers[i % n_fires]
+        first_day = np.datetime64('2021-06-01') + np.timedelta64(int(rng.integers(0, 110)), 'D')
+        hits += len(index.query_rows(lon, lat, 10.0, first_day, first_day + np.timedelta64(7, 'D')))
+    query_seconds = (time.perf_counter() - started) / queries
+
+    day = index.frame[index.frame['time'].dt.floor('D') == pd.Timestamp('2021-07-01')]
+    started = time.perf_counter()
+    _, events = cluster_daily_events(day, link_km=2.0)
+    cluster_seconds = time.perf_counter() - started
+
+    print(f"{detections:,} detections: build {build_seconds:.2f}s, "
+          f"query {query_seconds * 1000:.2f} ms ({hits / queries:.0f} hits avg), "
+          f"clustering one day ({len(day):,} detections -> {len(events):,} events) {cluster_seconds:.2f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Query FIRMS detections by distance and time')
+    parser.add_argument('base_dir', nargs='?', default='wildfire_data')
+    parser.add_argument('--lon', type=float)
+    parser.add_argument('--lat', type=float)
+    parser.add_argument('--radius-km', type=float, default=5.0)
+    parser.add_argument('--start', help='First timestamp (inclusive)')
+    parser.add_argument('--end', help='Last timestamp (exclusive)')
+    parser.add_argument('--fire', action='append', dest='fires', help='Fire name (repeatable)')
+    parser.add_argument('--events', action='store_true', help='Cluster the matches into daily fire events')
+    parser.add_argument('--benchmark', type=int, metavar='N', help='Benchmark on N synthetic detections')
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        benchmark(args.benchmark)
+        return
+    if args.lon is None or args.lat is None:
+        parser.error('--lon and --lat are required unless --benchmark is given')
+
+    index = DetectionIndex.from_fire_store(FireStore(args.base_dir), fires=args.fires)
+    matches = index.query(args.lon, args.lat, args.radius_km, args.start, args.end)
+    print(f"{len(matches)} of {len(index)} detections within {args.radius_km} km")
+    if args.events:
+        _, events = cluster_daily_events(matches)
+        print(events.to_string(max_rows=40))
+    else:
+        print(matches.to_string(max_rows=40))
+
+
+if __name__ == '__main__':
+    main()
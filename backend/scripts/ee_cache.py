@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Persistent on-disk cache for Earth Engine getInfo() results
+
+Entries are keyed by a SHA-256 of the serialized ee computation graph, so two
+requests hit the same entry exactly when they describe the same server-side
+computation (same dataset ids, geometry, dates, scale, reducer, ...).
+
+Layout:
+  <cache_dir>/<key[:2]>/<key>.json   {"created": <unix time>, "value": <result>}
+
+The file mtime doubles as the LRU clock: it is bumped on every hit and the
+oldest entries are evicted once the cache grows past max_bytes. Writes go
+through a temp file + rename, so several worker processes can share one cache.
+
+Usage:
+  cache = EECache('wildfire_data/.ee_cache', max_bytes=1024**3, ttl_seconds=7 * 86400)
+  stats = cache.get_info(image.reduceRegion(...))
+  print(cache.stats())
+"""
+
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+
+
+def expression_key(obj):
+    """Content hash of an ee object's serialized computation graph"""
+    return hashlib.sha256(obj.serialize().encode('utf-8')).hexdigest()
+
+
+class EECache:
+    def __init__(self, cache_dir, max_bytes=1024 * 1024 * 1024, ttl_seconds=None):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._reset_counters()
+        self._total_bytes = sum(size for _, _, size in self._entries())
+
+    # Locks cannot be pickled; workers get a copy with fresh counters
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._reset_counters()
+
+    def _reset_counters(self):
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def _path(self, key):
+        return self.cache_dir / key[:2] / f'{key}.json'
+
+    def _entries(self):
+        """Yield (path, mtime, size) for every cached entry"""
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith('.json'):
+                    try:
+                        st = entry.stat()
+                    except FileNotFoundError:
+                        continue  # evicted by another process
+                    yield entry.path, st.st_mtime, st.st_size
+
+    def get_info(self, obj):
+        """Drop-in replacement for obj.getInfo() that consults the cache first"""
+        key = expression_key(obj)
+        found, value = self.get(key)
+        if found:
+            return value
+        value = obj.getInfo()
+        self.put(key, value)
+        return value
+
+    def get(self, key):
+        """Return (found, value) for a key, counting the hit or miss"""
+        path = self._path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            with self._lock:
+                self.misses += 1
+            return False, None
+
+        if self.ttl_seconds is not None and time.time() - entry['created'] > self.ttl_seconds:
+            self._remove(path)
+            with self._lock:
+                self.expired += 1
+                self.misses += 1
+            return False, None
+
+        try:
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return True, entry['value']
+
+    def put(self, key, value):
+        """Store a JSON-serializable value, evicting least recently used entries if needed"""
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        payload = json.dumps({'created': time.time(), 'value': value})
+
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(payload)
+        size = os.path.getsize(tmp_path)
+
+        # Overwriting an entry (expired, or a racing miss) replaces its bytes;
+        # stat and replace under the lock so concurrent puts count each file once
+        with self._lock:
+            try:
+                replaced = path.stat().st_size
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp_path, path)
+            self._total_bytes += size - replaced
+            over_budget = self._total_bytes > self.max_bytes
+        if over_budget:
+            self._evict()
+
+    def _remove(self, path):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except FileNotFoundError:
+            return 0
+        with self._lock:
+            self._total_bytes -= size
+        return size
+
+    def _evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes"""
+        entries = sorted(self._entries(), key=lambda e: e[1])
+        total = sum(size for _, _, size in entries)
+        for path, _, size in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # already evicted by another process
+            total -= size
+            with self._lock:
+                self.evictions += 1
+        with self._lock:
+            self._total_bytes = total
+
+    def clear(self):
+        """Remove every cached entry"""
+        for path, _, _ in list(self._entries()):
+            self._remove(path)
+
+    def stats(self):
+        """Hit/miss counters for this process plus the current on-disk size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'expired': self.expired,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'size_bytes': self._total_bytes,
+                'max_bytes': self.max_bytes
+            }
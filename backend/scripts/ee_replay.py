@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Record/replay stand-in for the Earth Engine API
+
+Record one real run, then replay it offline (no credentials, no network) with
+configurable injected latency, so the collector and the tile scripts can be
+profiled, benchmarked and load-tested repeatably.
+
+Every script picks the backend up from the environment:
+  EE_BACKEND=live      Talk to Earth Engine (default)
+  EE_BACKEND=record    Talk to Earth Engine and save every response
+  EE_BACKEND=replay    Answer from a recording, never touching the network
+  EE_RECORDING_DIR     Recording directory (default: ee_recording)
+  EE_REPLAY_LATENCY    Seconds to sleep per replayed call, or "recorded" to
+                       reproduce each call's original duration (default: 0)
+
+Usage:
+  EE_BACKEND=record python scripts/data_collection.py
+  EE_BACKEND=replay EE_REPLAY_LATENCY=recorded python scripts/data_collection.py --workers 5
+
+Recording layout:
+  <dir>/algorithms.json       ee.data.getAlgorithms() response (needed to build ee objects)
+  <dir>/calls-<pid>.jsonl     {"key", "kind", "seconds", "response"} per computeValue/getMapId
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+
+import ee
+
+BACKENDS = ('live', 'record', 'replay')
+
+
+def backend_from_env():
+    """Return the configured backend name, validating EE_BACKEND"""
+    backend = os.getenv('EE_BACKEND', 'live').lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"EE_BACKEND must be one of {', '.join(BACKENDS)}, got '{backend}'")
+    return backend
+
+
+def call_key(kind, obj, params=None):
+    """Stable key for an ee call: the serialized expression plus any extra request params"""
+    payload = obj.serialize()
+    if params:
+        payload += json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha256(f'{kind}:{payload}'.encode('utf-8')).hexdigest()
+
+
+def _map_id_params(params):
+    """Non-image getMapId params (bands, min/max, palette, ...) that change the result"""
+    return {k: v for k, v in params.items() if k != 'image'}
+
+
+class Recorder:
+    """Wraps ee.data calls so each live response is also written to the recording"""
+
+    def __init__(self, recording_dir):
+        self.recording_dir = Path(recording_dir)
+        self.recording_dir.mkdir(parents=True, exist_ok=True)
+        self.calls_path = self.recording_dir / f'calls-{os.getpid()}.jsonl'
+        self._lock = threading.Lock()
+        self.calls_recorded = 0
+
+    def _write(self, key, kind, seconds, response):
+        line = json.dumps({'key': key, 'kind': kind, 'seconds': round(seconds, 4), 'response': response})
+        with self._lock, open(self.calls_path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+            self.calls_recorded += 1
+
+    def install(self):
+        live_get_algorithms = ee.data.getAlgorithms
+        live_compute_value = ee.data.computeValue
+        live_get_map_id = ee.data.getMapId
+
+        def get_algorithms():
+            algorithms = live_get_algorithms()
+            with open(self.recording_dir / 'algorithms.json', 'w') as f:
+                json.dump(algorithms, f)
+            return algorithms
+
+        def compute_value(obj):
+            started = time.time()
+            result = live_compute_value(obj)
+            self._write(call_key('computeValue', obj), 'computeValue', time.time() - started, result)
+            return result
+
+        def get_map_id(params):
+            started = time.time()
+            result = live_get_map_id(params)
+            key = call_key('getMapId', params['image'], _map_id_params(params))
+            self._write(key, 'getMapId', time.time() - started, {
+                'mapid': result['mapid'],
+                'token': result['token'],
+                'url_format': result['tile_fetcher'].url_format
+            })
+            return result
+
+        ee.data.getAlgorithms = get_algorithms
+        ee.data.computeValue = compute_value
+        ee.data.getMapId = get_map_id
+
+
+class ReplayBackend:
+    """Serves ee.data calls from a recording, sleeping to simulate server latency"""
+
+    def __init__(self, recording_dir, latency=0.0):
+        self.recording_dir = Path(recording_dir)
+        algorithms_path = self.recording_dir / 'algorithms.json'
+        if not algorithms_path.exists():
+            raise FileNotFoundError(f"No recording found at {self.recording_dir} (missing algorithms.json)")
+        with open(algorithms_path) as f:
+            self.algorithms = json.load(f)
+
+        self.responses = {}
+        for calls_path in sorted(self.recording_dir.glob('calls-*.jsonl')):
+            with open(calls_path, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        call = json.loads(line)
+                        self.responses[call['key']] = call
+
+        self.latency = latency  # seconds, or 'recorded'
+        self._lock = threading.Lock()
+        self.calls_served = 0
+        self.calls_missing = 0
+
+    def _respond(self, key, kind):
+        call = self.responses.get(key)
+        if call is None:
+            with self._lock:
+                self.calls_missing += 1
+            raise ee.EEException(f"Replay: no recorded {kind} response for this expression ({key[:12]})")
+
+        delay = call['seconds'] if self.latency == 'recorded' else self.latency
+        if delay:
+            time.sleep(delay)
+        with self._lock:
+            self.calls_served += 1
+        return call['response']
+
+    def install(self):
+        def compute_value(obj):
+            return self._respond(call_key('computeValue', obj), 'computeValue')
+
+        def get_map_id(params):
+            key = call_key('getMapId', params['image'], _map_id_params(params))
+            response = self._respond(key, 'getMapId')
+            return {
+                'mapid': response['mapid'],
+                'token': response['token'],
+                'tile_fetcher': ee.data.TileFetcher(response['url_format'], map_name=response['mapid'])
+            }
+
+        ee.data.getAlgorithms = lambda: self.algorithms
+        ee.data.computeValue = compute_value
+        ee.data.getMapId = get_map_id
+        # No credentials, REST discovery document or data catalog lookups offline
+        ee.data.initialize = lambda *args, **kwargs: None
+        ee.deprecation.InitializeDeprecatedAssets = lambda: None
+        ee.Initialize(credentials=None, project='ee-replay')
+
+    def stats(self):
+        return {
+            'recorded_calls': len(self.responses),
+            'calls_served': self.calls_served,
+            'calls_missing': self.calls_missing
+        }
+
+
+def _latency_from_env():
+    latency = os.getenv('EE_REPLAY_LATENCY', '0')
+    return 'recorded' if latency == 'recorded' else float(latency)
+
+
+def install_from_env(verbose=True):
+    """Apply the EE_BACKEND setting before a script initializes Earth Engine.
+
+    Returns the ReplayBackend when Earth Engine has been fully initialized
+    offline (the caller must skip its own ee.Initialize), otherwise None. In
+    record mode the recorder is installed and the caller initializes as usual.
+    Pass verbose=False from scripts whose stdout is machine-readable.
+    """
+    backend = backend_from_env()
+    recording_dir = os.getenv('EE_RECORDING_DIR', 'ee_recording')
+
+    if backend == 'replay':
+        replay = ReplayBackend(recording_dir, _latency_from_env())
+        replay.install()
+        if verbose:
+            print(f"✓ Earth Engine replay backend loaded ({len(replay.responses)} recorded calls from {recording_dir})")
+        return replay
+
+    if backend == 'record':
+        Recorder(recording_dir).install()
+        if verbose:
+            print(f"⏺️  Recording Earth Engine responses to {recording_dir}")
+
+    return None
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo ensemble of fire spread realizations
+
+Runs hundreds of stochastic FireSpreadModel realizations for one fire and
+reduces them, as they finish, into risk grids:
+
+  burn_probability.npy   fraction of members in which each cell burned
+  arrival_pXX.npy        arrival-time percentiles (hours) among members that
+                         burned the cell, NaN where none did
+
+Input rasters are prepared once (fuel/canopy/slope surfaces from the fire's
+terrain and LANDFIRE inputs) and written as .npy files that every worker
+memory-maps read-only, so members share one copy through the page cache
+instead of each reloading and recomputing them. Members fan out over a
+process pool with a bounded number in flight; each returns only the cells it
+burned and their arrival times. The parent folds them into a burn count and
+a per-cell arrival-time histogram (itself a memory-mapped file, touched only
+where fire reached), so no member's full grid is kept. Percentiles are read
+off the histogram, interpolated within bins of histogram_bin_hours.
+
+Each member draws its own RNG stream (seed + member), wind perturbation
+(speed scaled log-normally, direction jittered) and, when ignition
+candidates with confidence exist, an ignition point sampled by confidence.
+Members are scored against the fire's observations (fire_scoring.py) as they
+are folded in, into member_scores.csv.
+
+Usage:
+  python fire_ensemble.py wildfire_data/Camp_Fire_2018 --members 200 --workers 8 --hours 48
+  -> wildfire_data/Camp_Fire_2018/simulation/ensemble/
+"""
+
+import os
+import json
+import time
+import shutil
+import argparse
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+import pandas as pd
+
+from fire_scoring import FireScorer
+from fire_spread import FireSpreadModel, load_simulation, prepare_surfaces
+from sim_grid import SimulationGrid
+
+DEFAULT_PERCENTILES = (10, 50, 90)
+WIND_SPEED_SIGMA = 0.2          # log-normal sigma of the wind speed multiplier
+WIND_DIRECTION_SIGMA_DEG = 15.0
+MAX_HISTOGRAM_BINS = 128
+
+_worker = {}
+
+
+def _init_worker(surfaces_dir, grid, model_kwargs):
+    """Memory-map the shared surfaces once per worker process"""
+    _worker['surfaces'] = {name: np.load(Path(surfaces_dir) / f'{name}.npy', mmap_mode='r')
+                           for name in ('base', 'elevation')}
+    _worker['grid'] = SimulationGrid.from_dict(grid)
+    _worker['model_kwargs'] = model_kwargs
+
+
+def _perturbed_wind(wind, rng):
+    """Wind series with one speed multiplier and direction offset per member"""
+    speed_scale = rng.lognormal(0.0, WIND_SPEED_SIGMA)
+    angle = np.radians(rng.normal(0.0, WIND_DIRECTION_SIGMA_DEG))
+    rotation = np.array([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]], dtype=np.float32)
+    return (np.asarray(wind, dtype=np.float32) @ rotation.T) * speed_scale
+
+
+def _run_member(member, seed, wind, ignition, hours):
+    """One realization -> (member, flat indices of burned cells, their arrival hours)"""
+    model = FireSpreadModel(_worker['grid'], wind=wind, seed=seed,
+                            surfaces=_worker['surfaces'], **_worker['model_kwargs'])
+    model.ignite_lonlat([ignition[0]], [ignition[1]])
+    for _ in model.run(hours, output_every_hours=hours):
+        pass
+    burned = np.flatnonzero(model.burned_mask)
+    return member, burned.astype(np.uint32), model.arrival.ravel()[burned]
+
+
+class EnsembleReducer:
+    """Online burn count and arrival-time histogram over ensemble members"""
+
+    def __init__(self, shape, hours, work_dir, bin_hours=None):
+        self.shape = shape
+        self.cells = shape[0] * shape[1]
+        self.bin_hours = bin_hours or max(hours / MAX_HISTOGRAM_BINS, 1e-6)
+        self.bins = int(np.ceil(hours / self.bin_hours)) + 1
+        self.members = 0
+        self.burn_count = np.zeros(self.cells, dtype=np.uint32)
+        # (cells, bins) counts; a sparse file, so untouched cells cost no memory or disk
+        self.histogram = np.lib.format.open_memmap(Path(work_dir) / 'arrival_histogram.npy', mode='w+',
+                                                   dtype=np.uint16, shape=(self.cells, self.bins))
+        self.burned_area_hectares = []
+
+    def add(self, cells, arrival_hours, cell_area_m2):
+        bins = np.minimum((arrival_hours / self.bin_hours).astype(np.int64), self.bins - 1)
+        self.burn_count[cells] += 1
+        self.histogram.reshape(-1)[cells.astype(np.int64) * self.bins + bins] += 1  # each cell once per member
+        self.members += 1
+        self.burned_area_hectares.append(len(cells) * cell_area_m2 / 10000)
+
+    def burn_probability(self):
+        return (self.burn_count / max(self.members, 1)).astype(np.float32).reshape(self.shape)
+
+    def arrival_percentiles(self, percentiles=DEFAULT_PERCENTILES, chunk_cells=1 << 18):
+        """{percentile: grid of arrival hours} among members that burned each cell"""
+        results = {p: np.full(self.cells, np.nan, dtype=np.float32) for p in percentiles}
+        burned = np.flatnonzero(self.burn_count)
+        for first in range(0, len(burned), chunk_cells):
+            cells = burned[first:first + chunk_cells]
+            cumulative = np.cumsum(self.histogram[cells], axis=1, dtype=np.float32)
+            totals = cumulative[:, -1:]
+            for p in percentiles:
+                target = totals * (p / 100.0)
+                b = np.minimum((cumulative < target).sum(axis=1), self.bins - 1)
+                below = np.where(b > 0, cumulative[np.arange(len(cells)), b - 1], 0.0)
+                in_bin = np.maximum(cumulative[np.arange(len(cells)), b] - below, 1.0)
+                fraction = np.clip((target[:, 0] - below) / in_bin, 0.0, 1.0)
+                results[p][cells] = (b + fraction) * self.bin_hours
+        return {p: grid.reshape(self.shape) for p, grid in results.items()}
+
+
+def run_ensemble(fire_dir, members=100, workers=None, hours=None, seed=0, percentiles=DEFAULT_PERCENTILES,
+                 output_dir=None, minutes_per_step=5.0, bin_hours=None, score=True):
+    """Run the ensemble for a fire directory and write its risk grids; returns the summary dict"""
+    fire_dir = Path(fire_dir)
+    simulation = load_simulation(fire_dir / 'simulation_config.json', fire_dir)
+    grid = simulation['grid']
+    hours = hours if hours is not None else simulation['duration_hours']
+    workers = workers or os.cpu_count() or 1
+    output_dir = Path(output_dir) if output_dir else fire_dir / 'simulation' / 'ensemble'
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    # Ignition per member: sampled by confidence when ranked candidates exist
+    params = simulation['config']['simulation_parameters']
+    candidates = [c for c in params.get('ignition_candidates', []) if c.get('confidence', 0) > 0]
+    if candidates:
+        ignitions = np.array([[c['longitude'], c['latitude']] for c in candidates])
+        weights = np.array([c['confidence'] for c in candidates], dtype=float)
+    else:
+        ignitions = simulation['ignition_points']
+        weights = np.ones(len(ignitions))
+    weights /= weights.sum()
+
+    rng = np.random.default_rng(seed)
+    work_dir = Path(tempfile.mkdtemp(prefix='ensemble-', dir=output_dir))
+    started = time.perf_counter()
+    try:
+        surfaces = prepare_surfaces(**simulation['inputs'])
+        for name, array in surfaces.items():
+            np.save(work_dir / f'{name}.npy', array)
+        del surfaces
+
+        reducer = EnsembleReducer(grid.shape, hours, work_dir, bin_hours)
+        scorer = FireScorer.from_fire_dir(fire_dir, grid) if score else None
+        member_scores = []
+
+        def fold(future):
+            member, cells, arrival = future.result()
+            reducer.add(cells, arrival, grid.cell_area_m2)
+            if scorer:
+                member_scores.append({'member': member, 'seed': seed + member,
+                                      **scorer.score_cells(cells, arrival)})
+
+        model_kwargs = {'minutes_per_step': minutes_per_step,
+                        'weather_update_hours': simulation['weather_update_hours']}
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(str(work_dir), grid.to_dict(), model_kwargs)) as executor:
+            pending = set()
+            for member in range(members):
+                ignition = ignitions[rng.choice(len(ignitions), p=weights)]
+                wind = _perturbed_wind(simulation['wind'], rng)
+                pending.add(executor.submit(_run_member, member, seed + member, wind, ignition, hours))
+                # Keep a bounded number of members in flight so results never pile up
+                if len(pending) >= 2 * workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        fold(future)
+            for future in wait(pending).done:
+                fold(future)
+
+        np.save(output_dir / 'burn_probability.npy', reducer.burn_probability())
+        for p, arrival in reducer.arrival_percentiles(percentiles).items():
+            np.save(output_dir / f'arrival_p{p:02d}.npy', arrival)
+        if member_scores:
+            member_scores = pd.DataFrame(member_scores).sort_values('member')
+            member_scores.to_csv(output_dir / 'member_scores.csv', index=False)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    areas = np.array(reducer.burned_area_hectares)
+    summary = {
+        'fire_name': simulation['config']['fire_metadata']['name'],
+        'created_at': datetime.now().isoformat(),
+        'members': reducer.members,
+        'seed': seed,
+        'simulated_hours': hours,
+        'histogram_bin_hours': reducer.bin_hours,
+        'arrival_percentiles': list(percentiles),
+        'burned_area_hectares': {
+            'mean': float(areas.mean()),
+            'p10': float(np.percentile(areas, 10)),
+            'p50': float(np.percentile(areas, 50)),
+            'p90': float(np.percentile(areas, 90))
+        },
+        'grid': grid.to_dict(),
+        'scores': {
+            'mean_iou': float(member_scores['iou'].mean()),
+            'best_iou': float(member_scores['iou'].max()),
+            'best_member': int(member_scores.loc[member_scores['iou'].idxmax(), 'member'])
+        } if len(member_scores) else None,
+        'elapsed_seconds': round(time.perf_counter() - started, 2),
+        'workers': workers
+    }
+    with open(output_dir / 'ensemble_summary.json', 'w') as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Monte Carlo fire spread ensemble')
+    parser.add_argument('fire_dir', help='Fire directory containing simulation_config.json')
+    parser.add_argument('--members', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--hours', type=float, help='Hours to simulate (default: simulation_duration_hours)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--percentiles', type=int, nargs='+', default=list(DEFAULT_PERCENTILES))
+    parser.add_argument('--bin-hours', type=float, help='Arrival histogram resolution (default: hours / 128)')
+    parser.add_argument('--output-dir', help='Default: <fire_dir>/simulation/ensemble')
+    parser.add_argument('--no-score', action='store_true', help='Skip scoring members against observations')
+    args = parser.parse_args(argv)
+
+    summary = run_ensemble(args.fire_dir, args.members, args.workers, args.hours, args.seed,
+                           tuple(args.percentiles), args.output_dir, bin_hours=args.bin_hours,
+                           score=not args.no_score)
+    area = summary['burned_area_hectares']
+    print(f"🔥 {summary['members']} members in {summary['elapsed_seconds']}s: burned area "
+          f"p10 {area['p10']:.0f} / p50 {area['p50']:.0f} / p90 {area['p90']:.0f} ha")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Simulation-vs-observation validation scores
+
+Fills in the validation_metrics of simulation_config.json with numbers:
+
+  spatial   IoU, Sørensen (Dice), commission and omission error of the
+            predicted burned footprint against the observed one
+  temporal  predicted minus observed arrival time (bias, MAE, RMSE, in hours)
+            at cells where FIRMS first detected fire, and the share of those
+            cells the prediction reached
+
+The observed footprint is burned_area.geojson (MCD64A1) plus the MOD14A1
+fire pixels, burned onto the simulation grid in one rasterize call each.
+Observed arrival times are the earliest FIRMS detection in each cell,
+measured in hours from the ignition date like the spread engines' arrival
+grids.
+
+Observations are rasterized once per fire; scoring a prediction then only
+touches the cells it burned and the detection cells, so a member given as
+sparse (cells, arrival hours) costs O(burned cells) and thousands of
+ensemble members score in seconds.
+
+Usage:
+  scorer = FireScorer.from_fire_dir('wildfire_data/Camp_Fire_2018')
+  scores = scorer.score(arrival_hours)
+  python fire_scoring.py wildfire_data/Camp_Fire_2018 --arrival simulation/arrival_hours.npy
+"""
+
+import json
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import shapely
+from rasterio.features import rasterize
+
+from burned_area import geometries_from_features
+from fire_store import FireStore
+from firms import parse_payload, FirmsError
+from ignition import firms_detections, mod14a1_fire_features
+from sim_grid import SimulationGrid
+
+
+def burn_geometries(grid, geometries, values=None, fill=0, dtype=np.uint8):
+    """Rasterize lon/lat geometries onto grid; with values, later geometries overwrite earlier ones"""
+    geometries = np.asarray(geometries, dtype=object)
+    geometries = geometries[~shapely.is_missing(geometries) & ~shapely.is_empty(geometries)]
+    if len(geometries) == 0:
+        return np.full(grid.shape, fill, dtype=dtype)
+    projected = shapely.transform(geometries, grid.lonlat_to_xy, interleaved=False)
+    values = np.ones(len(projected)) if values is None else values
+    return rasterize(zip(projected, values), out_shape=grid.shape, transform=grid.transform,
+                     fill=fill, dtype=dtype)
+
+
+def load_firms(fire_dir, fire_name):
+    """FIRMS detections for a fire from the fire store, else from the collector's CSVs"""
+    fire_dir = Path(fire_dir)
+    try:
+        frame = FireStore(fire_dir.parent).query('firms', fires=[fire_name])
+    except Exception as e:
+        print(f"⚠️  Fire store query failed, reading FIRMS CSVs instead: {e}")
+        frame = pd.DataFrame()
+    if len(frame) == 0:
+        frames = []
+        for path in sorted((fire_dir / 'fire_detection').glob('firms_*.csv')):
+            try:
+                frames.append(parse_payload(path.read_text()).assign(product=path.stem[len('firms_'):]))
+            except FirmsError:
+                continue  # error page saved by an earlier collector
+        frame = pd.concat(frames, ignore_index=True) if frames else frame
+    return firms_detections(frame)
+
+
+class FireScorer:
+    """Observed footprint and arrival times on a simulation grid, ready to score predictions"""
+
+    def __init__(self, grid, observed_mask, detection_cells=None, detection_hours=None):
+        self.grid = grid
+        self.observed = np.asarray(observed_mask, dtype=bool).ravel()
+        self.observed_count = int(np.count_nonzero(self.observed))
+        self.detection_cells = np.zeros(0, dtype=np.int64) if detection_cells is None else detection_cells
+        self.detection_hours = np.zeros(0) if detection_hours is None else detection_hours
+        self._scratch = np.full(self.observed.size, np.nan, dtype=np.float32)
+
+    @classmethod
+    def from_observations(cls, grid, start_date, burned_area=None, mod14a1=None, firms=None):
+        """Scorer from GeoJSON feature collections and a firms_detections() frame"""
+        observed = np.zeros(grid.shape, dtype=bool)
+        # MOD14A1 collections also carry label 0 polygons (non-fire background)
+        for features in ((burned_area or {}).get('features', []), mod14a1_fire_features(mod14a1)):
+            if features:
+                observed |= burn_geometries(grid, geometries_from_features(features)[0]).astype(bool)
+
+        cells, hours = np.zeros(0, dtype=np.int64), np.zeros(0)
+        if firms is not None and len(firms):
+            rows, cols = grid.lonlat_to_rowcol(firms['longitude'].to_numpy(), firms['latitude'].to_numpy())
+            inside = grid.contains(rows, cols)
+            flat = rows[inside] * grid.width + cols[inside]
+            times = (pd.to_datetime(firms['acq_date']).to_numpy()[inside]
+                     - np.datetime64(pd.Timestamp(start_date))) / np.timedelta64(1, 'h')
+            # Earliest detection per cell
+            order = np.lexsort((times, flat))
+            first = np.flatnonzero(np.diff(flat[order], prepend=-1))
+            cells, hours = flat[order][first], times[order][first]
+        return cls(grid, observed, cells, hours)
+
+    @classmethod
+    def from_fire_dir(cls, fire_dir, grid=None):
+        """Scorer for a collected fire directory (simulation_config.json, fire_detection/, fire store)"""
+        fire_dir = Path(fire_dir)
+        with open(fire_dir / 'simulation_config.json') as f:
+            config = json.load(f)
+        grid = grid or SimulationGrid.from_config(config)
+
+        collections = {}
+        for key, name in (('burned_area', 'burned_area.geojson'), ('mod14a1', 'modis_fire_detections.geojson')):
+            path = fire_dir / 'fire_detection' / name
+            if path.exists():
+                with open(path) as f:
+                    collections[key] = json.load(f)
+        metadata = config['fire_metadata']
+        return cls.from_observations(grid, metadata['temporal_extent']['ignition_date'],
+                                     firms=load_firms(fire_dir, metadata['name']), **collections)
+
+    def score_cells(self, cells, arrival_hours=None):
+        """Scores for a prediction given as flat burned cell indices (and their arrival hours)"""
+        cells = np.asarray(cells, dtype=np.int64)
+        hits = int(np.count_nonzero(self.observed[cells]))
+        false_alarms = len(cells) - hits
+        misses = self.observed_count - hits
+        scores = {
+            'predicted_cells': len(cells),
+            'observed_cells': self.observed_count,
+            'iou': hits / max(hits + false_alarms + misses, 1),
+            'sorensen': 2 * hits / max(2 * hits + false_alarms + misses, 1),
+            'commission_error': false_alarms / max(len(cells), 1),
+            'omission_error': misses / max(self.observed_count, 1)
+        }
+
+        if arrival_hours is not None and len(self.detection_cells):
+            self._scratch[cells] = arrival_hours
+            predicted = self._scratch[self.detection_cells]
+            self._scratch[cells] = np.nan
+            reached = ~np.isnan(predicted)
+            error = predicted[reached] - self.detection_hours[reached]
+            scores.update({
+                'detection_cells': len(self.detection_cells),
+                'detections_reached': float(reached.mean()),
+                'arrival_bias_hours': float(error.mean()) if len(error) else None,
+                'arrival_mae_hours': float(np.abs(error).mean()) if len(error) else None,
+                'arrival_rmse_hours': float(np.sqrt((error ** 2).mean())) if len(error) else None
+            })
+        return scores
+
+    def score(self, arrival):
+        """Scores for a dense arrival-time grid (hours, NaN = unburned)"""
+        arrival = np.asarray(arrival, dtype=np.float32).ravel()
+        cells = np.flatnonzero(~np.isnan(arrival))
+        return self.score_cells(cells, arrival[cells])
+
+    def score_members(self, members):
+        """DataFrame of scores for an iterable of (cells, arrival_hours) members"""
+        return pd.DataFrame([self.score_cells(cells, hours) for cells, hours in members])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Score a predicted arrival-time grid against observations')
+    parser.add_argument('fire_dir', help='Fire directory containing simulation_config.json')
+    parser.add_argument('--arrival', default='simulation/arrival_hours.npy',
+                        help='Arrival-time grid .npy (hours, NaN = unburned), relative to fire_dir')
+    parser.add_argument('--output', help='Scores JSON (default: next to the arrival grid)')
+    args = parser.parse_args(argv)
+
+    fire_dir = Path(args.fire_dir)
+    arrival_path = fire_dir / args.arrival
+    scorer = FireScorer.from_fire_dir(fire_dir)
+    scores = scorer.score(np.load(arrival_path))
+
+    output = Path(args.output) if args.output else arrival_path.with_name(arrival_path.stem + '_scores.json')
+    with open(output, 'w') as f:
+        json.dump(scores, f, indent=2)
+    print(f"📊 IoU {scores['iou']:.3f}, Sørensen {scores['sorensen']:.3f}, "
+          f"commission {scores['commission_error']:.3f}, omission {scores['omission_error']:.3f}")
+    if scores.get('arrival_mae_hours') is not None:
+        print(f"   Arrival MAE {scores['arrival_mae_hours']:.1f} h (bias {scores['arrival_bias_hours']:+.1f} h) "
+              f"over {scores['detection_cells']} FIRMS cells")
+
+
+if __name__ == '__main__':
+    main()
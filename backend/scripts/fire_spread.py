@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+Whole-grid cellular automaton fire spread engine
+
+Reads a fire's simulation_config.json (grid_resolution_meters,
+time_step_hours, simulation_duration_hours, ignition_points,
+weather_update_frequency_hours) and spreads fire over the full 30 m grid
+with NumPy array operations, one CA step at a time.
+
+Each step, every unburned cell next to a burning cell ignites with
+
+  p = 1 - prod_k (1 - p_k),   p_k = p_h (1 + p_veg) (1 + p_den) p_w p_s
+
+over its burning neighbours k (Alexandridis et al. 2008):
+  p_veg  fuel term from the LANDFIRE FBFM40 fuel model (non-burnable: -1)
+  p_den  canopy cover term
+  p_w    wind term exp(c1 V) exp(V c2 (cos(theta) - 1)), V in m/s, theta the
+         angle between the wind and the spread direction
+  p_s    slope term exp(a theta_s), theta_s the slope angle from k to the cell
+
+Only the bounding box of the active front (plus one cell) is updated, so a
+step costs in proportion to the fire, not the grid. Wind comes from the
+fire's ERA5 series, refreshed every weather_update_frequency_hours. The RNG
+is seeded, so a (config, seed) pair always gives the same fire.
+
+Elevation, fuel and canopy rasters come from the fire's input stack
+(input_stack.py). For fires collected without one, load_inputs() synthesises
+spatially correlated elevation and fuel fields matching the fire's terrain
+statistics and LANDFIRE fuel-model mix.
+
+Usage:
+  python fire_spread.py wildfire_data/Camp_Fire_2018 --hours 24 --seed 1 --stream
+  python fire_spread.py wildfire_data/Camp_Fire_2018 --output arrival_hours.npy
+  python fire_spread.py --benchmark
+"""
+
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from input_stack import InputStack, LAYERS as STACK_LAYERS
+from sim_grid import SimulationGrid
+
+UNBURNED, BURNING, BURNED = 0, 1, 2
+
+# Alexandridis et al. (2008) calibration
+P_H = 0.58
+WIND_C1 = 0.045
+WIND_C2 = 0.131
+SLOPE_A = 0.078
+
+# FBFM40 fuel model ranges -> p_veg (Scott & Burgan groups); 91-99 are non-burnable
+FUEL_GROUP_P_VEG = (
+    (91, 99, -1.0),    # NB: urban, snow/ice, agriculture, water, barren
+    (101, 109, 0.4),   # GR: grass
+    (121, 124, 0.3),   # GS: grass-shrub
+    (141, 149, 0.2),   # SH: shrub
+    (161, 165, 0.0),   # TU: timber-understory
+    (181, 189, -0.2),  # TL: timber litter
+    (201, 204, 0.1),   # SB: slash-blowdown
+)
+
+# Input stack nodata: cells never fetched or masked at the source
+FUEL_NODATA = next(layer['nodata'] for layer in STACK_LAYERS if layer['name'] == 'fuel_model')
+CANOPY_NODATA = next(layer['nodata'] for layer in STACK_LAYERS if layer['name'] == 'canopy_cover')
+
+DIRECTIONS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+
+
+def fuel_p_veg(fuel_model, nodata=FUEL_NODATA):
+    """p_veg for every cell of an FBFM40 grid (unknown codes count as neutral fuel, nodata as non-burnable)"""
+    table = np.zeros(256, dtype=np.float32)
+    for first, last, p_veg in FUEL_GROUP_P_VEG:
+        table[first:last + 1] = p_veg
+    fuel_model = np.asarray(fuel_model)
+    p_veg = table[np.clip(fuel_model, 0, 255).astype(np.intp)]
+    return np.where(fuel_model == nodata, np.float32(-1.0), p_veg)
+
+
+def canopy_p_den(canopy_cover, nodata=CANOPY_NODATA):
+    """p_den from canopy cover percent: sparse -0.4, normal 0, dense +0.3 (nodata neutral)"""
+    canopy_cover = np.asarray(canopy_cover, dtype=np.float32)
+    p_den = np.where(canopy_cover < 20, -0.4, np.where(canopy_cover > 60, 0.3, 0.0)).astype(np.float32)
+    return np.where(canopy_cover == nodata, np.float32(0.0), p_den)
+
+
+def wind_factors(u, v, directions=DIRECTIONS):
+    """p_w for spread along each (row, col) step in directions under a (u, v) m/s wind"""
+    speed = float(np.hypot(u, v))
+    toward = np.arctan2(v, u)  # direction the wind blows to, east = 0, north = pi/2
+    spread = np.arctan2(-np.array([dr for dr, _ in directions]), [dc for _, dc in directions])  # rows grow southward
+    return (np.exp(WIND_C1 * speed) * np.exp(speed * WIND_C2 * (np.cos(spread - toward) - 1))).astype(np.float32)
+
+
+def slope_factor(rise, distance):
+    """p_s for spreading uphill by rise metres over distance metres"""
+    return np.exp(SLOPE_A * np.degrees(np.arctan(rise / distance)))
+
+
+def _correlated_field(shape, correlation_cells, rng):
+    """Zero-mean, unit-variance Gaussian random field (FFT-filtered white noise)"""
+    noise = rng.standard_normal(shape, dtype=np.float32)
+    ky = np.fft.fftfreq(shape[0])[:, None]
+    kx = np.fft.rfftfreq(shape[1])[None, :]
+    kernel = np.exp(-2 * (np.pi * correlation_cells) ** 2 * (kx ** 2 + ky ** 2)).astype(np.float32)
+    field = np.fft.irfft2(np.fft.rfft2(noise) * kernel, s=shape).astype(np.float32)
+    return (field - field.mean()) / (field.std() or 1.0)
+
+
+def load_inputs(fire_dir, grid, seed=0):
+    """Elevation, fuel model and canopy cover on the simulation grid.
+
+    Read from the fire's input stack (<fire_dir>/inputs, see input_stack.py)
+    when one has been built on this grid. Otherwise synthesised from
+    topography/terrain_statistics.json and the fuel-model distribution in
+    fuel_models/landfire_fuel_data.json: smooth elevation with the fire's mean
+    and spread, and contiguous fuel patches in the observed class proportions.
+    """
+    fire_dir = Path(fire_dir)
+    if InputStack.exists(fire_dir / 'inputs'):
+        stack = InputStack(fire_dir / 'inputs')
+        if stack.grid.to_dict() == grid.to_dict():
+            elevation = stack.read('elevation')
+            valid = stack.valid('elevation', elevation)
+            elevation[~valid] = elevation[valid].mean() if valid.any() else 0.0
+            return {
+                'elevation': elevation,
+                'fuel_model': stack.band('fuel_model'),
+                'canopy_cover': stack.band('canopy_cover')
+            }
+
+    rng = np.random.default_rng(seed)
+    correlation_cells = max(1.0, 1000.0 / grid.resolution)  # ~1 km features
+
+    terrain = {}
+    terrain_path = fire_dir / 'topography' / 'terrain_statistics.json'
+    if terrain_path.exists():
+        with open(terrain_path) as f:
+            terrain = json.load(f)
+    elevation = (terrain.get('elevation_mean', 500.0)
+                 + terrain.get('elevation_stdDev', 200.0) * _correlated_field(grid.shape, correlation_cells, rng))
+
+    distribution = {'102': 1}
+    fuel_path = fire_dir / 'fuel_models' / 'landfire_fuel_data.json'
+    if fuel_path.exists():
+        with open(fuel_path) as f:
+            distribution = json.load(f).get('fuel_model_distribution', {}).get('FBFM40') or distribution
+    classes = np.array([int(float(c)) for c in distribution], dtype=np.int16)
+    weights = np.array(list(distribution.values()), dtype=float)
+    field = _correlated_field(grid.shape, correlation_cells / 2, rng)
+    thresholds = np.quantile(field, np.cumsum(weights / weights.sum())[:-1])
+    fuel_model = classes[np.searchsorted(thresholds, field)]
+
+    canopy_cover = np.clip(50 + 25 * _correlated_field(grid.shape, correlation_cells, rng), 0, 100)
+
+    return {
+        'elevation': elevation.astype(np.float32),
+        'fuel_model': fuel_model,
+        'canopy_cover': canopy_cover.astype(np.float32)
+    }
+
+
+def weather_schedule(fire_dir, start_date, hours, update_hours):
+    """(u, v) 10 m wind in m/s for each weather update period, from the ERA5 series"""
+    periods = max(1, int(np.ceil(hours / update_hours)))
+    path = Path(fire_dir) / 'weather' / 'era5_weather_data.csv'
+    if not path.exists():
+        return np.zeros((periods, 2), dtype=np.float32)
+
+    weather = pd.read_csv(path, parse_dates=['date']).sort_values('date')
+    times = pd.Timestamp(start_date) + pd.to_timedelta(np.arange(periods) * update_hours, unit='h')
+    # Daily ERA5: each period uses the latest day at or before it
+    rows = np.clip(np.searchsorted(weather['date'].to_numpy(), times.normalize().to_numpy(), 'right') - 1,
+                   0, len(weather) - 1)
+    wind = weather[['u_component_of_wind_10m', 'v_component_of_wind_10m']].to_numpy(dtype=np.float32)[rows]
+    return np.nan_to_num(wind)
+
+
+def load_simulation(config_path, fire_dir=None, inputs=None):
+    """Everything a run needs from simulation_config.json and the fire directory.
+
+    Returns a dict with config, grid, inputs (elevation, fuel_model,
+    canopy_cover), wind (per weather period), weather_update_hours,
+    duration_hours, time_step_hours and ignition_points (lon, lat rows).
+    """
+    with open(config_path) as f:
+        config = json.load(f)
+    fire_dir = Path(fire_dir) if fire_dir else Path(config_path).parent
+    params = config['simulation_parameters']
+    grid = SimulationGrid.from_config(config)
+
+    update_hours = params.get('weather_update_frequency_hours', 3)
+    return {
+        'config': config,
+        'grid': grid,
+        'inputs': inputs if inputs is not None else load_inputs(fire_dir, grid, seed=0),
+        'wind': weather_schedule(fire_dir, config['fire_metadata']['temporal_extent']['ignition_date'],
+                                 params['simulation_duration_hours'], update_hours),
+        'weather_update_hours': update_hours,
+        'duration_hours': params['simulation_duration_hours'],
+        'time_step_hours': params.get('time_step_hours', 1),
+        'ignition_points': np.asarray(params['ignition_points'], dtype=float).reshape(-1, 2)
+    }
+
+
+def prepare_surfaces(elevation, fuel_model, canopy_cover=None):
+    """Static per-cell model surfaces, padded by one cell.
+
+    'base' is p_h (1 + p_veg) (1 + p_den); the zero border never ignites, so
+    neighbour slices need no bounds checks. Compute once and share between
+    runs (e.g. as memory-mapped files across an ensemble); models never
+    write to them.
+    """
+    base = P_H * (1 + fuel_p_veg(fuel_model))
+    if canopy_cover is not None:
+        base *= 1 + canopy_p_den(canopy_cover)
+    return {
+        'base': np.pad(base.astype(np.float32), 1),
+        'elevation': np.pad(np.asarray(elevation, dtype=np.float32), 1, mode='edge')
+    }
+
+
+class FireSpreadModel:
+    def __init__(self, grid, elevation=None, fuel_model=None, canopy_cover=None, wind=None, seed=None,
+                 minutes_per_step=5.0, residence_steps=2, weather_update_hours=3.0, surfaces=None):
+        """Model over grid from input rasters, or from precomputed surfaces (see prepare_surfaces)"""
+        self.grid = grid
+        self.minutes_per_step = minutes_per_step
+        self.residence_steps = residence_steps
+        self.weather_update_hours = weather_update_hours
+        self.wind = np.zeros((1, 2), dtype=np.float32) if wind is None else np.asarray(wind, dtype=np.float32)
+        self.rng = np.random.default_rng(seed)
+
+        surfaces = surfaces if surfaces is not None else prepare_surfaces(elevation, fuel_model, canopy_cover)
+        self.base = surfaces['base']
+        self.elevation = surfaces['elevation']
+        self.state = np.zeros(self.base.shape, dtype=np.uint8)
+        self.age = np.zeros(self.base.shape, dtype=np.uint8)
+        self.arrival = np.full(grid.shape, np.nan, dtype=np.float32)
+
+        self.step_count = 0
+        self.cells_updated = 0
+        self._front = None  # padded (r0, r1, c0, c1) bounding box of burning cells
+
+    @classmethod
+    def from_config(cls, config_path, fire_dir=None, seed=None, inputs=None, **kwargs):
+        """Model for a simulation_config.json, ignited at its ignition_points"""
+        simulation = load_simulation(config_path, fire_dir, inputs)
+        model = cls(simulation['grid'], wind=simulation['wind'], seed=seed,
+                    weather_update_hours=simulation['weather_update_hours'],
+                    surfaces=prepare_surfaces(**simulation['inputs']), **kwargs)
+        model.config = simulation['config']
+        points = simulation['ignition_points']
+        model.ignite_lonlat(points[:, 0], points[:, 1])
+        return model
+
+    @property
+    def hours(self):
+        return self.step_count * self.minutes_per_step / 60.0
+
+    @property
+    def burning_count(self):
+        return int(np.count_nonzero(self.state == BURNING))
+
+    @property
+    def burned_mask(self):
+        """Cells that have ignited (burning or burned)"""
+        return ~np.isnan(self.arrival)
+
+    def ignite(self, rows, cols):
+        """Set cells burning at the current time (cells off the grid are ignored)"""
+        rows, cols = np.atleast_1d(rows), np.atleast_1d(cols)
+        inside = self.grid.contains(rows, cols)
+        rows, cols = rows[inside], cols[inside]
+        self.state[rows + 1, cols + 1] = BURNING
+        self.age[rows + 1, cols + 1] = 0
+        self.arrival[rows, cols] = self.hours
+        self._update_front()
+
+    def ignite_lonlat(self, lons, lats):
+        self.ignite(*self.grid.lonlat_to_rowcol(lons, lats))
+
+    def _update_front(self):
+        rows, cols = np.nonzero(self.state == BURNING)
+        self._front = (rows.min(), rows.max() + 1, cols.min(), cols.max() + 1) if len(rows) else None
+
+    def _wind_factors(self):
+        """p_w for each of the 8 spread directions at the current time"""
+        period = min(int(self.hours // self.weather_update_hours), len(self.wind) - 1)
+        return wind_factors(*self.wind[period])
+
+    def step(self):
+        """Advance one CA step; returns the number of newly ignited cells"""
+        if self._front is None:
+            return 0
+
+        # Window: front bbox plus one ring (padded coords, never the border)
+        r0, r1, c0, c1 = self._front
+        r0, c0 = max(r0 - 1, 1), max(c0 - 1, 1)
+        r1, c1 = min(r1 + 1, self.state.shape[0] - 1), min(c1 + 1, self.state.shape[1] - 1)
+        h, w = r1 - r0, c1 - c0
+
+        state = self.state[r0 - 1:r1 + 1, c0 - 1:c1 + 1]  # window plus neighbour ring
+        elevation = self.elevation[r0 - 1:r1 + 1, c0 - 1:c1 + 1]
+        burning = state == BURNING
+        target_elevation = elevation[1:-1, 1:-1]
+        base = self.base[r0:r1, c0:c1]
+
+        not_ignited = np.ones((h, w), dtype=np.float32)
+        for k, (p_w, (dr, dc)) in enumerate(zip(self._wind_factors(), DIRECTIONS)):
+            source = burning[1 - dr:1 - dr + h, 1 - dc:1 - dc + w]
+            if not source.any():
+                continue
+            distance = self.grid.resolution * (np.sqrt(2) if dr and dc else 1.0)
+            p_s = slope_factor(target_elevation - elevation[1 - dr:1 - dr + h, 1 - dc:1 - dc + w], distance)
+            p = np.minimum(base * p_w * p_s, 1.0)
+            not_ignited *= 1 - p * source
+
+        window_state = self.state[r0:r1, c0:c1]
+        window_age = self.age[r0:r1, c0:c1]
+        ignite = (window_state == UNBURNED) & (self.rng.random((h, w), dtype=np.float32) < 1 - not_ignited)
+
+        # Burning cells burn out after residence_steps
+        was_burning = window_state == BURNING
+        window_age[was_burning] += 1
+        window_state[was_burning & (window_age >= self.residence_steps)] = BURNED
+
+        window_state[ignite] = BURNING
+        window_age[ignite] = 0
+        self.step_count += 1
+        self.cells_updated += h * w
+        new_rows, new_cols = np.nonzero(ignite)
+        self.arrival[new_rows + r0 - 1, new_cols + c0 - 1] = self.hours
+
+        self._update_front_in(r0, r1, c0, c1)
+        return len(new_rows)
+
+    def _update_front_in(self, r0, r1, c0, c1):
+        """Recompute the front bbox; burning cells can only be inside the last window"""
+        rows, cols = np.nonzero(self.state[r0:r1, c0:c1] == BURNING)
+        self._front = ((rows.min() + r0, rows.max() + r0 + 1, cols.min() + c0, cols.max() + c0 + 1)
+                       if len(rows) else None)
+
+    def run(self, hours, output_every_hours=1.0, include_cells=False):
+        """Generator: step the model for `hours`, yielding a snapshot every output_every_hours.
+
+        Each snapshot has hour, burning_cells, burned_cells and area_hectares;
+        include_cells adds new_cells, the [row, col] cells ignited since the
+        previous snapshot. Stops early (after a last snapshot) once the fire
+        is out.
+        """
+        steps_per_output = max(1, int(round(output_every_hours * 60 / self.minutes_per_step)))
+        total_steps = int(round(hours * 60 / self.minutes_per_step))
+        last_hour = self.hours
+
+        while self.step_count < total_steps:
+            for _ in range(min(steps_per_output, total_steps - self.step_count)):
+                self.step()
+                if self._front is None:
+                    break
+
+            burned = int(np.count_nonzero(self.burned_mask))
+            snapshot = {
+                'hour': round(self.hours, 4),
+                'burning_cells': self.burning_count,
+                'burned_cells': burned,
+                'area_hectares': burned * self.grid.cell_area_m2 / 10000
+            }
+            if include_cells:
+                new = np.argwhere((self.arrival > last_hour) & (self.arrival <= self.hours))
+                snapshot['new_cells'] = new.tolist()
+            last_hour = self.hours
+            yield snapshot
+            if self._front is None:
+                return
+
+
+def benchmark(size=2000, hours=24.0, seed=0):
+    """Cells updated per second on a synthetic size x size grid"""
+    grid = SimulationGrid('EPSG:32610', 600000.0, 4300000.0, size, size, 30.0)
+    rng = np.random.default_rng(seed)
+    elevation = 500 + 200 * _correlated_field(grid.shape, 30, rng)
+    fuel_model = np.full(grid.shape, 102, dtype=np.int16)
+    model = FireSpreadModel(grid, elevation, fuel_model, wind=[[6.0, 2.0]], seed=seed)
+    model.ignite(size // 2, size // 2)
+
+    started = time.perf_counter()
+    for _ in model.run(hours):
+        pass
+    seconds = time.perf_counter() - started
+    print(f"{model.step_count} steps in {seconds:.2f}s, {model.cells_updated / seconds / 1e6:.1f}M cells/s, "
+          f"{np.count_nonzero(model.burned_mask):,} cells burned")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Cellular automaton fire spread from simulation_config.json')
+    parser.add_argument('fire_dir', nargs='?', help='Fire directory containing simulation_config.json')
+    parser.add_argument('--hours', type=float, help='Hours to simulate (default: simulation_duration_hours)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--minutes-per-step', type=float, default=5.0)
+    parser.add_argument('--stream', action='store_true', help='Print one JSON line per time step')
+    parser.add_argument('--include-cells', action='store_true', help='Stream newly ignited cells too')
+    parser.add_argument('--output', help='Write the arrival-time grid (hours, NaN = unburned) to this .npy')
+    parser.add_argument('--benchmark', action='store_true', help='Measure cells updated per second')
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        benchmark()
+        return
+    if not args.fire_dir:
+        parser.error('fire_dir is required unless --benchmark is given')
+
+    config_path = Path(args.fire_dir) / 'simulation_config.json'
+    model = FireSpreadModel.from_config(config_path, seed=args.seed, minutes_per_step=args.minutes_per_step)
+    params = model.config['simulation_parameters']
+    hours = args.hours if args.hours is not None else params['simulation_duration_hours']
+
+    started = time.perf_counter()
+    for snapshot in model.run(hours, params.get('time_step_hours', 1), include_cells=args.include_cells):
+        if args.stream:
+            sys.stdout.write(json.dumps(snapshot) + '\n')
+            sys.stdout.flush()
+    seconds = time.perf_counter() - started
+
+    if args.output:
+        np.save(args.output, model.arrival)
+    burned = np.count_nonzero(model.burned_mask)
+    print(f"🔥 {model.hours:.1f} h simulated in {seconds:.1f}s: {burned * model.grid.cell_area_m2 / 10000:.0f} ha burned",
+          file=sys.stderr if args.stream else sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
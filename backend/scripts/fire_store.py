@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Columnar per-fire store for collected time series
+
+Every tabular dataset the collector writes as CSV is also written here as
+Parquet, partitioned by category and fire (hive layout), so analysis code can
+pull exactly the rows and columns it needs across fires without parsing CSV:
+
+  <base_dir>/fire_store/category=<category>/fire=<fire name>/<part>.parquet
+
+Rows are sorted by date and written in row groups, so Parquet min/max
+statistics let date-range filters skip whole row groups; fire and category
+filters prune entire directories. Files are read through a memory-mapped
+filesystem. The date column is stored as 'date' in every category (FIRMS
+acq_date included). Columns use fixed compact types so every fire's files
+share one schema: measurements float32, integers int32, strings
+(satellite, fire_period, ...) dictionary-encoded. FIRMS columns have one
+fixed type each whatever the product (MODIS confidence is 0-100, VIIRS
+confidence l/n/h, so confidence and version are always strings), and a
+category is read with the union of its files' schemas, so columns found in
+only one product (bright_t31, bright_ti4, ...) come back null elsewhere.
+
+Categories written by the collector:
+  firms                 FIRMS detections, one part per product (product column)
+  era5_weather          Daily ERA5 weather
+  fire_weather_indices  Weather plus FFMC, DMC, DC, ISI, BUI, FWI
+  vegetation_indices    MODIS NDVI/EVI
+  modis_timeseries      MODIS NBR/NDVI, one part per fire period
+
+Usage:
+  store = FireStore('wildfire_data')
+  df = store.query('firms', fires=['Camp_Fire_2018'], period='during_fire',
+                   start='2018-11-08', end='2018-11-15', columns=['latitude', 'longitude', 'frp'])
+  python fire_store.py wildfire_data --category firms --fire Camp_Fire_2018 --period during_fire
+  python fire_store.py --self-check
+"""
+
+import os
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pyarrow import fs
+
+CATEGORIES = ('firms', 'era5_weather', 'fire_weather_indices', 'vegetation_indices', 'modis_timeseries')
+
+# Coordinates keep full precision; every other float is stored as float32
+FLOAT64_COLUMNS = {'latitude', 'longitude'}
+DATE_COLUMNS = ('date', 'acq_date')
+ROW_GROUP_SIZE = 64 * 1024
+DICTIONARY_TYPE = pa.dictionary(pa.int32(), pa.string())
+
+# Fixed column types per category, whatever pandas inferred from one file
+COLUMN_TYPES = {
+    'firms': {
+        'brightness': 'float32', 'bright_t31': 'float32', 'bright_ti4': 'float32', 'bright_ti5': 'float32',
+        'scan': 'float32', 'track': 'float32', 'frp': 'float32', 'acq_time': 'int32', 'type': 'int32',
+        'confidence': 'string', 'version': 'string', 'satellite': 'string', 'instrument': 'string',
+        'daynight': 'string', 'product': 'string'
+    }
+}
+
+
+def compact_frame(df, types=None):
+    """Copy of df with dates parsed and numeric/string columns downcast (or cast to types[column])"""
+    df = df.copy()
+    types = types or {}
+    for column in df.columns:
+        series = df[column]
+        if column in types:
+            if types[column] == 'string':
+                df[column] = series.astype('string').astype('category')
+            elif types[column] == 'int32':
+                df[column] = pd.to_numeric(series, errors='coerce').astype('Int32')
+            else:
+                df[column] = pd.to_numeric(series, errors='coerce').astype(types[column])
+        elif column in DATE_COLUMNS:
+            df[column] = pd.to_datetime(series)
+        elif pd.api.types.is_float_dtype(series) and column not in FLOAT64_COLUMNS:
+            df[column] = series.astype(np.float32)
+        elif pd.api.types.is_integer_dtype(series):
+            df[column] = series.astype(np.int32)
+        elif pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+            df[column] = series.astype('category')
+    return df
+
+
+class FireStore:
+    def __init__(self, base_dir="wildfire_data"):
+        self.root = Path(base_dir) / 'fire_store'
+        self._filesystem = fs.LocalFileSystem(use_mmap=True)
+
+    def _partition_dir(self, category, fire_name):
+        return self.root / f'category={category}' / f'fire={fire_name}'
+
+    def write(self, category, fire_name, df, part='data', date_column='date'):
+        """Replace one part of a fire's partition with df (written atomically)"""
+        if category not in CATEGORIES:
+            raise ValueError(f"Unknown store category '{category}', expected one of {', '.join(CATEGORIES)}")
+
+        df = compact_frame(df, COLUMN_TYPES.get(category))
+        if date_column in df.columns:
+            df = df.sort_values(date_column, kind='stable')
+            if date_column != 'date':
+                df = df.rename(columns={date_column: 'date'})
+
+        partition = self._partition_dir(category, fire_name)
+        partition.mkdir(parents=True, exist_ok=True)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        # One dictionary type for every string column, whatever pandas chose for the codes
+        table = table.cast(pa.schema([pa.field(f.name, DICTIONARY_TYPE) if pa.types.is_dictionary(f.type) else f
+                                      for f in table.schema]))
+
+        fd, tmp_path = tempfile.mkstemp(dir=partition, suffix='.tmp')
+        os.close(fd)
+        pq.write_table(table, tmp_path, row_group_size=ROW_GROUP_SIZE, compression='zstd')
+        os.replace(tmp_path, partition / f'{part}.parquet')
+
+    def dataset(self, category):
+        """pyarrow Dataset over every fire's files for a category, with their unified schema"""
+        options = dict(
+            format='parquet',
+            partitioning=ds.partitioning(pa.schema([('fire', pa.string())]), flavor='hive'),
+            filesystem=self._filesystem,
+            exclude_invalid_files=True
+        )
+        # Discovery alone takes the first file's schema; unify all of them instead
+        discovered = ds.dataset(self.root / f'category={category}', **options)
+        schemas = [fragment.physical_schema for fragment in discovered.get_fragments()]
+        schema = pa.unify_schemas(schemas + [pa.schema([('fire', pa.string())])])
+        return ds.dataset(self.root / f'category={category}', schema=schema, **options)
+
+    def fires(self, category):
+        """Fire names with data stored for a category"""
+        category_dir = self.root / f'category={category}'
+        if not category_dir.exists():
+            return []
+        return sorted(p.name.split('=', 1)[1] for p in category_dir.iterdir() if p.name.startswith('fire='))
+
+    def query(self, category, fires=None, period=None, start=None, end=None, columns=None, filter=None):
+        """Rows of a category as a DataFrame.
+
+        fires: fire names to include (default all); period: 'pre_fire',
+        'during_fire' or 'post_fire'; start/end: date window [start, end);
+        columns: columns to read (the 'fire' partition column is always
+        included); filter: an extra pyarrow.dataset expression. All filters
+        are pushed down to the Parquet scan.
+        """
+        if not self.fires(category):
+            return pd.DataFrame()
+
+        expression = ds.scalar(True)
+        if fires is not None:
+            expression &= ds.field('fire').isin(list(fires))
+        if period is not None:
+            expression &= ds.field('fire_period') == period
+        if start is not None:
+            expression &= ds.field('date') >= pd.Timestamp(start)
+        if end is not None:
+            expression &= ds.field('date') < pd.Timestamp(end)
+        if filter is not None:
+            expression &= filter
+
+        if columns is not None:
+            columns = ['fire'] + [c for c in columns if c != 'fire']
+        table = self.dataset(category).to_table(columns=columns, filter=expression)
+        return table.to_pandas()
+
+
+def check_mixed_firms(base_dir=None):
+    """Write a MODIS and a VIIRS FIRMS part for one fire and read them back through query()"""
+    with tempfile.TemporaryDirectory(dir=base_dir) as tmp:
+        store = FireStore(tmp)
+        modis = pd.DataFrame({'latitude': [36.1, 36.2], 'longitude': [-119.1, -119.0],
+                              'brightness': [330.5, 341.2], 'bright_t31': [290.1, 295.3],
+                              'acq_date': ['2020-09-05', '2020-09-06'], 'acq_time': [1030, 2145],
+                              'confidence': [85, 40], 'version': ['6.1NRT', '6.1NRT'], 'frp': [25.0, 7.5],
+                              'product': 'MODIS_NRT'})
+        viirs = pd.DataFrame({'latitude': [36.15], 'longitude': [-119.05],
+                              'bright_ti4': [350.0], 'bright_ti5': [300.2],
+                              'acq_date': ['2020-09-05'], 'acq_time': [945],
+                              'confidence': ['n'], 'version': [2.0], 'frp': [3],
+                              'product': 'VIIRS_SNPP_NRT'})
+        store.write('firms', 'Test_Fire', modis, part='MODIS_NRT', date_column='acq_date')
+        store.write('firms', 'Test_Fire', viirs, part='VIIRS_SNPP_NRT', date_column='acq_date')
+
+        frame = store.query('firms', fires=['Test_Fire'])
+        assert len(frame) == 3, frame
+        assert sorted(frame['confidence'].astype(str)) == ['40', '85', 'n'], frame['confidence']
+        for column in ('brightness', 'bright_t31', 'bright_ti4', 'bright_ti5'):
+            assert frame[column].notna().sum() == (1 if column.startswith('bright_ti') else 2), column
+        assert len(store.query('firms', fires=['Test_Fire'], columns=['bright_ti4'], start='2020-09-06')) == 1
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Query the columnar fire store')
+    parser.add_argument('base_dir', nargs='?', default='wildfire_data')
+    parser.add_argument('--category', choices=CATEGORIES)
+    parser.add_argument('--fire', action='append', dest='fires', help='Fire name (repeatable)')
+    parser.add_argument('--period', choices=['pre_fire', 'during_fire', 'post_fire'])
+    parser.add_argument('--start', help='First date (YYYY-MM-DD)')
+    parser.add_argument('--end', help='End date, exclusive (YYYY-MM-DD)')
+    parser.add_argument('--columns', help='Comma-separated columns to read')
+    parser.add_argument('--self-check', action='store_true',
+                        help='Round-trip mixed MODIS/VIIRS FIRMS parts through a temporary store')
+    args = parser.parse_args(argv)
+
+    if args.self_check:
+        check_mixed_firms()
+        print("✓ MODIS and VIIRS FIRMS parts round-trip through one query")
+        return
+    if not args.category:
+        parser.error('--category is required')
+
+    store = FireStore(args.base_dir)
+    df = store.query(args.category, fires=args.fires, period=args.period, start=args.start, end=args.end,
+                     columns=args.columns.split(',') if args.columns else None)
+    print(df.to_string(max_rows=40))
+    print(f"\n{len(df)} rows")
+
+
+if __name__ == '__main__':
+    main()
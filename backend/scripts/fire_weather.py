@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Canadian Forest Fire Weather Index (FWI) System on NumPy arrays
+
+Implements the daily FFMC, DMC, DC, ISI, BUI and FWI equations of
+Van Wagner (1987) as used by the cffdrs package. Inputs are arrays shaped
+(days,) or (days, series): every column is an independent series (a fire, a
+weather station, ...) and all columns advance through the day-to-day moisture
+code recurrence together, one vectorized step per day.
+
+Inputs (daily):
+  temp   air temperature, °C
+  rh     relative humidity, %
+  wind   10 m wind speed, km/h
+  rain   24 h precipitation, mm
+  month  calendar month 1-12 (day-length adjustments for DMC/DC)
+
+Usage:
+  codes = fwi_system(temp, rh, wind, rain, month)
+  codes['fwi']                      # same shape as temp
+
+  python fire_weather.py --benchmark [--days 3650] [--series 100]
+"""
+
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+# Start-up values for the moisture codes
+FFMC_START = 85.0
+DMC_START = 6.0
+DC_START = 15.0
+
+# DMC effective day length and DC day-length adjustment by month (northern
+# hemisphere, latitude >= 30°N)
+DMC_DAY_LENGTH = np.array([6.5, 7.5, 9.0, 12.8, 13.9, 13.9, 12.4, 10.9, 9.4, 8.0, 7.0, 6.0])
+DC_DAY_LENGTH = np.array([-1.6, -1.6, -1.6, 0.9, 3.8, 5.8, 6.4, 5.0, 2.4, 0.4, -1.6, -1.6])
+
+
+def _ffmc_drivers(temp, rh, wind, rain):
+    """Weather-only FFMC terms for every day, computed before the recurrence"""
+    rf = np.maximum(rain - 0.5, 1e-9)
+    ed = 0.942 * rh ** 0.679 + 11.0 * np.exp((rh - 100.0) / 10.0) \
+        + 0.18 * (21.1 - temp) * (1.0 - np.exp(-0.115 * rh))
+    ew = 0.618 * rh ** 0.753 + 10.0 * np.exp((rh - 100.0) / 10.0) \
+        + 0.18 * (21.1 - temp) * (1.0 - np.exp(-0.115 * rh))
+    ko = 0.424 * (1.0 - (rh / 100.0) ** 1.7) + 0.0694 * np.sqrt(wind) * (1.0 - (rh / 100.0) ** 8)
+    k1 = 0.424 * (1.0 - ((100.0 - rh) / 100.0) ** 1.7) \
+        + 0.0694 * np.sqrt(wind) * (1.0 - ((100.0 - rh) / 100.0) ** 8)
+    return {
+        'raining': rain > 0.5,
+        'rf': rf,
+        'rain_term': 42.5 * rf * (1.0 - np.exp(-6.93 / rf)),
+        'ed': ed,
+        'ew': ew,
+        'dry_rate': 10.0 ** (-ko * 0.581 * np.exp(0.0365 * temp)),
+        'wet_rate': 10.0 ** (-k1 * 0.581 * np.exp(0.0365 * temp))
+    }
+
+
+def _ffmc_step(ffmc0, raining, rf, rain_term, ed, ew, dry_rate, wet_rate):
+    """One day of the Fine Fuel Moisture Code given yesterday's value and the day's drivers"""
+    mo = 147.2 * (101.0 - ffmc0) / (59.5 + ffmc0)
+
+    # Rain phase
+    wetting = rain_term * np.exp(-100.0 / (251.0 - mo))
+    wetting = np.where(mo > 150.0, wetting + 0.0015 * (mo - 150.0) ** 2 * np.sqrt(rf), wetting)
+    mo = np.where(raining, np.minimum(mo + wetting, 250.0), mo)
+
+    # Drying / wetting towards the equilibrium moisture contents
+    m = np.where(mo > ed, ed + (mo - ed) * dry_rate,
+                 np.where(mo < ew, ew - (ew - mo) * wet_rate, mo))
+
+    return np.clip(59.5 * (250.0 - m) / (147.2 + m), 0.0, 101.0)
+
+
+def _dmc_drivers(temp, rh, rain, month):
+    """Weather-only DMC terms for every day"""
+    temp = np.maximum(temp, -1.1)
+    return {
+        'raining': rain > 1.5,
+        'rk': 1.894 * (temp + 1.1) * (100.0 - rh) * DMC_DAY_LENGTH[month - 1] * 1e-4,
+        'rw': 0.92 * rain - 1.27
+    }
+
+
+def _dmc_step(dmc0, raining, rk, rw):
+    """One day of the Duff Moisture Code"""
+    wmi = 20.0 + 280.0 / np.exp(0.023 * dmc0)
+    log_dmc0 = np.log(np.maximum(dmc0, 1e-9))
+    b = np.where(dmc0 <= 33.0, 100.0 / (0.5 + 0.3 * dmc0),
+                 np.where(dmc0 <= 65.0, 14.0 - 1.3 * log_dmc0, 6.2 * log_dmc0 - 17.2))
+    wmr = wmi + 1000.0 * rw / (48.77 + b * rw)
+    pr = np.where(raining, 244.72 - 43.43 * np.log(np.maximum(wmr - 20.0, 1e-9)), dmc0)
+
+    return np.maximum(np.maximum(pr, 0.0) + rk, 0.0)
+
+
+def _dc_drivers(temp, rain, month):
+    """Weather-only DC terms for every day"""
+    temp = np.maximum(temp, -2.8)
+    return {
+        'raining': rain > 2.8,
+        'pe': np.maximum((0.36 * (temp + 2.8) + DC_DAY_LENGTH[month - 1]) / 2.0, 0.0),
+        'rw': 0.83 * rain - 1.27
+    }
+
+
+def _dc_step(dc0, raining, pe, rw):
+    """One day of the Drought Code"""
+    smi = 800.0 * np.exp(-dc0 / 400.0)
+    dr0 = np.maximum(dc0 - 400.0 * np.log(np.maximum(1.0 + 3.937 * rw / smi, 1e-9)), 0.0)
+    dr = np.where(raining, dr0, dc0)
+
+    return np.maximum(dr + pe, 0.0)
+
+
+def _recurrence(step, start, drivers, shape):
+    """Run a moisture code forward one day at a time, every series at once.
+
+    drivers holds the precomputed weather terms in the order the step function
+    takes them after yesterday's code.
+    """
+    out = np.empty(shape)
+    previous = np.broadcast_to(np.asarray(start, dtype=np.float64), shape[1:]).copy()
+    columns = list(drivers.values())
+    for day in range(shape[0]):
+        previous = out[day] = step(previous, *(column[day] for column in columns))
+    return out
+
+
+def initial_spread_index(ffmc, wind):
+    """Initial Spread Index from FFMC and wind speed (km/h)"""
+    fm = 147.2 * (101.0 - ffmc) / (59.5 + ffmc)
+    f_wind = np.exp(0.05039 * wind)
+    f_fuel = 91.9 * np.exp(-0.1386 * fm) * (1.0 + fm ** 5.31 / 4.93e7)
+    return 0.208 * f_wind * f_fuel
+
+
+def buildup_index(dmc, dc):
+    """Buildup Index from DMC and DC"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bui = np.where((dmc == 0) & (dc == 0), 0.0, 0.8 * dc * dmc / (dmc + 0.4 * dc))
+        p = np.where(dmc == 0, 0.0, (dmc - bui) / dmc)
+    cc = 0.92 + (0.0114 * dmc) ** 1.7
+    bui_low = np.maximum(dmc - cc * p, 0.0)
+    return np.where(bui < dmc, bui_low, bui)
+
+
+def fire_weather_index(isi, bui):
+    """Fire Weather Index from ISI and BUI"""
+    bb = np.where(bui > 80.0,
+                  0.1 * isi * (1000.0 / (25.0 + 108.64 / np.exp(0.023 * bui))),
+                  0.1 * isi * (0.626 * bui ** 0.809 + 2.0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scaled = np.exp(2.72 * (0.434 * np.log(np.maximum(bb, 1e-12))) ** 0.647)
+    return np.where(bb <= 1.0, bb, scaled)
+
+
+def fwi_system(temp, rh, wind, rain, month, ffmc0=FFMC_START, dmc0=DMC_START, dc0=DC_START):
+    """Compute all six FWI System components for (days,) or (days, series) arrays.
+
+    The start-up codes (scalars or one value per series) apply to the day before
+    the first row. Returns a dict of arrays shaped like temp: ffmc, dmc, dc,
+    isi, bui and fwi.
+    """
+    temp = np.asarray(temp, dtype=np.float64)
+    squeeze = temp.ndim == 1
+    temp = np.atleast_1d(temp).reshape(len(temp), -1)
+    shape = temp.shape
+
+    def as_2d(values):
+        return np.broadcast_to(np.asarray(values, dtype=np.float64).reshape(shape[0], -1), shape)
+
+    rh = np.clip(as_2d(rh), 0.0, 100.0)
+    wind = np.maximum(as_2d(wind), 0.0)
+    rain = np.maximum(as_2d(rain), 0.0)
+    month = np.broadcast_to(np.asarray(month, dtype=np.int64).reshape(shape[0], -1), shape)
+
+    # Everything that depends only on the weather is computed for all days up
+    # front; only the day-to-day moisture carry-over remains sequential, and
+    # each step of it updates every series at once
+    ffmc = _recurrence(_ffmc_step, ffmc0, _ffmc_drivers(temp, rh, wind, rain), shape)
+    dmc = _recurrence(_dmc_step, dmc0, _dmc_drivers(temp, rh, rain, month), shape)
+    dc = _recurrence(_dc_step, dc0, _dc_drivers(temp, rain, month), shape)
+
+    # The remaining indices have no memory and are computed in one pass
+    isi = initial_spread_index(ffmc, wind)
+    bui = buildup_index(dmc, dc)
+    fwi = fire_weather_index(isi, bui)
+
+    codes = {'ffmc': ffmc, 'dmc': dmc, 'dc': dc, 'isi': isi, 'bui': bui, 'fwi': fwi}
+    if squeeze:
+        codes = {name: values[:, 0] for name, values in codes.items()}
+    return codes
+
+
+def fwi_from_era5(df):
+    """FWI System columns for an ERA5 daily DataFrame as written by the collector.
+
+    Uses daily maximum temperature (°C), relative humidity (%), wind speed
+    (m/s, converted to km/h) and total precipitation (m, converted to mm).
+    """
+    dates = pd.to_datetime(df['date'])
+    return fwi_system(
+        df['maximum_2m_air_temperature'].to_numpy(),
+        df['relative_humidity'].to_numpy(),
+        df['wind_speed'].to_numpy() * 3.6,
+        df['total_precipitation'].to_numpy() * 1000,
+        dates.dt.month.to_numpy()
+    )
+
+
+def fwi_from_era5_batch(frames):
+    """FWI System columns for several ERA5 DataFrames (e.g. one per fire) in one pass.
+
+    Series are aligned on their first row and stacked as columns of a single
+    2-D array; shorter series are padded at the end and trimmed afterwards, so
+    each gets the same result as fwi_from_era5. Returns {name: codes dict}.
+    """
+    names = list(frames)
+    days = max(len(frames[name]) for name in names)
+    temp = np.zeros((days, len(names)))
+    rh = np.full((days, len(names)), 100.0)
+    wind = np.zeros((days, len(names)))
+    rain = np.zeros((days, len(names)))
+    month = np.ones((days, len(names)), dtype=np.int64)
+
+    for column, name in enumerate(names):
+        df = frames[name]
+        n = len(df)
+        temp[:n, column] = df['maximum_2m_air_temperature'].to_numpy()
+        rh[:n, column] = df['relative_humidity'].to_numpy()
+        wind[:n, column] = df['wind_speed'].to_numpy() * 3.6
+        rain[:n, column] = df['total_precipitation'].to_numpy() * 1000
+        month[:n, column] = pd.to_datetime(df['date']).dt.month.to_numpy()
+
+    codes = fwi_system(temp, rh, wind, rain, month)
+    return {name: {code: values[:len(frames[name]), column] for code, values in codes.items()}
+            for column, name in enumerate(names)}
+
+
+def _row_loop_ffmc(df):
+    """The collector's original per-row pandas FFMC loop, kept for benchmarking"""
+    def calculate_ffmc(temp, rh, wind, rain, prev_ffmc=85):
+        mo = 147.2 * (101 - prev_ffmc) / (59.5 + prev_ffmc)
+        if rain > 0.5:
+            mo = mo + 42.5 * rain * np.exp(-100 / (251 - mo)) * (1 - np.exp(-6.93 / rain))
+        ed = 0.942 * (rh**0.679) + 11 * np.exp((rh - 100) / 10) + 0.18 * (21.1 - temp) * (1 - np.exp(-0.115 * rh))
+        ew = 0.618 * (rh**0.753) + 10 * np.exp((rh - 100) / 10) + 0.18 * (21.1 - temp) * (1 - np.exp(-0.115 * rh))
+        if mo > ed:
+            ko = 0.424 * (1 - ((100 - rh) / 100)**1.7) + 0.0694 * wind**0.5 * (1 - ((100 - rh) / 100)**8)
+            mo = ed + (mo - ed) * 10**(-ko * 0.581 * np.exp(0.0365 * temp))
+        else:
+            ko = 0.424 * (1 - (rh / 100)**1.7) + 0.0694 * wind**0.5 * (1 - (rh / 100)**8)
+            mo = ew - (ew - mo) * 10**(-ko * 0.581 * np.exp(0.0365 * temp))
+        return max(0, min(101, 59.5 * (250 - mo) / (147.2 + mo)))
+
+    df = df.copy()
+    df['ffmc'] = 85.0
+    for i in range(1, len(df)):
+        df.loc[i, 'ffmc'] = calculate_ffmc(
+            df.loc[i, 'maximum_2m_air_temperature'],
+            df.loc[i, 'relative_humidity'],
+            df.loc[i, 'wind_speed'],
+            df.loc[i, 'total_precipitation'] * 1000,
+            df.loc[i - 1, 'ffmc']
+        )
+    return df
+
+
+def benchmark(days=3650, series=100, seed=0):
+    """Time the original row loop against the array kernel on synthetic weather"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2010-01-01', periods=days, freq='D')
+    weather = {
+        'maximum_2m_air_temperature': rng.uniform(-5, 38, (days, series)),
+        'relative_humidity': rng.uniform(10, 100, (days, series)),
+        'wind_speed': rng.uniform(0, 12, (days, series)),
+        'total_precipitation': rng.exponential(0.002, (days, series)) * (rng.random((days, series)) < 0.3)
+    }
+    single = pd.DataFrame({'date': dates, **{name: values[:, 0] for name, values in weather.items()}})
+
+    print(f"⏱️  FWI benchmark: {days} days × {series} series")
+
+    started = time.perf_counter()
+    _row_loop_ffmc(single)
+    row_loop = time.perf_counter() - started
+    print(f"   Row loop (FFMC only, 1 series):     {row_loop:8.3f}s")
+
+    started = time.perf_counter()
+    fwi_from_era5(single)
+    kernel_single = time.perf_counter() - started
+    print(f"   Array kernel (full FWI, 1 series):  {kernel_single:8.3f}s  ({row_loop / kernel_single:.0f}x)")
+
+    started = time.perf_counter()
+    fwi_system(weather['maximum_2m_air_temperature'], weather['relative_humidity'],
+               weather['wind_speed'] * 3.6, weather['total_precipitation'] * 1000, dates.month.to_numpy()[:, None])
+    kernel_all = time.perf_counter() - started
+    print(f"   Array kernel (full FWI, {series} series): {kernel_all:8.3f}s  "
+          f"({row_loop * series / kernel_all:.0f}x vs. {series} row loops)")
+
+    return {'row_loop_seconds': row_loop, 'kernel_single_seconds': kernel_single, 'kernel_all_seconds': kernel_all}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Canadian FWI System kernel")
+    parser.add_argument('--benchmark', action='store_true', help="Compare against the original row loop")
+    parser.add_argument('--days', type=int, default=3650)
+    parser.add_argument('--series', type=int, default=100)
+    args = parser.parse_args()
+    if args.benchmark:
+        benchmark(args.days, args.series)
+    else:
+        parser.print_help()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Concurrent FIRMS active fire downloader
+
+The FIRMS area API serves at most 10 days per request:
+  <base>/api/area/csv/<MAP_KEY>/<product>/<west,south,east,north>/<days>/<YYYY-MM-DD>
+
+A collection window is split into 10-day chunks and every (product, chunk)
+request runs on a bounded thread pool sharing one pooled HTTP session.
+Transient failures (429/5xx, connection errors) are retried with exponential
+backoff; FIRMS also answers some errors with HTTP 200 and an HTML page or a
+plain-text message, so every payload is validated as CSV before it is used.
+
+Environment Variables:
+  FIRMS_MAP_KEY="your_firms_api_key"
+  FIRMS_API_URL="http://127.0.0.1:8765"   # optional, e.g. the local stand-in below
+
+Usage:
+  client = FirmsClient(map_key)
+  frames = client.fetch_many([(product, start, end, bbox), ...])
+
+  # Local stand-in server for offline runs and load tests
+  python firms.py --serve detections.csv --port 8765 --failure-rate 0.2 --latency 0.5
+"""
+
+import io
+import time
+import random
+import argparse
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+FIRMS_API_URL = 'https://firms.modaps.eosdis.nasa.gov'
+FIRMS_PRODUCTS = ('MODIS_NRT', 'VIIRS_SNPP_NRT', 'VIIRS_NOAA20_NRT')
+MAX_DAYS_PER_REQUEST = 10
+REQUIRED_COLUMNS = ('latitude', 'longitude', 'acq_date')
+
+
+class FirmsError(Exception):
+    """FIRMS returned something other than a detections CSV"""
+
+
+def date_chunks(start, end, max_days=MAX_DAYS_PER_REQUEST):
+    """Split [start, end) into (first_day, day_count) pieces the API accepts"""
+    day = datetime.strptime(start, '%Y-%m-%d')
+    stop = datetime.strptime(end, '%Y-%m-%d')
+    chunks = []
+    while day < stop:
+        days = min(max_days, (stop - day).days)
+        chunks.append((day.strftime('%Y-%m-%d'), days))
+        day += timedelta(days=days)
+    return chunks
+
+
+def parse_payload(text):
+    """Validate a FIRMS response body and parse it into a DataFrame.
+
+    An empty body or a header-only CSV means no detections. HTML error pages
+    and text messages such as "Invalid MAP_KEY" raise FirmsError.
+    """
+    body = text.strip()
+    if not body:
+        return pd.DataFrame(columns=list(REQUIRED_COLUMNS))
+    if body[:1] == '<':
+        raise FirmsError('received an HTML page instead of CSV')
+
+    header = body.split('\n', 1)[0].lower()
+    missing = [c for c in REQUIRED_COLUMNS if c not in header.split(',')]
+    if missing:
+        raise FirmsError(f'unexpected response: {body[:120]!r}')
+    return pd.read_csv(io.StringIO(body))
+
+
+def detections_to_geodataframe(df):
+    """Point GeoDataFrame built in one vectorized call"""
+    return gpd.GeoDataFrame(
+        df,
+        geometry=gpd.points_from_xy(df['longitude'], df['latitude']),
+        crs='EPSG:4326'
+    )
+
+
+class FirmsClient:
+    def __init__(self, map_key, base_url=None, max_workers=8, retries=4, backoff=1.0, timeout=60):
+        self.map_key = map_key
+        self.base_url = (base_url or FIRMS_API_URL).rstrip('/')
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+        # One keep-alive pool sized for the worker count; urllib3 retries
+        # transport errors and retryable status codes with backoff
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=max_workers,
+            pool_maxsize=max_workers,
+            max_retries=Retry(
+                total=retries,
+                backoff_factor=backoff,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=('GET',),
+                respect_retry_after_header=True
+            )
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _url(self, product, bbox, first_day, days):
+        area = ','.join(str(v) for v in bbox)
+        return f'{self.base_url}/api/area/csv/{self.map_key}/{product}/{area}/{days}/{first_day}'
+
+    def fetch_chunk(self, product, bbox, first_day, days):
+        """One API request; payload errors are retried on top of the HTTP retries"""
+        url = self._url(product, bbox, first_day, days)
+        for attempt in range(self.retries + 1):
+            response = self.session.get(url, timeout=self.timeout)
+            response.raise_for_status()
+            try:
+                return parse_payload(response.text)
+            except FirmsError:
+                if attempt == self.retries:
+                    raise
+                time.sleep(self.backoff * 2 ** attempt)
+
+    def fetch_many(self, requests_):
+        """Fetch [(product, start, end, bbox), ...] concurrently.
+
+        Returns {product: DataFrame} with the chunks of each product
+        concatenated. A failed chunk fails its product only: the product maps
+        to the exception instead of a DataFrame.
+        """
+        jobs = []
+        for product, start, end, bbox in requests_:
+            for first_day, days in date_chunks(start, end):
+                jobs.append((product, bbox, first_day, days))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [(job[0], executor.submit(self.fetch_chunk, *job)) for job in jobs]
+
+        frames = {product: [] for product, *_ in requests_}
+        results = {}
+        for product, future in futures:
+            try:
+                frames[product].append(future.result())
+            except Exception as e:
+                results.setdefault(product, e)
+
+        for product, product_frames in frames.items():
+            if product in results:
+                continue
+            non_empty = [f for f in product_frames if len(f)]
+            results[product] = (pd.concat(non_empty, ignore_index=True) if non_empty
+                                else pd.DataFrame(columns=list(REQUIRED_COLUMNS)))
+        return results
+
+    def close(self):
+        self.session.close()
+
+
+def serve_stand_in(detections_csv, host='127.0.0.1', port=8765, latency=0.0, failure_rate=0.0, seed=0):
+    """Serve the FIRMS area API from a local CSV, with optional latency and faults.
+
+    Requests are answered with the rows inside the bbox and date window. A
+    failure_rate fraction of requests get either a 503 or an HTTP 200 HTML
+    error page, exercising both the HTTP and the payload retry paths.
+    """
+    detections = pd.read_csv(detections_csv)
+    dates = pd.to_datetime(detections['acq_date']).to_numpy()
+    rng = random.Random(seed)
+    rng_lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, body, content_type):
+            payload = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            parts = unquote(self.path).strip('/').split('/')
+            if len(parts) != 8 or parts[:3] != ['api', 'area', 'csv']:
+                return self._send(404, 'Not found', 'text/plain')
+            _, _, _, _, _, area, days, first_day = parts
+
+            if latency:
+                time.sleep(latency)
+            with rng_lock:
+                fail = rng.random() < failure_rate
+                as_html = rng.random() < 0.5
+            if fail:
+                if as_html:
+                    return self._send(200, '<!DOCTYPE html><html><body>Service busy</body></html>', 'text/html')
+                return self._send(503, 'Service unavailable', 'text/plain')
+
+            west, south, east, north = (float(v) for v in area.split(','))
+            start = np.datetime64(first_day)
+            end = start + np.timedelta64(int(days), 'D')
+            mask = ((detections['longitude'].to_numpy() >= west) & (detections['longitude'].to_numpy() <= east) &
+                    (detections['latitude'].to_numpy() >= south) & (detections['latitude'].to_numpy() <= north) &
+                    (dates >= start) & (dates < end))
+            self._send(200, detections[mask].to_csv(index=False), 'text/csv')
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    print(f"🔥 FIRMS stand-in serving {len(detections)} detections on http://{host}:{server.server_port}")
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Local FIRMS area API stand-in')
+    parser.add_argument('--serve', metavar='CSV', required=True, help='Detections CSV to serve')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds to sleep per request')
+    parser.add_argument('--failure-rate', type=float, default=0.0,
+                        help='Fraction of requests answered with a 503 or an HTML error page')
+    args = parser.parse_args(argv)
+
+    server = serve_stand_in(args.serve, args.host, args.port, args.latency, args.failure_rate)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,17 +1,18 @@
 import ee
-import json
-from datetime import datetime
+from datetime import date, timedelta
 
-# ── Authenticate & initialize ────────────────────────────────────────────────
-service_account = 'earthengine-access@gen-lang-client-0853931727.iam.gserviceaccount.com'
-key_file        = './credentials.json'
-credentials     = ee.ServiceAccountCredentials(service_account, key_file)
-ee.Initialize(credentials)
+from tile_catalog import TileCatalog
+from tile_generator import initialize
+
+# ── Authenticate & initialize (EE_BACKEND=replay runs offline) ───────────────
+initialize()
 
 # ── Region & date range ──────────────────────────────────────────────────────
 region     = ee.Geometry.Rectangle([34.8, 32.6, 35.2, 33.0])
-start_date = ee.Date('2010-11-25')
-end_date   = ee.Date('2010-12-10').advance(1, 'day')  # include Dec 10
+start_date = date(2010, 11, 25)
+end_date   = date(2010, 12, 10)  # inclusive
+fire_start, fire_end = '2010-12-02', '2010-12-06'
+max_workers = 8
 
 # ── Visualization parameters for MODIS true-color ─────────────────────────────
 vis_params = {
@@ -24,63 +25,54 @@ vis_params = {
 # ── Load the MODIS Surface Reflectance collection ──────────────────────────────
 modis = (
     ee.ImageCollection('MODIS/006/MOD09GA')
-      .filterDate(start_date, end_date)
+      .filterDate(start_date.isoformat(), (end_date + timedelta(days=1)).isoformat())
       .filterBounds(region)
 )
 
-# ── Compute how many days in the range ────────────────────────────────────────
-num_days = end_date.difference(start_date, 'day').getInfo()
-
-tiles = []
+# ── Days of the window, computed locally ──────────────────────────────────────
+days = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
 
-for i in range(num_days):
-    day_start = start_date.advance(i, 'day')
-    day_end   = day_start.advance(1, 'day')
-    date_str  = day_start.format('YYYY-MM-dd').getInfo()
+def daily_scenes(day):
+    return modis.filterDate(day.isoformat(), (day + timedelta(days=1)).isoformat())
 
-    # ─ Check for any scenes that day
-    daily = modis.filterDate(day_start, day_end)
-    count = daily.size().getInfo()
-    if count == 0:
-        print(f"{date_str}: no MODIS scenes, skipping.")
-        tiles.append({
-            'index':   i,
-            'date':    date_str,
-            'tileUrl': None
-        })
-        continue
+def daily_composite(day):
+    return daily_scenes(day).median().divide(10000)
 
-    # ─ Build the daily median composite & scale reflectance to 0–1
-    comp = daily.median().divide(10000)
+def probe(day):
+    # A day without scenes has a 0-band median, so only ask for band names when there are scenes
+    count = daily_scenes(day).size()
+    return ee.Dictionary({
+        'count': count,
+        'bands': ee.Algorithms.If(count.gt(0), daily_scenes(day).median().bandNames(), ee.List([]))
+    })
 
-    # ─ True-color RGB visualization
-    vis_img = comp.visualize(**vis_params)
-    base_id = ee.data.getMapId({'image': vis_img})
+# ─ Scene count and band names of every day in one round trip
+probes = ee.List([probe(day) for day in days]).getInfo()
 
-    tile = {
-        'index':   i,
-        'date':    date_str,
-        'tileUrl': base_id['tile_fetcher'].url_format
-    }
-
-    # ─ Fire overlay for Dec 2–6, 2010 (if bands exist)
-    if '2010-12-02' <= date_str <= '2010-12-06':
-        try:
-            bands = comp.bandNames().getInfo()
-            if 'sur_refl_b02' in bands and 'sur_refl_b07' in bands:
-                nbr      = comp.normalizedDifference(['sur_refl_b02', 'sur_refl_b07'])
-                fire_vis = nbr.lt(0.1).selfMask().visualize(palette=['red'])
-                fire_id  = ee.data.getMapId({'image': fire_vis})
-                tile['fireUrl'] = fire_id['tile_fetcher'].url_format
-            else:
-                print(f"{date_str}: missing sur_refl_b02/sur_refl_b07, skipping fire overlay.")
-        except Exception as e:
-            print(f"{date_str}: error computing fire overlay:", e)
+# ─ Map IDs only for days with imagery (and fire overlays where the bands exist)
+catalog = TileCatalog(tiles=[{'index': i, 'date': day.isoformat(), 'tileUrl': None} for i, day in enumerate(days)])
+jobs = {}
+for i, (day, probe) in enumerate(zip(days, probes)):
+    date_str = day.isoformat()
+    if probe['count'] == 0:
+        print(f"{date_str}: no MODIS scenes, skipping.")
+        continue
+    comp = daily_composite(day)
+    jobs[(i, 'tileUrl')] = comp.visualize(**vis_params)
+    if fire_start <= date_str <= fire_end:
+        if 'sur_refl_b02' in probe['bands'] and 'sur_refl_b07' in probe['bands']:
+            nbr = comp.normalizedDifference(['sur_refl_b02', 'sur_refl_b07'])
+            jobs[(i, 'fireUrl')] = nbr.lt(0.1).selfMask().visualize(palette=['red'])
+        else:
+            print(f"{date_str}: missing sur_refl_b02/sur_refl_b07, skipping fire overlay.")
 
-    tiles.append(tile)
+for (i, key), url in catalog.mint_many(jobs, max_workers).items():
+    if isinstance(url, Exception):
+        if key == 'tileUrl':
+            raise url
+        print(f"{days[i].isoformat()}: error computing fire overlay:", url)
 
 # ── Write out for testing ──────────────────────────────────────────────────────
-with open('./data/eaton-fire_tiles.json', 'w') as f:
-    json.dump(tiles, f, indent=2)
+catalog.save('./data/eaton-fire_tiles.json')
 
-print(f"Saved {len(tiles)} daily MODIS tiles (true-color + fire) to data/eaton-fire_tiles.json")
+print(f"Saved {len(catalog.tiles)} daily MODIS tiles (true-color + fire) to data/eaton-fire_tiles.json")
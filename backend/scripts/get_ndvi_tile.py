@@ -1,27 +1,172 @@
+"""
+MODIS NDVI mean tile URL for a date range
+
+One-shot (prints one JSON result and exits):
+  python get_ndvi_tile.py 2020-01-01 2020-06-30
+  -> {"tileUrl": "https://earthengine.googleapis.com/..."}
+
+Warm worker, initialized once and kept running, so requests skip Python
+startup, the ee import and authentication:
+  python get_ndvi_tile.py --serve --port 8092     GET /?start=2020-01-01&end=2020-06-30
+  python get_ndvi_tile.py --stdio                 JSON lines: {"id": 1, "start": ..., "end": ...}
+                                                  -> {"id": 1, "tileUrl": ...} or {"id": 1, "error": ...}
+
+The worker memoizes each (start, end) URL while its map ID is younger than
+tile_catalog.MAX_AGE, and concurrent requests for the same range share one
+getMapId call.
+"""
 import ee
 import sys
 import json
+import argparse
+import threading
+from datetime import datetime, timezone
+from urllib.parse import urlparse, parse_qs
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import ee_replay
+from tile_catalog import MAX_AGE
+
+VIS_PARAMS = {"min": 0, "max": 9000, "palette": ["white", "green"]}
+
+
+def initialize():
+    # stdout carries the JSON result, so keep the backend banner off it
+    if not ee_replay.install_from_env(verbose=False):
+        ee.Initialize(project='gen-lang-client-0853931727')  # Use your project ID
 
-ee.Initialize(project='gen-lang-client-0853931727')  # Use your project ID
 
-region = ee.Geometry.Rectangle([-119.3, 36.0, -118.5, 36.5])
 # Define the region of interest (ROI) for NDVI calculation
 def get_ndvi_tile(start, end):
+    region = ee.Geometry.Rectangle([-119.3, 36.0, -118.5, 36.5])
     image = ee.ImageCollection("MODIS/006/MOD13Q1") \
         .filterDate(start, end) \
         .filterBounds(region) \
         .select("NDVI") \
         .mean()
 
-    vis_params = {"min": 0, "max": 9000, "palette": ["white", "green"]}
-    map_id = image.getMapId(vis_params)
+    map_id = image.getMapId(VIS_PARAMS)
     return map_id["tile_fetcher"].url_format
 
-start = sys.argv[1]
-end = sys.argv[2]
 
-try:
-    tile_url = get_ndvi_tile(start, end)
-    print(json.dumps({"tileUrl": tile_url}))
-except Exception as e:
-    print(json.dumps({"error": str(e)}))
+class NdviTileService:
+    """Memoized, single-flight get_ndvi_tile for a long-lived worker"""
+
+    def __init__(self, max_age=MAX_AGE, mint=get_ndvi_tile):
+        self.max_age = max_age
+        self.mint = mint
+        self._urls = {}        # (start, end) -> (url, minted_at)
+        self._in_flight = {}   # (start, end) -> Future shared by concurrent callers
+        self._lock = threading.Lock()
+
+    def tile_url(self, start, end):
+        key = (start, end)
+        with self._lock:
+            cached = self._urls.get(key)
+            if cached and datetime.now(timezone.utc) - cached[1] < self.max_age:
+                return cached[0]
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_flight[key] = Future()
+        if not owner:
+            return future.result()
+
+        try:
+            url = self.mint(start, end)
+            with self._lock:
+                self._urls[key] = (url, datetime.now(timezone.utc))
+            future.set_result(url)
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+        return future.result()
+
+    def handle(self, request):
+        """JSON-able response for a {"start", "end"[, "id"]} request"""
+        response = {"id": request["id"]} if "id" in request else {}
+        try:
+            response["tileUrl"] = self.tile_url(request["start"], request["end"])
+        except Exception as e:
+            response["error"] = str(e)
+        return response
+
+
+def serve(service, host='127.0.0.1', port=8092):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query)
+            if 'start' not in query or 'end' not in query:
+                response, status = {"error": "start and end query parameters are required"}, 400
+            else:
+                response = service.handle({"start": query['start'][0], "end": query['end'][0]})
+                status = 500 if "error" in response else 200
+            body = json.dumps(response).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    print(f"🌿 NDVI tile worker on http://{host}:{server.server_port}/?start=YYYY-MM-DD&end=YYYY-MM-DD",
+          file=sys.stderr)
+    return server
+
+
+def serve_stdio(service, max_workers=8):
+    """Answer JSON-lines requests from stdin on stdout; responses may arrive out of order (match on id)"""
+    output_lock = threading.Lock()
+
+    def answer(line):
+        try:
+            response = service.handle(json.loads(line))
+        except (ValueError, KeyError, TypeError) as e:
+            response = {"error": f"bad request: {e}"}
+        with output_lock:
+            sys.stdout.write(json.dumps(response) + '\n')
+            sys.stdout.flush()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for line in sys.stdin:
+            if line.strip():
+                executor.submit(answer, line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='MODIS NDVI mean tile URL for a date range')
+    parser.add_argument('start', nargs='?')
+    parser.add_argument('end', nargs='?')
+    parser.add_argument('--serve', action='store_true', help='Run as a local HTTP worker')
+    parser.add_argument('--stdio', action='store_true', help='Run as a JSON-lines worker on stdin/stdout')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8092)
+    args = parser.parse_args(argv)
+
+    initialize()
+    if args.serve:
+        server = serve(NdviTileService(), args.host, args.port)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.shutdown()
+    elif args.stdio:
+        serve_stdio(NdviTileService())
+    else:
+        if not (args.start and args.end):
+            parser.error('start and end are required without --serve or --stdio')
+        try:
+            tile_url = get_ndvi_tile(args.start, args.end)
+            print(json.dumps({"tileUrl": tile_url}))
+        except Exception as e:
+            print(json.dumps({"error": str(e)}))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Ignition point candidates from the earliest active fire detections
+
+FIRMS detections and MOD14A1 fire pixels (labelled with their first fire day
+by the collector) are loaded into one DetectionIndex. For each fire, the
+detections nearest in time to start_date inside the fire's search radius
+are pulled with an indexed radius/time query, widening the time window only
+when nothing is found. Detections within the first hours of activity are
+clustered, and each cluster becomes a candidate scored by how early it
+appeared and how much (confidence-weighted) evidence supports it. Scores are
+normalised into a confidence that sums to 1 over the returned candidates.
+
+Because every fire is a couple of index lookups, a catalog of hundreds of
+fires is ranked in one pass over a shared index.
+
+Usage:
+  candidates = rank_ignition_candidates(index, fire_config)
+  python ignition.py wildfire_data              # every fire with a simulation_config.json
+  python ignition.py wildfire_data --update     # also write them into simulation_config.json
+"""
+
+import json
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import shapely
+
+from detection_index import (DetectionIndex, EARTH_RADIUS_KM, haversine_km, neighbor_pairs,
+                             connected_components)
+from fire_store import FireStore
+
+FIRE_DAY_PROPERTY = 'fire_day'
+FIRE_DAY_EPOCH = np.datetime64('1970-01-01', 's')
+
+# Detection weights: FIRMS confidence classes / MOD14A1 (daily, 1 km, no time of day)
+VIIRS_CONFIDENCE = {'l': 0.3, 'low': 0.3, 'n': 0.6, 'nominal': 0.6, 'h': 0.9, 'high': 0.9}
+DEFAULT_WEIGHT = 0.6
+MIN_WEIGHT = 0.05
+MOD14A1_WEIGHT = 0.4
+MOD14A1_HOUR = 12  # daily product: detections are placed at midday UTC
+
+SEARCH_WINDOWS_DAYS = (2, 7, 14)   # days after start_date, tried in order
+EARLY_WINDOW_HOURS = 24            # detections this soon after the first one are candidates
+EARLINESS_HOURS = 12               # score decay for candidates appearing later
+LINK_KM = 2.0
+
+
+def firms_detections(frame):
+    """FIRMS rows -> longitude, latitude, acq_date (timestamp), source, weight"""
+    if len(frame) == 0:
+        return pd.DataFrame(columns=['longitude', 'latitude', 'acq_date', 'source', 'weight'])
+
+    dates = pd.to_datetime(frame['acq_date'] if 'acq_date' in frame.columns else frame['date'])
+    if 'acq_time' in frame.columns:
+        hhmm = frame['acq_time'].fillna(0).astype(int)
+        dates = dates + pd.to_timedelta((hhmm // 100) * 60 + hhmm % 100, unit='m')
+
+    weight = np.full(len(frame), DEFAULT_WEIGHT)
+    if 'confidence' in frame.columns:
+        confidence = frame['confidence'].astype(str).str.lower()
+        numeric = pd.to_numeric(confidence, errors='coerce').to_numpy() / 100  # MODIS: 0-100
+        classes = confidence.map(VIIRS_CONFIDENCE).to_numpy(dtype=float)        # VIIRS: l/n/h
+        weight = np.where(np.isnan(numeric), np.where(np.isnan(classes), DEFAULT_WEIGHT, classes), numeric)
+
+    weight = np.clip(weight, MIN_WEIGHT, 1.0)  # even 0% confidence detections locate something
+
+    source = ('FIRMS ' + frame['product'].astype(str)) if 'product' in frame.columns else 'FIRMS'
+    return pd.DataFrame({
+        'longitude': frame['longitude'].to_numpy(dtype=float),
+        'latitude': frame['latitude'].to_numpy(dtype=float),
+        'acq_date': dates.to_numpy(),
+        'source': source,
+        'weight': weight
+    })
+
+
+def mod14a1_fire_features(feature_collection):
+    """MOD14A1 features that mark fire: labelled with fire_day, or a legacy label other than 0 (background)"""
+    features = []
+    for feature in (feature_collection or {}).get('features', []):
+        properties = feature.get('properties') or {}
+        if properties.get(FIRE_DAY_PROPERTY) is not None or properties.get('label', 0) != 0:
+            features.append(feature)
+    return features
+
+
+def mod14a1_detections(feature_collection):
+    """MOD14A1 fire polygons labelled with fire_day -> one centroid row per polygon"""
+    features = [f for f in (feature_collection or {}).get('features', [])
+                if f.get('properties', {}).get(FIRE_DAY_PROPERTY) is not None]
+    if not features:
+        return pd.DataFrame(columns=['longitude', 'latitude', 'acq_date', 'source', 'weight'])
+
+    geometries = shapely.from_geojson([json.dumps(f['geometry']) for f in features], on_invalid='ignore')
+    centroids = shapely.centroid(geometries)
+    days = np.array([f['properties'][FIRE_DAY_PROPERTY] for f in features], dtype=np.int64)
+    return pd.DataFrame({
+        'longitude': shapely.get_x(centroids),
+        'latitude': shapely.get_y(centroids),
+        'acq_date': FIRE_DAY_EPOCH + (days * 86400 + MOD14A1_HOUR * 3600).astype('timedelta64[s]'),
+        'source': 'MOD14A1',
+        'weight': MOD14A1_WEIGHT
+    }).dropna(subset=['longitude', 'latitude'])
+
+
+def _search_radius_km(fire):
+    west, south, east, north = fire['bbox']
+    return float(haversine_km(west, south, east, north)) / 2
+
+
+def fallback_candidates(fire):
+    """The fire's bbox centre as the only candidate (confidence 0)"""
+    lon, lat = fire['center']
+    return [{'longitude': lon, 'latitude': lat, 'confidence': 0.0, 'method': 'bbox_center'}]
+
+
+def rank_ignition_candidates(index, fire, max_candidates=3, link_km=LINK_KM):
+    """Ranked ignition candidates for one fire from a DetectionIndex.
+
+    Returns [{'longitude', 'latitude', 'confidence', 'first_detection',
+    'detections', 'sources', 'method'}, ...], best first. Falls back to the
+    bbox centre (confidence 0) when no detection is found near start_date.
+    """
+    if len(index) == 0:
+        return fallback_candidates(fire)
+
+    lon, lat = fire['center']
+    radius_km = _search_radius_km(fire)
+    start = pd.Timestamp(fire['start_date'])
+    rows = np.zeros(0, dtype=np.int64)
+    for days_after in SEARCH_WINDOWS_DAYS:
+        rows = index.query_rows(lon, lat, radius_km, start - pd.Timedelta(days=1),
+                                start + pd.Timedelta(days=days_after))
+        if len(rows):
+            break
+    if len(rows) == 0:
+        return fallback_candidates(fire)
+
+    times = index.times[rows]
+    first = times.min()
+    rows = rows[times <= first + np.timedelta64(EARLY_WINDOW_HOURS, 'h')]
+    times = index.times[rows]
+    weights = index.frame['weight'].iloc[rows].to_numpy(dtype=float)
+    sources = index.frame['source'].iloc[rows].to_numpy()
+
+    # Cluster the early detections; a local tangent plane is exact enough at fire scale
+    x = np.radians(index.lon[rows] - lon) * np.cos(np.radians(lat)) * EARTH_RADIUS_KM * 1000
+    y = np.radians(index.lat[rows] - lat) * EARTH_RADIUS_KM * 1000
+    left, right = neighbor_pairs(x, y, np.zeros(len(rows), dtype=np.int64), link_km * 1000)
+    _, cluster = np.unique(connected_components(len(rows), left, right), return_inverse=True)
+
+    # Each cluster is located by its earliest overpass (within an hour of its first detection)
+    order = np.lexsort((times, cluster))
+    starts = np.flatnonzero(np.diff(cluster[order], prepend=-1))
+    cluster_first = times[order][starts]
+    in_first_pass = times <= cluster_first[cluster] + np.timedelta64(1, 'h')
+    located_weight = np.bincount(cluster, weights=weights * in_first_pass)
+    cluster_lon = np.bincount(cluster, weights=index.lon[rows] * weights * in_first_pass) / located_weight
+    cluster_lat = np.bincount(cluster, weights=index.lat[rows] * weights * in_first_pass) / located_weight
+
+    evidence = np.bincount(cluster, weights=weights)
+    delay_hours = (cluster_first - first) / np.timedelta64(1, 'h')
+    score = np.log1p(evidence) * np.exp(-delay_hours / EARLINESS_HOURS)
+    best = np.argsort(-score, kind='stable')[:max_candidates]
+    confidence = score[best] / score[best].sum()
+    detections = np.bincount(cluster)
+
+    return [{
+        'longitude': round(float(cluster_lon[c]), 5),
+        'latitude': round(float(cluster_lat[c]), 5),
+        'confidence': round(float(conf), 3),
+        'first_detection': pd.Timestamp(cluster_first[c]).isoformat(),
+        'detections': int(detections[c]),
+        'sources': sorted(set(sources[cluster == c])),
+        'method': 'earliest_detections'
+    } for c, conf in zip(best, confidence)]
+
+
+def load_fire_detections(base_dir, fire_names=None):
+    """All FIRMS (fire store) and MOD14A1 detections under base_dir as one table"""
+    base_dir = Path(base_dir)
+    frames = [firms_detections(FireStore(base_dir).query('firms', fires=fire_names))]
+    for path in sorted(base_dir.glob('*/fire_detection/modis_fire_detections.geojson')):
+        if fire_names is None or path.parents[1].name in fire_names:
+            with open(path) as f:
+                frames.append(mod14a1_detections(json.load(f)))
+    frames = [f for f in frames if len(f)]
+    if not frames:
+        return pd.DataFrame(columns=['longitude', 'latitude', 'acq_date', 'source', 'weight'])
+    return pd.concat(frames, ignore_index=True)
+
+
+def rank_catalog(base_dir, max_candidates=3):
+    """{fire name: candidates} for every fire with a simulation_config.json, sharing one index"""
+    configs = {}
+    for path in sorted(Path(base_dir).glob('*/simulation_config.json')):
+        with open(path) as f:
+            metadata = json.load(f)['fire_metadata']
+        configs[metadata['name']] = (path, {
+            'name': metadata['name'],
+            'bbox': metadata['location']['bbox'],
+            'center': metadata['location']['center'],
+            'start_date': metadata['temporal_extent']['ignition_date']
+        })
+
+    index = DetectionIndex(load_fire_detections(base_dir))
+    return {name: (path, rank_ignition_candidates(index, fire, max_candidates))
+            for name, (path, fire) in configs.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Rank ignition point candidates for collected fires')
+    parser.add_argument('base_dir', nargs='?', default='wildfire_data')
+    parser.add_argument('--max-candidates', type=int, default=3)
+    parser.add_argument('--update', action='store_true',
+                        help='Write the candidates into each simulation_config.json')
+    args = parser.parse_args(argv)
+
+    for name, (path, candidates) in rank_catalog(args.base_dir, args.max_candidates).items():
+        print(f"🔥 {name}")
+        for rank, c in enumerate(candidates, 1):
+            print(f"  {rank}. ({c['longitude']}, {c['latitude']}) confidence {c['confidence']} [{c['method']}]")
+        if args.update:
+            with open(path) as f:
+                config = json.load(f)
+            config['simulation_parameters']['ignition_points'] = [[c['longitude'], c['latitude']] for c in candidates]
+            config['simulation_parameters']['ignition_candidates'] = candidates
+            with open(path, 'w') as f:
+                json.dump(config, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Co-registered, memory-mappable simulation input stack
+
+The collector's topography and fuel stages reduce SRTM, LANDFIRE and canopy
+layers to regional means on the server; the spread engines need them per
+cell. This module fetches those layers as pixels on the fire's simulation
+grid (UTM, 30 m, see sim_grid.py) and stores them as one memory-mapped .npy
+per band plus an index:
+
+  <fire_dir>/inputs/stack.json       grid, bands (file, dtype, nodata, source,
+                                     resampling) and completed chunks
+  <fire_dir>/inputs/<band>.npy       (height, width) raster on the grid
+
+Earth Engine does the co-registration: every chunk is one computePixels call
+for all bands on the exact grid transform, so bands line up cell for cell
+and no local reprojection is needed. Chunks (chunk_size square) are fetched
+concurrently with retries and written straight into the memory-mapped
+bands, so a million-acre fire never sits in memory. The index records each
+finished chunk; an interrupted build resumes where it stopped.
+
+Consumers open the stack read-only and read windows:
+
+  stack = InputStack('wildfire_data/Camp_Fire_2018/inputs')
+  elevation = stack.read('elevation', (row, col, height, width))
+
+Usage:
+  python input_stack.py wildfire_data/Camp_Fire_2018            # build (needs Earth Engine)
+  python input_stack.py wildfire_data/Camp_Fire_2018 --info     # print the index
+"""
+
+import json
+import time
+import argparse
+from datetime import datetime
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import ee
+import numpy as np
+
+from sim_grid import SimulationGrid
+
+INDEX_FILE = 'stack.json'
+CHUNK_SIZE = 1024  # cells; 7 float32 bands per chunk stay well under computePixels' 48 MB cap
+
+# Bands of the stack: Earth Engine source, resampling (None = nearest) and local storage
+LAYERS = (
+    {'name': 'elevation', 'source': 'USGS/SRTMGL1_003', 'band': 'elevation',
+     'resampling': 'bilinear', 'dtype': 'float32', 'nodata': -32768, 'units': 'm'},
+    {'name': 'fuel_model', 'source': 'LANDFIRE/Fire/FBFM40/v1', 'band': 0,
+     'resampling': None, 'dtype': 'int16', 'nodata': -1, 'units': 'FBFM40 code'},
+    {'name': 'canopy_cover', 'source': 'LANDFIRE/Fire/CC/v1', 'band': 0,
+     'resampling': None, 'dtype': 'int16', 'nodata': -1, 'units': '%'},
+    {'name': 'canopy_height', 'source': 'LANDFIRE/Fire/CH/v1', 'band': 0,
+     'resampling': None, 'dtype': 'int16', 'nodata': -1, 'units': 'm x 10'},
+    {'name': 'canopy_base_height', 'source': 'LANDFIRE/Fire/CBH/v1', 'band': 0,
+     'resampling': None, 'dtype': 'int16', 'nodata': -1, 'units': 'm x 10'},
+    {'name': 'canopy_bulk_density', 'source': 'LANDFIRE/Fire/CBD/v1', 'band': 0,
+     'resampling': None, 'dtype': 'int16', 'nodata': -1, 'units': 'kg/m3 x 100'},
+    {'name': 'tree_cover_2000', 'source': 'UMD/hansen/global_forest_change_2023_v1_11', 'band': 'treecover2000',
+     'resampling': 'bilinear', 'dtype': 'float32', 'nodata': -1, 'units': '%'},
+)
+
+
+def stack_image(layers=LAYERS):
+    """One multi-band ee.Image of the layers, masked pixels set to each band's nodata"""
+    bands = []
+    for layer in layers:
+        image = ee.Image(layer['source']).select([layer['band']], [layer['name']])
+        if layer['resampling']:
+            image = image.resample(layer['resampling'])
+        bands.append(image.unmask(layer['nodata']).toFloat())
+    return ee.Image.cat(bands)
+
+
+def chunk_windows(grid, chunk_size=CHUNK_SIZE):
+    """(row, col, height, width) windows tiling the grid"""
+    return [(row, col, min(chunk_size, grid.height - row), min(chunk_size, grid.width - col))
+            for row in range(0, grid.height, chunk_size)
+            for col in range(0, grid.width, chunk_size)]
+
+
+def fetch_chunk(image, grid, window, band_names):
+    """Pixels of image for one grid window -> {band: (height, width) array}"""
+    row, col, height, width = window
+    pixels = ee.data.computePixels({
+        'expression': image,
+        'fileFormat': 'NUMPY_NDARRAY',
+        'bandIds': list(band_names),
+        'grid': {
+            'dimensions': {'width': width, 'height': height},
+            'affineTransform': {
+                'scaleX': grid.resolution, 'shearX': 0, 'translateX': grid.x_min + col * grid.resolution,
+                'shearY': 0, 'scaleY': -grid.resolution, 'translateY': grid.y_max - row * grid.resolution
+            },
+            'crsCode': grid.crs.to_string()
+        }
+    })
+    return {name: pixels[name] for name in band_names}
+
+
+def _fetch_with_retries(fetch, window, retries, backoff):
+    for attempt in range(retries + 1):
+        try:
+            return fetch(window)
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2 ** attempt)
+
+
+def build_input_stack(stack_dir, grid, layers=LAYERS, chunk_size=CHUNK_SIZE, max_workers=4, retries=3,
+                      backoff=2.0, fetch=None):
+    """Fetch the layers onto grid into stack_dir, resuming an interrupted build; returns an InputStack.
+
+    fetch(window) -> {band: array} replaces the Earth Engine download (for
+    stand-ins and tests).
+    """
+    stack_dir = Path(stack_dir)
+    stack_dir.mkdir(parents=True, exist_ok=True)
+    index_path = stack_dir / INDEX_FILE
+    bands = [{'name': layer['name'], 'file': f"{layer['name']}.npy", 'dtype': layer['dtype'],
+              'nodata': layer['nodata'], 'source': layer['source'], 'resampling': layer['resampling'] or 'nearest',
+              'units': layer['units']} for layer in layers]
+
+    index = None
+    if index_path.exists():
+        with open(index_path) as f:
+            index = json.load(f)
+        if index['grid'] != grid.to_dict() or index['bands'] != bands or index['chunk_size'] != chunk_size:
+            index = None  # a different grid or layer set: start over
+    resume = index is not None and all((stack_dir / band['file']).exists() for band in bands)
+    if not resume:
+        index = {'grid': grid.to_dict(), 'chunk_size': chunk_size, 'bands': bands,
+                 'completed_chunks': [], 'complete': False}
+
+    arrays = {band['name']: np.lib.format.open_memmap(stack_dir / band['file'], mode='r+' if resume else 'w+',
+                                                      dtype=band['dtype'], shape=grid.shape)
+              for band in bands}
+    if not resume:
+        for band in bands:
+            arrays[band['name']][:] = band['nodata']
+
+    done = {tuple(window) for window in index['completed_chunks']}
+    pending = [window for window in chunk_windows(grid, chunk_size) if window not in done]
+    if fetch is None:
+        image = stack_image(layers)
+        names = [layer['name'] for layer in layers]
+        fetch = lambda window: fetch_chunk(image, grid, window, names)
+
+    def save_index():
+        index['updated_at'] = datetime.now().isoformat()
+        temporary = index_path.with_suffix('.tmp')
+        with open(temporary, 'w') as f:
+            json.dump(index, f, indent=2)
+        temporary.replace(index_path)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(_fetch_with_retries, fetch, window, retries, backoff): window
+                   for window in pending}
+        for future in as_completed(futures):
+            row, col, height, width = window = futures[future]
+            for name, values in future.result().items():
+                arrays[name][row:row + height, col:col + width] = values
+            for array in arrays.values():
+                array.flush()  # on disk before the index says so
+            index['completed_chunks'].append(list(window))
+            save_index()
+
+    index['complete'] = True
+    save_index()
+    return InputStack(stack_dir)
+
+
+class InputStack:
+    """Read-only view of a built stack: memory-mapped bands and windowed reads"""
+
+    def __init__(self, stack_dir):
+        self.stack_dir = Path(stack_dir)
+        with open(self.stack_dir / INDEX_FILE) as f:
+            self.index = json.load(f)
+        self.grid = SimulationGrid.from_dict(self.index['grid'])
+        self.bands = {band['name']: band for band in self.index['bands']}
+        self._arrays = {}
+
+    @staticmethod
+    def exists(stack_dir):
+        path = Path(stack_dir) / INDEX_FILE
+        if not path.exists():
+            return False
+        with open(path) as f:
+            return json.load(f).get('complete', False)
+
+    def band(self, name):
+        """Whole band as a read-only memmap (nothing is read until sliced)"""
+        if name not in self._arrays:
+            self._arrays[name] = np.load(self.stack_dir / self.bands[name]['file'], mmap_mode='r')
+        return self._arrays[name]
+
+    def read(self, name, window=None):
+        """Band values for a (row, col, height, width) window (whole band if None), clipped to the grid"""
+        if window is None:
+            return np.array(self.band(name))
+        row, col, height, width = window
+        row0, col0 = max(row, 0), max(col, 0)
+        return np.array(self.band(name)[row0:row + height, col0:col + width])
+
+    def bbox_window(self, bbox):
+        """(row, col, height, width) window covering a [west, south, east, north] lon/lat bbox"""
+        west, south, east, north = bbox
+        rows, cols = self.grid.lonlat_to_rowcol([west, east, east, west], [south, south, north, north])
+        row0, col0 = max(int(rows.min()), 0), max(int(cols.min()), 0)
+        row1, col1 = min(int(rows.max()) + 1, self.grid.height), min(int(cols.max()) + 1, self.grid.width)
+        return row0, col0, max(row1 - row0, 0), max(col1 - col0, 0)
+
+    def read_bbox(self, name, bbox):
+        window = self.bbox_window(bbox)
+        return self.read(name, window), window
+
+    def valid(self, name, values):
+        """Mask of values that are not the band's nodata"""
+        return values != self.bands[name]['nodata']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build or inspect a fire\'s co-registered input stack')
+    parser.add_argument('fire_dir', help='Fire directory containing simulation_config.json')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent chunk downloads')
+    parser.add_argument('--info', action='store_true', help='Print the stack index instead of building')
+    args = parser.parse_args(argv)
+
+    fire_dir = Path(args.fire_dir)
+    stack_dir = fire_dir / 'inputs'
+    if args.info:
+        stack = InputStack(stack_dir)
+        print(f"{stack.grid.height} x {stack.grid.width} cells at {stack.grid.resolution} m in {stack.grid.crs}")
+        for name, band in stack.bands.items():
+            print(f"  {name:22s} {band['dtype']:8s} nodata {band['nodata']:<7} {band['source']}")
+        return
+
+    from data_collection import initialize_earth_engine
+    initialize_earth_engine()
+    grid = SimulationGrid.from_config(fire_dir / 'simulation_config.json')
+    started = time.perf_counter()
+    build_input_stack(stack_dir, grid, chunk_size=args.chunk_size, max_workers=args.workers)
+    print(f"✓ Input stack {grid.height} x {grid.width} written to {stack_dir} in {time.perf_counter() - started:.0f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Simulation grid shared by the spread engines, ensemble runner and scorers
+
+A fire's grid covers its bbox at grid_resolution_meters (30 m in
+simulation_config.json) in the UTM zone of the fire centre, north-up, row 0
+at the top. Every raster the simulation reads or writes is on this grid, so
+arrays from different tools line up cell for cell.
+
+Usage:
+  grid = SimulationGrid.from_config(config)
+  rows, cols = grid.lonlat_to_rowcol(lons, lats)
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+from pyproj import CRS, Transformer
+from rasterio.transform import Affine
+
+
+def utm_crs(lon, lat):
+    """WGS84 UTM zone CRS containing (lon, lat)"""
+    zone = int((lon + 180) // 6) + 1
+    return CRS.from_epsg((32600 if lat >= 0 else 32700) + zone)
+
+
+class SimulationGrid:
+    def __init__(self, crs, x_min, y_max, width, height, resolution):
+        self.crs = CRS.from_user_input(crs)
+        self.x_min = float(x_min)
+        self.y_max = float(y_max)
+        self.width = int(width)
+        self.height = int(height)
+        self.resolution = float(resolution)
+        self._to_grid = Transformer.from_crs('EPSG:4326', self.crs, always_xy=True)
+        self._from_grid = Transformer.from_crs(self.crs, 'EPSG:4326', always_xy=True)
+
+    @classmethod
+    def from_bbox(cls, bbox, resolution=30.0):
+        """Grid covering a [west, south, east, north] lon/lat bbox"""
+        west, south, east, north = bbox
+        crs = utm_crs((west + east) / 2, (south + north) / 2)
+        to_grid = Transformer.from_crs('EPSG:4326', crs, always_xy=True)
+        # Project the whole outline, not just the corners: UTM bends lon/lat lines
+        lons = np.concatenate([np.linspace(west, east, 50), np.full(50, east),
+                               np.linspace(east, west, 50), np.full(50, west)])
+        lats = np.concatenate([np.full(50, south), np.linspace(south, north, 50),
+                               np.full(50, north), np.linspace(north, south, 50)])
+        xs, ys = to_grid.transform(lons, lats)
+        x_min = np.floor(np.min(xs) / resolution) * resolution
+        y_max = np.ceil(np.max(ys) / resolution) * resolution
+        width = int(np.ceil((np.max(xs) - x_min) / resolution))
+        height = int(np.ceil((y_max - np.min(ys)) / resolution))
+        return cls(crs, x_min, y_max, width, height, resolution)
+
+    @classmethod
+    def from_config(cls, config):
+        """Grid for a simulation_config.json dict (or path)"""
+        if isinstance(config, (str, Path)):
+            with open(config) as f:
+                config = json.load(f)
+        return cls.from_bbox(config['fire_metadata']['location']['bbox'],
+                             config['simulation_parameters']['grid_resolution_meters'])
+
+    @property
+    def shape(self):
+        return (self.height, self.width)
+
+    @property
+    def cell_area_m2(self):
+        return self.resolution ** 2
+
+    @property
+    def transform(self):
+        """Affine geotransform (rasterio.Affine) of the grid"""
+        return Affine(self.resolution, 0.0, self.x_min, 0.0, -self.resolution, self.y_max)
+
+    @property
+    def bounds(self):
+        """(x_min, y_min, x_max, y_max) in grid CRS metres"""
+        return (self.x_min, self.y_max - self.height * self.resolution,
+                self.x_min + self.width * self.resolution, self.y_max)
+
+    def lonlat_to_xy(self, lons, lats):
+        return self._to_grid.transform(np.asarray(lons, dtype=float), np.asarray(lats, dtype=float))
+
+    def xy_to_rowcol(self, xs, ys):
+        """Cell indices (may fall outside the grid) of grid CRS coordinates"""
+        cols = np.floor((np.asarray(xs) - self.x_min) / self.resolution).astype(np.int64)
+        rows = np.floor((self.y_max - np.asarray(ys)) / self.resolution).astype(np.int64)
+        return rows, cols
+
+    def lonlat_to_rowcol(self, lons, lats):
+        return self.xy_to_rowcol(*self.lonlat_to_xy(lons, lats))
+
+    def rowcol_to_lonlat(self, rows, cols):
+        """Lon/lat of cell centres"""
+        xs = self.x_min + (np.asarray(cols) + 0.5) * self.resolution
+        ys = self.y_max - (np.asarray(rows) + 0.5) * self.resolution
+        return self._from_grid.transform(xs, ys)
+
+    def contains(self, rows, cols):
+        rows, cols = np.asarray(rows), np.asarray(cols)
+        return (rows >= 0) & (rows < self.height) & (cols >= 0) & (cols < self.width)
+
+    def to_dict(self):
+        return {
+            'crs': self.crs.to_string(),
+            'x_min': self.x_min,
+            'y_max': self.y_max,
+            'width': self.width,
+            'height': self.height,
+            'resolution': self.resolution
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['crs'], data['x_min'], data['y_max'], data['width'], data['height'], data['resolution'])
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Local terrain derivatives from the SRTM DEM
+
+Instead of computing slope, aspect, hillshade, TWI and TRI on the server and
+collapsing them to one reduceRegion mean/stdDev (which strains maxPixels on
+large fires), only the DEM is fetched (on the simulation grid, through
+input_stack.py) and every derivative is computed here with NumPy 3x3
+stencils, matching the collector's server-side definitions:
+
+  slope      degrees, Horn's method
+  aspect     degrees clockwise from north, direction the slope faces
+  hillshade  0-255, sun azimuth 270°, elevation 45° (ee.Terrain defaults)
+  twi        log((focal_max - dem) / (slope + 0.001)), focal_max over the
+             4-neighbours as in ee focal_max(1)
+  tri        focal_max - focal_min over the same neighbourhood
+
+The grid is processed in blocks with a one-cell halo on a process pool. Each
+worker memory-maps the DEM and the output rasters, so blocks are read and
+written in place, and returns mergeable moments (count, mean, M2, min, max)
+for its block; merging them gives exact whole-raster statistics. Cells whose
+stencil touches DEM nodata are NaN and left out of the statistics.
+
+Output (<fire_dir>/topography/):
+  terrain/<band>.npy          full-resolution rasters on the simulation grid
+  terrain_statistics.json     <band>_mean, _stdDev, _min, _max, _count
+
+Usage:
+  TERRAIN_MODE=local python data_collection.py
+  python terrain.py wildfire_data/Camp_Fire_2018 --workers 8
+"""
+
+import os
+import json
+import time
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from input_stack import InputStack, LAYERS, build_input_stack
+from sim_grid import SimulationGrid
+from tiled_reduce import Moments
+
+BANDS = ('elevation', 'slope', 'aspect', 'hillshade', 'twi', 'tri')
+BLOCK_SIZE = 1024
+HILLSHADE_AZIMUTH = 270.0
+HILLSHADE_ELEVATION = 45.0
+
+
+def derivatives(dem, resolution, nodata=None):
+    """Terrain bands for the interior of a DEM block that carries a one-cell halo"""
+    dem = np.asarray(dem, dtype=np.float64)
+    valid = np.ones(dem.shape, dtype=bool) if nodata is None else dem != nodata
+    # A cell is valid only if its whole 3x3 stencil is
+    interior_valid = np.ones((dem.shape[0] - 2, dem.shape[1] - 2), dtype=bool)
+    for dr in range(3):
+        for dc in range(3):
+            interior_valid &= valid[dr:dr + dem.shape[0] - 2, dc:dc + dem.shape[1] - 2]
+
+    def shifted(dr, dc):
+        return dem[1 + dr:dem.shape[0] - 1 + dr, 1 + dc:dem.shape[1] - 1 + dc]
+
+    center = shifted(0, 0)
+    # Horn: x east, s south (row direction)
+    dz_dx = ((shifted(-1, 1) + 2 * shifted(0, 1) + shifted(1, 1))
+             - (shifted(-1, -1) + 2 * shifted(0, -1) + shifted(1, -1))) / (8 * resolution)
+    dz_ds = ((shifted(1, -1) + 2 * shifted(1, 0) + shifted(1, 1))
+             - (shifted(-1, -1) + 2 * shifted(-1, 0) + shifted(-1, 1))) / (8 * resolution)
+    slope_rad = np.arctan(np.hypot(dz_dx, dz_ds))
+    aspect_rad = np.mod(np.arctan2(-dz_dx, dz_ds), 2 * np.pi)
+
+    zenith = np.radians(90 - HILLSHADE_ELEVATION)
+    azimuth = np.radians(HILLSHADE_AZIMUTH)
+    hillshade = 255 * (np.cos(zenith) * np.cos(slope_rad)
+                       + np.sin(zenith) * np.sin(slope_rad) * np.cos(azimuth - aspect_rad))
+
+    neighbours = np.stack([center, shifted(-1, 0), shifted(1, 0), shifted(0, -1), shifted(0, 1)])
+    focal_max, focal_min = neighbours.max(axis=0), neighbours.min(axis=0)
+    slope = np.degrees(slope_rad)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        twi = np.log((focal_max - center) / (slope + 0.001))
+
+    bands = {
+        'elevation': center,
+        'slope': slope,
+        'aspect': np.degrees(aspect_rad),
+        'hillshade': np.clip(hillshade, 0, 255),
+        'twi': np.where(np.isfinite(twi), twi, np.nan),  # log(0) on local maxima: no value
+        'tri': focal_max - focal_min
+    }
+    return {name: np.where(interior_valid, values, np.nan).astype(np.float32) for name, values in bands.items()}
+
+
+def _block_windows(shape, block_size):
+    return [(row, col, min(block_size, shape[0] - row), min(block_size, shape[1] - col))
+            for row in range(0, shape[0], block_size) for col in range(0, shape[1], block_size)]
+
+
+def _process_block(dem_path, output_dir, window, resolution, nodata):
+    """Compute one block in place; returns {band: Moments} for it"""
+    dem = np.load(dem_path, mmap_mode='r')
+    row, col, height, width = window
+    # Halo rows/cols, replicating the DEM edge at the grid border
+    rows = np.clip(np.arange(row - 1, row + height + 1), 0, dem.shape[0] - 1)
+    cols = np.clip(np.arange(col - 1, col + width + 1), 0, dem.shape[1] - 1)
+    block = dem[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1][rows - rows[0]][:, cols - cols[0]]
+
+    moments = {}
+    for name, values in derivatives(block, resolution, nodata).items():
+        output = np.load(Path(output_dir) / f'{name}.npy', mmap_mode='r+')
+        output[row:row + height, col:col + width] = values
+        output.flush()
+        moments[name] = Moments.of(values[~np.isnan(values)])
+    return moments
+
+
+def compute_terrain(dem_path, output_dir, resolution, nodata=None, block_size=BLOCK_SIZE, workers=None):
+    """Derivative rasters for a DEM .npy into output_dir; returns {band: Moments} over the whole grid"""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    shape = np.load(dem_path, mmap_mode='r').shape
+    for name in BANDS:
+        np.lib.format.open_memmap(output_dir / f'{name}.npy', mode='w+', dtype=np.float32, shape=shape)
+
+    windows = _block_windows(shape, block_size)
+    totals = {name: Moments() for name in BANDS}
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        futures = [executor.submit(_process_block, str(dem_path), str(output_dir), window, resolution, nodata)
+                   for window in windows]
+        for future in futures:
+            for name, moments in future.result().items():
+                totals[name] = totals[name].merge(moments)
+    return totals
+
+
+def terrain_statistics(moments):
+    """{band}_mean/_stdDev/_min/_max/_count, the server-side reduceRegion keys plus extremes"""
+    stats = {}
+    for name, m in moments.items():
+        stats[f'{name}_mean'] = float(m.mean) if m.count else None
+        stats[f'{name}_stdDev'] = m.std_dev
+        stats[f'{name}_min'] = float(m.minimum) if m.count else None
+        stats[f'{name}_max'] = float(m.maximum) if m.count else None
+        stats[f'{name}_count'] = int(m.count)
+    return stats
+
+
+def local_terrain(fire_dir, grid, block_size=BLOCK_SIZE, workers=None, fetch=None):
+    """Fetch the DEM (or reuse the input stack's) and write derivatives and statistics for a fire"""
+    fire_dir = Path(fire_dir)
+    elevation_layer = next(layer for layer in LAYERS if layer['name'] == 'elevation')
+    stack_dir = fire_dir / 'inputs'
+    if not (InputStack.exists(stack_dir) and InputStack(stack_dir).grid.to_dict() == grid.to_dict()):
+        stack_dir = fire_dir / 'topography' / 'dem'
+        build_input_stack(stack_dir, grid, layers=(elevation_layer,), fetch=fetch)
+    dem_path = stack_dir / InputStack(stack_dir).bands['elevation']['file']
+
+    moments = compute_terrain(dem_path, fire_dir / 'topography' / 'terrain', grid.resolution,
+                              elevation_layer['nodata'], block_size, workers)
+    stats = terrain_statistics(moments)
+    stats['method'] = 'local'
+    stats['resolution_meters'] = grid.resolution
+    with open(fire_dir / 'topography' / 'terrain_statistics.json', 'w') as f:
+        json.dump(stats, f, indent=2)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Terrain derivatives computed locally from the SRTM DEM')
+    parser.add_argument('fire_dir', help='Fire directory containing simulation_config.json')
+    parser.add_argument('--block-size', type=int, default=BLOCK_SIZE)
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    args = parser.parse_args(argv)
+
+    fire_dir = Path(args.fire_dir)
+    grid = SimulationGrid.from_config(fire_dir / 'simulation_config.json')
+    if not InputStack.exists(fire_dir / 'inputs'):
+        from data_collection import initialize_earth_engine
+        initialize_earth_engine()
+
+    started = time.perf_counter()
+    stats = local_terrain(fire_dir, grid, args.block_size, args.workers)
+    print(f"🏔️  Terrain derivatives for {grid.height} x {grid.width} cells in {time.perf_counter() - started:.1f}s")
+    for name in BANDS:
+        if stats[f'{name}_count']:
+            print(f"  {name:10s} mean {stats[f'{name}_mean']:.2f}  stdDev {stats[f'{name}_stdDev']:.2f}")
+        else:
+            print(f"  {name:10s} no valid cells")
+
+
+if __name__ == '__main__':
+    main()
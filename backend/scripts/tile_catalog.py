@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Expiry-aware tile catalog
+
+The tileUrl, fireUrl, ... fields of data/monthly_tiles.json and
+data/eaton-fire_tiles.json are Earth Engine map IDs, and map IDs expire.
+Next to each catalog the generators now keep a sources file recording, for
+every URL, when it was minted and the serialized (visualized) expression it
+was minted from:
+
+  data/monthly_tiles.json            the catalog the frontend reads (unchanged)
+  data/monthly_tiles.sources.json    {"<index>:<key>": {"minted_at", "expression"}}
+
+With that, a catalog refreshes itself: entries older than max_age are
+re-minted straight from their recorded expression, concurrently, and only
+those are touched. Entries sharing an expression (a static layer such as
+WorldCover appears in every month) are minted once per refresh. Cost is
+proportional to what expired, not to the size of the catalog.
+
+Usage:
+  python tile_catalog.py data/monthly_tiles.json                   # re-mint stale URLs
+  python tile_catalog.py data/monthly_tiles.json --status          # report ages only
+  python tile_catalog.py data/eaton-fire_tiles.json --max-age-hours 6
+"""
+
+import json
+import argparse
+from pathlib import Path
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+import ee
+
+SOURCES_SUFFIX = '.sources.json'
+MAX_AGE = timedelta(hours=24)  # map IDs carry no published lifetime; stay well inside a day
+
+
+def mint(image):
+    """Tile URL template for an already visualized image"""
+    return ee.data.getMapId({'image': image})['tile_fetcher'].url_format
+
+
+def _entry_key(index, key):
+    return f'{index}:{key}'
+
+
+def _atomic_write(path, payload):
+    temporary = path.with_suffix('.tmp')
+    with open(temporary, 'w') as f:
+        json.dump(payload, f, indent=2)
+    temporary.replace(path)
+
+
+class TileCatalog:
+    """Catalog entries plus the mint time and source expression of every layer URL"""
+
+    def __init__(self, path=None, tiles=None, sources=None):
+        self.path = Path(path) if path else None
+        self.tiles = tiles if tiles is not None else []
+        self.sources = sources if sources is not None else {}
+
+    @classmethod
+    def load(cls, path):
+        path = Path(path)
+        with open(path) as f:
+            tiles = json.load(f)
+        sources_path = path.with_suffix(SOURCES_SUFFIX)
+        sources = {}
+        if sources_path.exists():
+            with open(sources_path) as f:
+                sources = json.load(f)
+        return cls(path, tiles, sources)
+
+    def save(self, path=None):
+        """Write the catalog and its sources file (atomically, so the frontend never reads half a file)"""
+        self.path = Path(path) if path else self.path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        _atomic_write(self.path, self.tiles)
+        _atomic_write(self.path.with_suffix(SOURCES_SUFFIX), self.sources)
+
+    def mint_many(self, jobs, max_workers=8):
+        """Mint {(index, key): visualized ee.Image} concurrently and record each URL with its source.
+
+        Jobs with the same expression share one getMapId call. Returns
+        {(index, key): url or the Exception it raised}; failed jobs leave the
+        entry as it was.
+        """
+        expressions = {job: image.serialize() for job, image in jobs.items()}
+        unique = {}
+        for job, expression in expressions.items():
+            unique.setdefault(expression, jobs[job])
+
+        def mint_one(expression):
+            try:
+                return mint(unique[expression]), datetime.now(timezone.utc).isoformat()
+            except Exception as e:
+                return e, None
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            minted = dict(zip(unique, executor.map(mint_one, unique)))
+
+        tiles = {tile['index']: tile for tile in self.tiles}
+        results = {}
+        for (index, key), expression in expressions.items():
+            url, minted_at = minted[expression]
+            results[(index, key)] = url
+            if isinstance(url, Exception):
+                continue
+            tiles[index][key] = url
+            self.sources[_entry_key(index, key)] = {'minted_at': minted_at, 'expression': expression}
+        return results
+
+    def ages(self, now=None):
+        """{(index, key): age as timedelta, or None if the URL has no recorded source}"""
+        now = now or datetime.now(timezone.utc)
+        ages = {}
+        for tile in self.tiles:
+            for key, value in tile.items():
+                if not key.endswith('Url') or value is None:
+                    continue
+                source = self.sources.get(_entry_key(tile['index'], key))
+                ages[(tile['index'], key)] = now - datetime.fromisoformat(source['minted_at']) if source else None
+        return ages
+
+    def stale(self, max_age=MAX_AGE, now=None):
+        """(index, key) of URLs older than max_age that can be re-minted from their source"""
+        return [entry for entry, age in self.ages(now).items() if age is not None and age > max_age]
+
+    def refresh(self, max_age=MAX_AGE, max_workers=8, now=None):
+        """Re-mint only the stale URLs; returns {(index, key): url or Exception}"""
+        stale = self.stale(max_age, now)
+        if not stale:
+            return {}
+        jobs = {entry: ee.deserializer.fromJSON(self.sources[_entry_key(*entry)]['expression'])
+                for entry in stale}
+        return self.mint_many(jobs, max_workers)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Re-mint expired Earth Engine URLs of a tile catalog')
+    parser.add_argument('catalog', help='Catalog JSON, e.g. data/monthly_tiles.json')
+    parser.add_argument('--max-age-hours', type=float, default=MAX_AGE.total_seconds() / 3600)
+    parser.add_argument('--workers', type=int, default=8, help='Concurrent getMapId requests')
+    parser.add_argument('--status', action='store_true', help='Report URL ages without re-minting')
+    args = parser.parse_args(argv)
+
+    catalog = TileCatalog.load(args.catalog)
+    max_age = timedelta(hours=args.max_age_hours)
+    ages = catalog.ages()
+    stale = catalog.stale(max_age)
+    untracked = sum(age is None for age in ages.values())
+    print(f"{len(ages)} URLs in {args.catalog}: {len(stale)} older than {args.max_age_hours:g} h, "
+          f"{untracked} without a recorded source")
+    if untracked:
+        print("   Untracked URLs can only be refreshed by rerunning the generator script")
+    if args.status or not stale:
+        return
+
+    from tile_generator import initialize
+    initialize()
+    results = catalog.refresh(max_age, args.workers)
+    failures = {entry: error for entry, error in results.items() if isinstance(error, Exception)}
+    for (index, key), error in failures.items():
+        print(f"   {index}:{key} failed: {error}")
+    catalog.save()
+    print(f"🔄 Re-minted {len(results) - len(failures)} of {len(stale)} stale URLs")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Monthly map tile catalog generator
+
+One engine behind get_monthly_tiles.py and get_eaton-fire_tiles.py: given a
+region, a window of months and a set of layers, it mints an Earth Engine map
+ID per layer and month and writes the catalog the frontend reads
+(data/monthly_tiles.json, data/eaton-fire_tiles.json):
+
+  [{"index": 0, "date": "2019-01", "tileUrl": ..., "fireUrl": ...,
+    "landCoverUrl": ..., "precipUrl": ..., "aodUrl": ..., "lstUrl": ...,
+    "climateUrl": ...}, ...]
+
+Month labels and boundaries are computed on the client (no getInfo per
+month), static layers such as ESA WorldCover are minted once and shared by
+every month, and all getMapId requests go out concurrently on a bounded
+thread pool. Each URL's mint time and expression are recorded next to the
+catalog, so tile_catalog.py can re-mint expired entries later. A layer that
+fails for a month is reported and left out of that month's entry, except
+the base Sentinel-2 layer, which is required.
+
+Usage:
+  python tile_generator.py --region -119.3 36.0 -118.5 36.5 --start 2019-01 --months 48 \\
+      --fire-months 2020-08 2020-12 --output ./data/monthly_tiles.json
+"""
+
+import time
+import argparse
+from datetime import date
+
+import ee
+import ee_replay
+
+from tile_catalog import TileCatalog
+
+SERVICE_ACCOUNT = 'earthengine-access@gen-lang-client-0853931727.iam.gserviceaccount.com'
+KEY_FILE = './credentials.json'
+
+RGB_VIS = {'bands': ['B4', 'B3', 'B2'], 'min': 0.0, 'max': 0.3, 'gamma': 1.4}
+WORLDCOVER_PALETTE = ['006400', 'ffbb22', 'ffff4c', 'f096ff', 'fa0000',
+                      'b4b4b4', 'f0f0f0', '0064c8', '0096a0', '00cf75', 'ffffff']
+
+
+def mask_s2(img):
+    """Sentinel-2 cloud/cirrus mask from QA60, reflectance scaled to 0-1"""
+    qa = img.select('QA60')
+    cloud = 1 << 10
+    cirrus = 1 << 11
+    mask = qa.bitwiseAnd(cloud).eq(0).And(qa.bitwiseAnd(cirrus).eq(0))
+    return img.updateMask(mask).divide(10000).copyProperties(img, ['system:time_start'])
+
+
+def _s2_composite(context, start, end):
+    return context['s2'].filterDate(start, end).median()
+
+
+def _fire(context, start, end):
+    return _s2_composite(context, start, end).normalizedDifference(['B8', 'B12']).lt(0.1).selfMask()
+
+
+def _land_cover(context, start, end):
+    return ee.ImageCollection('ESA/WorldCover/v100').first().select('Map')
+
+
+def _precip(context, start, end):
+    return ee.ImageCollection('UCSB-CHG/CHIRPS/DAILY').filterDate(start, end).sum()
+
+
+def _aod(context, start, end):
+    return (ee.ImageCollection('MODIS/061/MOD08_M3').filterDate(start, end)
+            .select('Aerosol_Optical_Depth_Land_Ocean_Mean_Mean').mean())
+
+
+def _lst(context, start, end):
+    return (ee.ImageCollection('MODIS/061/MOD11A2').filterDate(start, end)
+            .select('LST_Day_1km').mean().multiply(0.02).subtract(273.15))
+
+
+def _climate(context, start, end):
+    return ee.ImageCollection('IDAHO_EPSCOR/TERRACLIMATE').filterDate(start, end).select('pr').mean()
+
+
+# Layer name -> catalog key, image builder, visualization; static layers are the
+# same every month, fire_only layers are minted only inside the fire months
+LAYERS = {
+    'rgb': {'key': 'tileUrl', 'image': _s2_composite, 'vis': RGB_VIS, 'required': True},
+    'fire': {'key': 'fireUrl', 'image': _fire, 'vis': {'palette': ['red']}, 'fire_only': True},
+    'landCover': {'key': 'landCoverUrl', 'image': _land_cover, 'static': True,
+                  'vis': {'min': 10, 'max': 100, 'palette': WORLDCOVER_PALETTE}},
+    'precip': {'key': 'precipUrl', 'image': _precip,
+               'vis': {'min': 0, 'max': 300, 'palette': ['white', 'blue', 'purple']}},
+    'aod': {'key': 'aodUrl', 'image': _aod,
+            'vis': {'min': 0, 'max': 0.5, 'palette': ['white', 'yellow', 'orange', 'red']}},
+    'lst': {'key': 'lstUrl', 'image': _lst,
+            'vis': {'min': 0, 'max': 40, 'palette': ['blue', 'cyan', 'yellow', 'red']}},
+    'climate': {'key': 'climateUrl', 'image': _climate,
+                'vis': {'min': 0, 'max': 300, 'palette': ['white', 'green', 'blue']}},
+}
+
+
+def initialize():
+    """Initialize Earth Engine with the service account (EE_BACKEND=replay runs offline)"""
+    if not ee_replay.install_from_env():
+        ee.Initialize(ee.ServiceAccountCredentials(SERVICE_ACCOUNT, KEY_FILE))
+
+
+def month_windows(start_month, num_months):
+    """[('YYYY-MM', 'YYYY-MM-01' start, next month's 'YYYY-MM-01'), ...] computed locally"""
+    year, month = int(start_month[:4]), int(start_month[5:7])
+    windows = []
+    for i in range(num_months):
+        y, m = divmod(month - 1 + i, 12)
+        first = date(year + y, m + 1, 1)
+        y, m = divmod(month + i, 12)
+        windows.append((first.strftime('%Y-%m'), first.isoformat(), date(year + y, m + 1, 1).isoformat()))
+    return windows
+
+
+def generate_monthly_tiles(region, start_month, num_months, layers=tuple(LAYERS), fire_months=None,
+                           max_workers=8):
+    """TileCatalog of monthly entries for region ([west, south, east, north]) and the given layers"""
+    windows = month_windows(start_month, num_months)
+    geometry = ee.Geometry.Rectangle(region)
+    context = {
+        'region': geometry,
+        's2': (ee.ImageCollection('COPERNICUS/S2_SR_HARMONIZED')
+               .filterDate(windows[0][1], windows[-1][2])
+               .filterBounds(geometry)
+               .filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE', 30))
+               .map(mask_s2))
+    }
+
+    # One job per (month, key); a static layer is built once and its shared
+    # expression is minted once by the catalog
+    jobs = {}
+    for name in layers:
+        layer = LAYERS[name]
+        static = None
+        if layer.get('static'):
+            static = layer['image'](context, windows[0][1], windows[-1][2]).visualize(**layer['vis'])
+        for i, (label, start, end) in enumerate(windows):
+            if layer.get('fire_only') and not (fire_months and fire_months[0] <= label <= fire_months[1]):
+                continue
+            if static is None:
+                jobs[(i, layer['key'])] = layer['image'](context, start, end).visualize(**layer['vis'])
+            else:
+                jobs[(i, layer['key'])] = static
+
+    catalog = TileCatalog(tiles=[{'index': i, 'date': label} for i, (label, _, _) in enumerate(windows)])
+    results = catalog.mint_many(jobs, max_workers)
+
+    required = {LAYERS[name]['key'] for name in layers if LAYERS[name].get('required')}
+    for (i, key), url in results.items():
+        if isinstance(url, Exception):
+            if key in required:
+                raise url
+            print(f"{key} failed for {windows[i][0]}: {url}")
+    return catalog
+
+
+def run(region, start_month, num_months, output, layers=tuple(LAYERS), fire_months=None, max_workers=8):
+    """Initialize Earth Engine, generate the catalog and write it (with its sources file) to output"""
+    initialize()
+    started = time.perf_counter()
+    catalog = generate_monthly_tiles(region, start_month, num_months, layers, fire_months, max_workers)
+    catalog.save(output)
+    print(f"Saved {len(catalog.tiles)} monthly tiles to {output} in {time.perf_counter() - started:.1f}s")
+    return catalog.tiles
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate a monthly Earth Engine tile catalog')
+    parser.add_argument('--region', type=float, nargs=4, required=True, metavar=('WEST', 'SOUTH', 'EAST', 'NORTH'))
+    parser.add_argument('--start', required=True, help='First month, YYYY-MM')
+    parser.add_argument('--months', type=int, required=True)
+    parser.add_argument('--fire-months', nargs=2, metavar=('FIRST', 'LAST'),
+                        help='YYYY-MM range that gets the fire overlay')
+    parser.add_argument('--layers', nargs='+', choices=list(LAYERS), default=list(LAYERS))
+    parser.add_argument('--workers', type=int, default=8, help='Concurrent getMapId requests')
+    parser.add_argument('--output', required=True)
+    args = parser.parse_args(argv)
+
+    run(args.region, args.start, args.months, args.output, tuple(args.layers), args.fire_months, args.workers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+XYZ tile prefetcher into a local MBTiles cache
+
+Every map pan in the frontend fetches tiles live from the Earth Engine URLs
+of a tile catalog (data/monthly_tiles.json, data/eaton-fire_tiles.json), so
+latency and quota follow user traffic. This script downloads the tile
+pyramid over the fire region, for chosen zoom levels and layers, ahead of
+time:
+
+  - every {z}/{x}/{y} covering the region is enumerated for every catalog
+    entry and layer URL (tileUrl, fireUrl, landCoverUrl, ...)
+  - downloads run on an asyncio loop over a bounded thread pool sharing one
+    keep-alive session, with at most 2 x workers requests in flight
+  - tiles go into one SQLite file with the MBTiles deduplicated layout:
+    images(tile_id, tile_data) keyed by content hash, and a map table
+    pointing each (layer, zoom_level, tile_column, tile_row) at an image.
+    Blank tiles and static layers repeated every month are stored once.
+    The layer is "<date>/<key>", e.g. "2020-08/fireUrl"; rows follow the
+    MBTiles (TMS) convention, flipped from XYZ
+  - progress is the map table itself, committed in batches: a rerun skips
+    every tile already stored, so an interrupted prefetch resumes
+
+Expired map IDs answer with an error; pass --refresh to re-mint stale URLs
+(tile_catalog.py) before fetching.
+
+Usage:
+  python tile_prefetch.py data/monthly_tiles.json --region -119.3 36.0 -118.5 36.5 --zooms 8 9 10 11
+  python tile_prefetch.py data/eaton-fire_tiles.json --region -118.25 34.12 -117.93 34.32 \\
+      --zooms 10 11 12 13 --layers tileUrl fireUrl --workers 16 --refresh
+"""
+
+import math
+import time
+import sqlite3
+import asyncio
+import hashlib
+import argparse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from tile_catalog import TileCatalog
+
+COMMIT_EVERY = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS images (tile_id TEXT PRIMARY KEY, tile_data BLOB);
+CREATE TABLE IF NOT EXISTS map (
+    layer TEXT, zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_id TEXT,
+    PRIMARY KEY (layer, zoom_level, tile_column, tile_row)
+);
+CREATE VIEW IF NOT EXISTS tiles AS
+    SELECT map.layer, map.zoom_level, map.tile_column, map.tile_row, images.tile_data
+    FROM map JOIN images ON images.tile_id = map.tile_id;
+"""
+
+
+def lonlat_to_tile(lon, lat, zoom):
+    """XYZ (web mercator) tile containing a lon/lat point"""
+    n = 2 ** zoom
+    lat = max(min(lat, 85.0511), -85.0511)
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tiles_for_bbox(bbox, zooms):
+    """[(z, x, y), ...] covering a [west, south, east, north] bbox at each zoom"""
+    west, south, east, north = bbox
+    tiles = []
+    for z in zooms:
+        x0, y0 = lonlat_to_tile(west, north, z)
+        x1, y1 = lonlat_to_tile(east, south, z)
+        tiles.extend((z, x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1))
+    return tiles
+
+
+def catalog_layers(catalog, keys=None):
+    """{layer name: URL template} of a catalog, optionally limited to some keys"""
+    layers = {}
+    for tile in catalog.tiles:
+        for key, url in tile.items():
+            if key.endswith('Url') and url and (keys is None or key in keys):
+                layers[f"{tile['date']}/{key}"] = url
+    return layers
+
+
+class TileStore:
+    """MBTiles-style SQLite store with images deduplicated by content hash"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.path)
+        self.connection.executescript(SCHEMA)
+        self.pending = 0
+
+    def set_metadata(self, **values):
+        self.connection.executemany('INSERT OR REPLACE INTO metadata VALUES (?, ?)',
+                                    [(name, str(value)) for name, value in values.items()])
+        self.connection.commit()
+
+    def stored(self, layer):
+        """{(z, x, y)} already stored for a layer"""
+        rows = self.connection.execute('SELECT zoom_level, tile_column, tile_row FROM map WHERE layer = ?', (layer,))
+        return {(z, x, (2 ** z - 1) - row) for z, x, row in rows}
+
+    def put(self, layer, z, x, y, data):
+        tile_id = hashlib.sha256(data).hexdigest()
+        self.connection.execute('INSERT OR IGNORE INTO images VALUES (?, ?)', (tile_id, data))
+        self.connection.execute('INSERT OR REPLACE INTO map VALUES (?, ?, ?, ?, ?)',
+                                (layer, z, x, (2 ** z - 1) - y, tile_id))
+        self.pending += 1
+        if self.pending >= COMMIT_EVERY:
+            self.commit()
+
+    def get(self, layer, z, x, y):
+        """Tile bytes for an XYZ address, or None"""
+        row = self.connection.execute(
+            'SELECT tile_data FROM tiles WHERE layer = ? AND zoom_level = ? AND tile_column = ? AND tile_row = ?',
+            (layer, z, x, (2 ** z - 1) - y)).fetchone()
+        return row[0] if row else None
+
+    def commit(self):
+        self.connection.commit()
+        self.pending = 0
+
+    def counts(self):
+        tiles = self.connection.execute('SELECT COUNT(*) FROM map').fetchone()[0]
+        images = self.connection.execute('SELECT COUNT(*) FROM images').fetchone()[0]
+        return tiles, images
+
+    def close(self):
+        self.commit()
+        self.connection.close()
+
+
+class TilePrefetcher:
+    def __init__(self, store, max_workers=8, retries=3, backoff=1.0, timeout=30):
+        self.store = store
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=max_workers,
+            pool_maxsize=max_workers,
+            max_retries=Retry(total=retries, backoff_factor=backoff, status_forcelist=(429, 500, 502, 503, 504),
+                              allowed_methods=('GET',), respect_retry_after_header=True)
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def fetch(self, url):
+        response = self.session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        return response.content
+
+    def pending(self, layers, pyramid):
+        """(layer, z, x, y, url) not yet in the store"""
+        for layer, template in layers.items():
+            stored = self.store.stored(layer)
+            for z, x, y in pyramid:
+                if (z, x, y) not in stored:
+                    yield layer, z, x, y, template.format(z=z, x=x, y=y)
+
+    async def _prefetch(self, jobs):
+        loop = asyncio.get_running_loop()
+        fetched, failed = 0, {}
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='tile-fetch') as executor:
+            in_flight = {}
+
+            def drain(done):
+                nonlocal fetched
+                for future in done:
+                    layer, z, x, y = in_flight.pop(future)
+                    try:
+                        # Writes stay on the loop thread: one SQLite connection, no locking
+                        self.store.put(layer, z, x, y, future.result())
+                        fetched += 1
+                    except Exception as e:
+                        failed[layer] = failed.get(layer, 0) + 1
+                        if failed[layer] == 1:
+                            print(f"   {layer}: {e}")
+
+            for layer, z, x, y, url in jobs:
+                if len(in_flight) >= 2 * self.max_workers:
+                    done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    drain(done)
+                in_flight[loop.run_in_executor(executor, self.fetch, url)] = (layer, z, x, y)
+            if in_flight:
+                done, _ = await asyncio.wait(in_flight)
+                drain(done)
+        self.store.commit()
+        return fetched, failed
+
+    def prefetch(self, layers, pyramid):
+        """Download every missing tile of layers ({name: URL template}) over the pyramid.
+
+        Returns (tiles fetched, {layer: failed tile count}); failed tiles are
+        retried on the next run.
+        """
+        return asyncio.run(self._prefetch(self.pending(layers, pyramid)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Prefetch the XYZ tiles of a tile catalog into an MBTiles file')
+    parser.add_argument('catalog', help='Catalog JSON, e.g. data/monthly_tiles.json')
+    parser.add_argument('--region', type=float, nargs=4, required=True, metavar=('WEST', 'SOUTH', 'EAST', 'NORTH'))
+    parser.add_argument('--zooms', type=int, nargs='+', required=True)
+    parser.add_argument('--layers', nargs='+', help='Catalog keys to fetch, e.g. tileUrl fireUrl (default: all)')
+    parser.add_argument('--output', help='MBTiles file (default: the catalog path with .mbtiles)')
+    parser.add_argument('--workers', type=int, default=8, help='Concurrent downloads')
+    parser.add_argument('--refresh', action='store_true', help='Re-mint stale catalog URLs first')
+    args = parser.parse_args(argv)
+
+    catalog = TileCatalog.load(args.catalog)
+    if args.refresh and catalog.stale():
+        from tile_generator import initialize
+        initialize()
+        catalog.refresh(max_workers=args.workers)
+        catalog.save()
+
+    layers = catalog_layers(catalog, args.layers)
+    pyramid = tiles_for_bbox(args.region, args.zooms)
+    store = TileStore(args.output or Path(args.catalog).with_suffix('.mbtiles'))
+    store.set_metadata(name=Path(args.catalog).stem, format='png', bounds=','.join(map(str, args.region)),
+                       minzoom=min(args.zooms), maxzoom=max(args.zooms))
+
+    print(f"🗺️  {len(layers)} layers x {len(pyramid)} tiles over zooms {', '.join(map(str, args.zooms))}")
+    started = time.perf_counter()
+    fetched, failed = TilePrefetcher(store, max_workers=args.workers).prefetch(layers, pyramid)
+    tiles, images = store.counts()
+    store.close()
+    print(f"✓ Fetched {fetched} tiles in {time.perf_counter() - started:.1f}s; "
+          f"store holds {tiles} tiles as {images} unique images in {store.path}")
+    if failed:
+        print(f"⚠️  {sum(failed.values())} tiles failed in {len(failed)} layers; rerun to retry them")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Local raster tile renderer
+
+Serves z/x/y PNG map tiles straight from the rasters a fire directory
+already holds (input stack, terrain derivatives, ensemble and arrival-time
+grids), with no Earth Engine involved:
+
+  GET /<fire>/<layer>/<z>/<x>/<y>.png   e.g. /Creek_Fire_2020/burn_probability/11/350/801.png
+  GET /<fire>                           JSON list of the layers available for a fire
+
+Layers are colored like the Earth Engine layers of get_monthly_tiles.py:
+every visualization is {min, max, palette} with the palette interpolated
+linearly between stops, and the WorldCover, precipitation, AOD and LST
+palettes are taken from tile_generator.py, so a local raster of any of those
+quantities can be registered under its preset (--layer).
+
+Rendering a tile touches only what it needs. The web mercator pixel centres
+are mapped onto the fire's UTM simulation grid through a 17 x 17 lattice
+(one pyproj call, interpolated in between), only the covering window of the
+memory-mapped raster is read, and low zooms read from an overview pyramid
+(2x decimations stored next to the raster, built on first use and rebuilt
+when the raster changes) instead of the full-resolution grid. Encoded PNGs
+are kept in an in-memory LRU bounded by bytes, so repeated tiles are served
+without touching the raster again.
+
+Usage:
+  python tile_renderer.py --data-dir wildfire_data --port 8090
+  python tile_renderer.py --layer precip=precip_monthly.npy:precip     # extra raster with a preset palette
+"""
+
+import io
+import re
+import json
+import math
+import argparse
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+from PIL import Image
+from matplotlib.colors import to_rgb
+
+from sim_grid import SimulationGrid
+from tile_generator import LAYERS as EE_LAYERS
+
+TILE_SIZE = 256
+LATTICE = 17
+CACHE_BYTES = 256 * 2 ** 20
+WEB_MERCATOR_M_PER_PIXEL = 156543.03392804097  # at zoom 0, on the equator
+HEX_COLOR = re.compile(r'^[0-9a-fA-F]{6}$')  # ee palette stops are 'rrggbb' or color names
+
+# Visualizations: the Earth Engine catalog layers plus the local rasters
+# (min and max default to 0 and 1, as in ee visualize())
+VIS = {name: {'min': 0, 'max': 1, **layer['vis']} for name, layer in EE_LAYERS.items() if 'palette' in layer['vis']}
+VIS.update({
+    'elevation': {'min': 0, 'max': 3000, 'palette': ['006600', 'e5ffcc', '662a00', 'd8d8d8', 'f5f5f5']},
+    'slope': {'min': 0, 'max': 60, 'palette': ['white', 'yellow', 'orange', 'brown']},
+    'aspect': {'min': 0, 'max': 360, 'palette': ['red', 'yellow', 'green', 'blue', 'red']},
+    'hillshade': {'min': 0, 'max': 255, 'palette': ['black', 'white']},
+    'canopy_cover': {'min': 0, 'max': 100, 'palette': ['white', 'green']},
+    'burn_probability': {'min': 0, 'max': 1, 'palette': ['yellow', 'orange', 'red']},
+    'arrival_hours': {'min': 0, 'max': 72, 'palette': ['red', 'orange', 'yellow', 'white']},
+})
+
+# Layer name -> raster path in the fire directory, visualization, nodata and
+# how overviews resample it: 'mean' of 2x2 blocks, or 'nearest' for classes and angles
+LAYERS = {
+    'elevation': {'path': 'inputs/elevation.npy', 'vis': 'elevation', 'nodata': -32768},
+    'canopy_cover': {'path': 'inputs/canopy_cover.npy', 'vis': 'canopy_cover', 'nodata': -1, 'resampling': 'nearest'},
+    'slope': {'path': 'topography/terrain/slope.npy', 'vis': 'slope'},
+    'aspect': {'path': 'topography/terrain/aspect.npy', 'vis': 'aspect', 'resampling': 'nearest'},
+    'hillshade': {'path': 'topography/terrain/hillshade.npy', 'vis': 'hillshade'},
+    'burn_probability': {'path': 'simulation/ensemble/burn_probability.npy', 'vis': 'burn_probability', 'nodata': 0},
+    'arrival_p50': {'path': 'simulation/ensemble/arrival_p50.npy', 'vis': 'arrival_hours'},
+    'arrival_hours': {'path': 'simulation/arrival_hours.npy', 'vis': 'arrival_hours'},
+}
+
+
+def palette_lut(vis, steps=256):
+    """(steps, 4) uint8 RGBA lookup table over [min, max], stops interpolated like ee visualize()"""
+    stops = np.array([to_rgb(f'#{c}' if HEX_COLOR.match(c) else c) for c in vis['palette']]) * 255
+    positions = np.linspace(0, 1, len(stops))
+    x = np.linspace(0, 1, steps)
+    lut = np.empty((steps, 4), dtype=np.uint8)
+    for channel in range(3):
+        lut[:, channel] = np.round(np.interp(x, positions, stops[:, channel]))
+    lut[:, 3] = 255
+    return lut
+
+
+def _interpolation_weights(size=TILE_SIZE, lattice=LATTICE):
+    """(size, lattice) matrix interpolating lattice values at every pixel centre"""
+    knots = np.linspace(0.5, size - 0.5, lattice)
+    weights = np.zeros((size, lattice))
+    for pixel, center in enumerate(np.arange(size) + 0.5):
+        k = min(np.searchsorted(knots, center, side='right') - 1, lattice - 2)
+        t = (center - knots[k]) / (knots[k + 1] - knots[k])
+        weights[pixel, k], weights[pixel, k + 1] = 1 - t, t
+    return weights
+
+
+WEIGHTS = _interpolation_weights()
+
+
+def tile_lonlat(z, x, y, positions):
+    """Lon/lat (2-D) of pixel positions (0..TILE_SIZE along each axis) inside tile z/x/y"""
+    n = 2 ** z
+    lons = (x + positions / TILE_SIZE) / n * 360.0 - 180.0
+    lats = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * (y + positions / TILE_SIZE) / n))))
+    return np.meshgrid(lons, lats)
+
+
+class TileCache:
+    """Thread-safe LRU of encoded tiles, bounded by total bytes"""
+
+    def __init__(self, max_bytes=CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = self.misses = 0
+        self._tiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._tiles.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._tiles.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key, data):
+        with self._lock:
+            if key in self._tiles:
+                return
+            self._tiles[key] = data
+            self.bytes += len(data)
+            while self.bytes > self.max_bytes and self._tiles:
+                _, evicted = self._tiles.popitem(last=False)
+                self.bytes -= len(evicted)
+
+
+class RasterPyramid:
+    """A grid raster (.npy) and its 2x overviews, memory-mapped, as float32 with NaN for nodata"""
+
+    def __init__(self, path, grid, nodata=None, resampling='mean'):
+        self.path = Path(path)
+        self.grid = grid
+        self.nodata = nodata
+        self.resampling = resampling
+        self.levels = [np.load(self.path, mmap_mode='r')]
+        self._build_overviews()
+
+    def _overview_path(self, level):
+        return self.path.with_name(f'{self.path.stem}.ovr{level}.npy')
+
+    def _build_overviews(self):
+        source_mtime = self.path.stat().st_mtime
+        level, array = 1, self.levels[0]
+        while max(array.shape) > TILE_SIZE:
+            path = self._overview_path(level)
+            if not path.exists() or path.stat().st_mtime < source_mtime:
+                # From the previous level, in row strips so a large raster never sits in memory
+                height, width = (array.shape[0] + 1) // 2, (array.shape[1] + 1) // 2
+                overview = np.lib.format.open_memmap(path.with_suffix('.tmp.npy'), mode='w+',
+                                                     dtype=np.float32, shape=(height, width))
+                strip = 2 * TILE_SIZE
+                for row in range(0, array.shape[0], strip):
+                    overview[row // 2:(row + strip) // 2] = self._decimate(
+                        self._as_float(array[row:row + strip], level == 1))
+                overview.flush()
+                del overview
+                path.with_suffix('.tmp.npy').replace(path)
+            array = np.load(path, mmap_mode='r')
+            self.levels.append(array)
+            level += 1
+
+    def _as_float(self, values, is_source=True):
+        values = np.asarray(values, dtype=np.float32)
+        if is_source and self.nodata is not None:
+            values = np.where(values == self.nodata, np.nan, values)
+        return values
+
+    def _decimate(self, values):
+        if self.resampling == 'nearest':
+            return values[::2, ::2]
+        # Mean of each 2x2 block (edge blocks may be partial), ignoring NaN
+        height, width = values.shape
+        padded = np.full((height + height % 2, width + width % 2), np.nan, dtype=np.float32)
+        padded[:height, :width] = values
+        blocks = padded.reshape(padded.shape[0] // 2, 2, padded.shape[1] // 2, 2)
+        valid = ~np.isnan(blocks)
+        counts = valid.sum(axis=(1, 3))
+        sums = np.where(valid, blocks, 0).sum(axis=(1, 3))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(counts > 0, sums / counts, np.nan).astype(np.float32)
+
+    def sample(self, z, x, y):
+        """(TILE_SIZE, TILE_SIZE) float32 values for tile z/x/y (NaN outside the raster or nodata)"""
+        # Coarsest level still finer than the tile's pixels
+        _, lat = tile_lonlat(z, x, y, np.array([TILE_SIZE / 2]))
+        pixel_m = WEB_MERCATOR_M_PER_PIXEL * math.cos(math.radians(float(lat[0, 0]))) / 2 ** z
+        level = int(np.clip(math.floor(math.log2(max(pixel_m / self.grid.resolution, 1))), 0, len(self.levels) - 1))
+        array, scale = self.levels[level], 2 ** level
+
+        lons, lats = tile_lonlat(z, x, y, np.linspace(0.5, TILE_SIZE - 0.5, LATTICE))
+        xs, ys = self.grid.lonlat_to_xy(lons, lats)
+        cols = WEIGHTS @ ((np.asarray(xs) - self.grid.x_min) / (self.grid.resolution * scale)) @ WEIGHTS.T
+        rows = WEIGHTS @ ((self.grid.y_max - np.asarray(ys)) / (self.grid.resolution * scale)) @ WEIGHTS.T
+        rows, cols = np.floor(rows).astype(np.int64), np.floor(cols).astype(np.int64)
+
+        out = np.full((TILE_SIZE, TILE_SIZE), np.nan, dtype=np.float32)
+        inside = (rows >= 0) & (rows < array.shape[0]) & (cols >= 0) & (cols < array.shape[1])
+        if not inside.any():
+            return out
+        # Read only the window the tile covers
+        row0, row1 = rows[inside].min(), rows[inside].max() + 1
+        col0, col1 = cols[inside].min(), cols[inside].max() + 1
+        window = self._as_float(array[row0:row1, col0:col1], level == 0)
+        out[inside] = window[rows[inside] - row0, cols[inside] - col0]
+        return out
+
+
+class TileRenderer:
+    """Renders and caches PNG tiles for the fires under data_dir"""
+
+    def __init__(self, data_dir, layers=LAYERS, cache_bytes=CACHE_BYTES, compress_level=1):
+        self.data_dir = Path(data_dir)
+        self.layers = dict(layers)
+        self.cache = TileCache(cache_bytes)
+        self.compress_level = compress_level
+        self._luts = {}
+        self._grids = {}
+        self._pyramids = {}
+        self._lock = threading.Lock()
+        self._empty = self._encode(np.zeros((TILE_SIZE, TILE_SIZE, 4), dtype=np.uint8))
+
+    def available(self, fire):
+        return [name for name, layer in self.layers.items() if (self.data_dir / fire / layer['path']).exists()]
+
+    def _lut(self, vis_name):
+        if vis_name not in self._luts:
+            self._luts[vis_name] = palette_lut(VIS[vis_name])
+        return self._luts[vis_name]
+
+    def _pyramid(self, fire, layer_name):
+        key = (fire, layer_name)
+        with self._lock:
+            if key not in self._pyramids:
+                fire_dir = self.data_dir / fire
+                layer = self.layers[layer_name]
+                path = fire_dir / layer['path']
+                if not path.exists():
+                    raise KeyError(f'{fire} has no {layer_name} raster')
+                if fire not in self._grids:
+                    self._grids[fire] = SimulationGrid.from_config(fire_dir / 'simulation_config.json')
+                self._pyramids[key] = RasterPyramid(path, self._grids[fire], layer.get('nodata'),
+                                                    layer.get('resampling', 'mean'))
+            return self._pyramids[key]
+
+    def _encode(self, rgba):
+        buffer = io.BytesIO()
+        Image.fromarray(rgba, 'RGBA').save(buffer, 'PNG', compress_level=self.compress_level)
+        return buffer.getvalue()
+
+    def render(self, fire, layer_name, z, x, y):
+        """PNG bytes of one tile (uncached)"""
+        values = self._pyramid(fire, layer_name).sample(z, x, y)
+        valid = ~np.isnan(values)
+        if not valid.any():
+            return self._empty
+        vis = VIS[self.layers[layer_name]['vis']]
+        lut = self._lut(self.layers[layer_name]['vis'])
+        scaled = (np.where(valid, values, vis['min']) - vis['min']) / (vis['max'] - vis['min'])
+        rgba = lut[np.clip((scaled * (len(lut) - 1)).round(), 0, len(lut) - 1).astype(np.intp)]
+        rgba[~valid, 3] = 0
+        return self._encode(rgba)
+
+    def tile(self, fire, layer_name, z, x, y):
+        key = (fire, layer_name, z, x, y)
+        data = self.cache.get(key)
+        if data is None:
+            data = self.render(fire, layer_name, z, x, y)
+            self.cache.put(key, data)
+        return data
+
+
+def serve(renderer, host='127.0.0.1', port=8090):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, body, content_type):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Access-Control-Allow-Origin', '*')
+            if status == 200:
+                self.send_header('Cache-Control', 'max-age=3600')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            parts = self.path.split('?')[0].strip('/').split('/')
+            if len(parts) == 1 and (renderer.data_dir / parts[0]).is_dir():
+                return self._send(200, json.dumps(renderer.available(parts[0])).encode(), 'application/json')
+            if len(parts) != 5 or not parts[4].endswith('.png') or parts[1] not in renderer.layers:
+                return self._send(404, b'Not found', 'text/plain')
+            fire, layer = parts[0], parts[1]
+            try:
+                z, x, y = int(parts[2]), int(parts[3]), int(parts[4][:-len('.png')])
+                self._send(200, renderer.tile(fire, layer, z, x, y), 'image/png')
+            except (ValueError, KeyError, FileNotFoundError) as e:
+                self._send(404, str(e).encode(), 'text/plain')
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    print(f"🗺️  Rendering tiles from {renderer.data_dir} on http://{host}:{server.server_port}/<fire>/<layer>/<z>/<x>/<y>.png")
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve z/x/y PNG tiles rendered from local fire rasters')
+    parser.add_argument('--data-dir', default='wildfire_data', help='Directory of fire directories')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--cache-mb', type=int, default=CACHE_BYTES // 2 ** 20, help='Encoded tile LRU size')
+    parser.add_argument('--layer', action='append', default=[], metavar='NAME=PATH:VIS',
+                        help=f"Extra layer: raster path in the fire directory and a palette ({', '.join(VIS)})")
+    args = parser.parse_args(argv)
+
+    layers = dict(LAYERS)
+    for spec in args.layer:
+        name, rest = spec.split('=', 1)
+        path, vis = rest.rsplit(':', 1)
+        if vis not in VIS:
+            parser.error(f"unknown palette '{vis}' for layer {name}")
+        layers[name] = {'path': path, 'vis': vis, 'resampling': 'nearest' if vis == 'landCover' else 'mean'}
+
+    renderer = TileRenderer(args.data_dir, layers, args.cache_mb * 2 ** 20)
+    server = serve(renderer, args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(f"Cache: {renderer.cache.hits} hits, {renderer.cache.misses} misses")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Tiled, parallel reduceRegion with exactly mergeable statistics
+
+A single reduceRegion over a million-acre bbox at scale=30 is slow and fails
+with "too many pixels" or a timeout. TiledReducer splits the bbox into
+sub-tiles of at most tile_degrees, reduces every tile concurrently (one
+getInfo each, retried on its own when it fails) and merges the partial
+results on the client:
+
+  mean, stdDev, min, max   per-tile count, mean, stdDev, min, max merged as
+                           moments (Chan et al.), identical to one reduction
+  fixed histograms         bin counts summed
+  grouped sums/counts      per-class sums added (area by class)
+
+Tile reducers are unweighted, so every pixel counts once and the merge is
+exact; a whole-region weighted reduction differs only in how it weighs
+partially covered pixels on the bbox edge.
+
+Usage:
+  reducer = TiledReducer(collector._get_info)
+  stats = reducer.stats(image, bbox, scale=30)            # {band}_mean, _stdDev, _min, _max
+  classes = reducer.area_by_class(class_image, bbox, scale=30)
+"""
+
+import time
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+import ee
+import numpy as np
+
+TILE_DEGREES = 0.25
+MAX_PIXELS = 1e9
+
+
+class Moments:
+    """Count, mean, M2 (sum of squared deviations), min and max; merges exactly (Chan et al.)"""
+
+    def __init__(self, count=0, mean=0.0, m2=0.0, minimum=np.inf, maximum=-np.inf):
+        self.count, self.mean, self.m2 = count, mean, m2
+        self.minimum, self.maximum = minimum, maximum
+
+    @classmethod
+    def of(cls, values):
+        values = np.asarray(values, dtype=np.float64)
+        if values.size == 0:
+            return cls()
+        mean = values.mean()
+        return cls(values.size, mean, float(((values - mean) ** 2).sum()), values.min(), values.max())
+
+    @classmethod
+    def from_summary(cls, count, mean, std_dev, minimum, maximum):
+        """Moments of a partial result reported as count, mean, population stdDev, min and max"""
+        if not count or mean is None:
+            return cls()
+        return cls(count, mean, (std_dev or 0.0) ** 2 * count, minimum, maximum)
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            return other
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        return Moments(count, self.mean + delta * other.count / count,
+                       self.m2 + other.m2 + delta ** 2 * self.count * other.count / count,
+                       min(self.minimum, other.minimum), max(self.maximum, other.maximum))
+
+    @property
+    def std_dev(self):
+        """Population standard deviation, as ee.Reducer.stdDev()"""
+        return float(np.sqrt(self.m2 / self.count)) if self.count else None
+
+
+def split_bbox(bbox, tile_degrees=TILE_DEGREES):
+    """[west, south, east, north] tiles of at most tile_degrees on a side, covering bbox"""
+    west, south, east, north = bbox
+    columns = max(1, math.ceil((east - west) / tile_degrees - 1e-9))
+    rows = max(1, math.ceil((north - south) / tile_degrees - 1e-9))
+    xs = np.linspace(west, east, columns + 1)
+    ys = np.linspace(south, north, rows + 1)
+    return [[float(xs[i]), float(ys[j]), float(xs[i + 1]), float(ys[j + 1])]
+            for j in range(rows) for i in range(columns)]
+
+
+def moments_reducer():
+    """Per-tile reducer with everything needed to merge mean, stdDev, min and max"""
+    return (ee.Reducer.mean().unweighted()
+            .combine(ee.Reducer.stdDev().unweighted(), '', True)
+            .combine(ee.Reducer.minMax(), '', True)
+            .combine(ee.Reducer.count(), '', True))
+
+
+class TiledReducer:
+    def __init__(self, get_info, tile_degrees=TILE_DEGREES, max_workers=8, retries=3, backoff=2.0):
+        """get_info evaluates an ee object (e.g. WildfireDataCollector._get_info, which caches per tile)"""
+        self.get_info = get_info
+        self.tile_degrees = tile_degrees
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+
+    def _reduce_tile(self, image, reducer, tile, scale, max_pixels):
+        for attempt in range(self.retries + 1):
+            try:
+                return self.get_info(image.reduceRegion(reducer=reducer, geometry=ee.Geometry.Rectangle(tile),
+                                                        scale=scale, maxPixels=max_pixels))
+            except Exception:
+                if attempt == self.retries:
+                    raise
+                time.sleep(self.backoff * 2 ** attempt)
+
+    def reduce_tiles(self, image, reducer, bbox, scale, max_pixels=MAX_PIXELS):
+        """Raw reduceRegion dictionaries, one per tile of bbox"""
+        tiles = split_bbox(bbox, self.tile_degrees)
+        if len(tiles) == 1:
+            return [self._reduce_tile(image, reducer, tiles[0], scale, max_pixels)]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(tiles))) as executor:
+            return list(executor.map(lambda tile: self._reduce_tile(image, reducer, tile, scale, max_pixels), tiles))
+
+    def moments(self, image, bbox, scale, max_pixels=MAX_PIXELS):
+        """{band: Moments} over bbox"""
+        totals = {}
+        for result in self.reduce_tiles(image, moments_reducer(), bbox, scale, max_pixels):
+            for band in [key[:-len('_count')] for key in result if key.endswith('_count')]:
+                totals[band] = totals.get(band, Moments()).merge(Moments.from_summary(
+                    result.get(f'{band}_count'), result.get(f'{band}_mean'), result.get(f'{band}_stdDev'),
+                    result.get(f'{band}_min'), result.get(f'{band}_max')))
+        return totals
+
+    def stats(self, image, bbox, scale, max_pixels=MAX_PIXELS, min_max=True):
+        """{band}_mean and _stdDev (plus _min and _max), keyed like a combined reduceRegion result"""
+        stats = {}
+        for band, m in self.moments(image, bbox, scale, max_pixels).items():
+            stats[f'{band}_mean'] = float(m.mean) if m.count else None
+            stats[f'{band}_stdDev'] = m.std_dev
+            if min_max:
+                stats[f'{band}_min'] = float(m.minimum) if m.count else None
+                stats[f'{band}_max'] = float(m.maximum) if m.count else None
+        return stats
+
+    def histogram(self, image, bbox, scale, minimum, maximum, steps, max_pixels=MAX_PIXELS):
+        """{band: [[bucket_min, count], ...]} fixed histogram over bbox"""
+        reducer = ee.Reducer.fixedHistogram(minimum, maximum, steps)
+        merged = {}
+        for result in self.reduce_tiles(image, reducer, bbox, scale, max_pixels):
+            for band, rows in result.items():
+                if rows is None:
+                    continue
+                if band not in merged:
+                    merged[band] = [[bucket, 0] for bucket, _ in rows]
+                for total, (_, count) in zip(merged[band], rows):
+                    total[1] += count
+        return merged
+
+    def area_by_class(self, class_image, bbox, scale, max_pixels=MAX_PIXELS):
+        """{class_value: {'area_m2', 'pixel_count'}} of a single-band integer image over bbox"""
+        reducer = ee.Reducer.sum().combine(ee.Reducer.count(), '', True).group(groupField=1, groupName='class')
+        image = ee.Image.pixelArea().addBands(class_image.toInt())
+        totals = {}
+        for result in self.reduce_tiles(image, reducer, bbox, scale, max_pixels):
+            for group in result.get('groups', []):
+                entry = totals.setdefault(int(group['class']), {'area_m2': 0.0, 'pixel_count': 0})
+                entry['area_m2'] += group['sum']
+                entry['pixel_count'] += group['count']
+        return totals